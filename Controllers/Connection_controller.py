@@ -6,10 +6,14 @@ import datetime
 from Untils.logging_helper import sys_logger
 
 Session = sessionmaker(bind=engine)
-def save_connection(name, type, data_port, baudrate, protocol, network, address, port, active):
+def save_connection(name, type, data_port, baudrate, protocol, network, address, port, active, engine=None,
+                    rcvbuf=None, max_datagram=None, workers=None, multicast_group=None, multicast_interface=None,
+                    multicast_ttl=None):
     session = Session()
     try:
-        res = ConnectionModel(name=name, type=type, data_port=data_port, baudrate=baudrate, protocol=protocol, network=network, address=address, port=port, active=active)
+        res = ConnectionModel(name=name, type=type, data_port=data_port, baudrate=baudrate, protocol=protocol, network=network, address=address, port=port, active=active, engine=engine,
+                              rcvbuf=rcvbuf, max_datagram=max_datagram, workers=workers, multicast_group=multicast_group,
+                              multicast_interface=multicast_interface, multicast_ttl=multicast_ttl)
         session.add(res)
         session.commit()
     except Exception as e:
@@ -19,7 +23,9 @@ def save_connection(name, type, data_port, baudrate, protocol, network, address,
     finally:
         session.close()
 
-def update_connection(id, name, type, data_port, baudrate, protocol, network, address, port, active):
+def update_connection(id, name, type, data_port, baudrate, protocol, network, address, port, active, engine=None,
+                      rcvbuf=None, max_datagram=None, workers=None, multicast_group=None, multicast_interface=None,
+                      multicast_ttl=None):
     session = Session()
     try:
         res = session.query(ConnectionModel).filter_by(id=id).first()
@@ -32,6 +38,13 @@ def update_connection(id, name, type, data_port, baudrate, protocol, network, ad
         res.address = address
         res.port = port
         res.active = active
+        res.engine = engine
+        res.rcvbuf = rcvbuf
+        res.max_datagram = max_datagram
+        res.workers = workers
+        res.multicast_group = multicast_group
+        res.multicast_interface = multicast_interface
+        res.multicast_ttl = multicast_ttl
         session.commit()
     except Exception as e:
         session.rollback()
@@ -54,7 +67,14 @@ def get_connection():
             "network": con.network,
             "address": con.address,
             "port": con.port,
-            "active": con.active
+            "active": con.active,
+            "engine": con.engine,
+            "rcvbuf": con.rcvbuf,
+            "max_datagram": con.max_datagram,
+            "workers": con.workers,
+            "multicast_group": con.multicast_group,
+            "multicast_interface": con.multicast_interface,
+            "multicast_ttl": con.multicast_ttl
         } for con in res]
     except Exception as e:
         session.rollback()
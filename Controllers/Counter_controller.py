@@ -0,0 +1,170 @@
+import datetime
+
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from Models.__init__ import engine
+from Models.Counter_model import NmeaCounterModel
+from Models.Upload_model import UploadCursorModel
+
+from Untils.logging_helper import sys_logger
+
+COUNTER_FIELDS = ("received", "uploaded", "failed")
+
+
+def _day_key(created_at):
+    if hasattr(created_at, 'date'):
+        return created_at.date().isoformat()
+    return str(created_at)[:10]
+
+
+def _today_key():
+    return datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).date().isoformat()
+
+
+def count_by_day_connection(records, field):
+    """Kelompokkan record (punya created_at & connection_id) menjadi increment {(hari, koneksi): {field: n}}"""
+    increments = {}
+    for record in records:
+        if isinstance(record, dict):
+            created_at, connection_id = record['created_at'], record['connection_id']
+        else:
+            created_at, connection_id = record.created_at, record.connection_id
+        key = (_day_key(created_at), connection_id or 0)
+        bucket = increments.setdefault(key, {})
+        bucket[field] = bucket.get(field, 0) + 1
+    return increments
+
+
+def merge_increments(*increments):
+    merged = {}
+    for increment in increments:
+        for key, values in increment.items():
+            bucket = merged.setdefault(key, {})
+            for field, value in values.items():
+                bucket[field] = bucket.get(field, 0) + value
+    return merged
+
+
+def apply_counter_increments(conn, increments):
+    """
+    Tambahkan increment ke tabel nmea_counter (UPSERT per hari/koneksi).
+    Dipanggil di dalam transaksi pemanggil supaya counter selalu konsisten dengan datanya.
+    """
+    if not increments:
+        return
+
+    statement = sqlite_insert(NmeaCounterModel)
+    statement = statement.on_conflict_do_update(
+        index_elements=['day', 'connection_id'],
+        set_={field: getattr(NmeaCounterModel, field) + getattr(statement.excluded, field) for field in COUNTER_FIELDS}
+    )
+    conn.execute(statement, [{
+        'day': day,
+        'connection_id': connection_id,
+        'received': values.get('received', 0),
+        'uploaded': values.get('uploaded', 0),
+        'failed': values.get('failed', 0)
+    } for (day, connection_id), values in increments.items()])
+
+
+def _summarize(rows):
+    received = sum(row.received for row in rows)
+    uploaded = sum(row.uploaded for row in rows)
+    failed = sum(row.failed for row in rows)
+    return {
+        'received': received,
+        'uploaded': uploaded,
+        'failed': failed,
+        'pending': max(received - uploaded - failed, 0)
+    }
+
+
+def get_counter_stats(day=None, before_day=None, connection_id=None):
+    """Total received/uploaded/failed/pending dari tabel counter (tanpa scan nmea_data)"""
+    query = NmeaCounterModel.__table__.select()
+    if day is not None:
+        query = query.where(NmeaCounterModel.day == day)
+    if before_day is not None:
+        query = query.where(NmeaCounterModel.day < before_day)
+    if connection_id is not None:
+        query = query.where(NmeaCounterModel.connection_id == connection_id)
+
+    with engine.connect() as conn:
+        return _summarize(conn.execute(query).fetchall())
+
+
+def get_today_counter_stats():
+    return get_counter_stats(day=_today_key())
+
+
+def get_historical_counter_stats():
+    return get_counter_stats(before_day=_today_key())
+
+
+def get_counters_by_day(limit=30):
+    """Ringkasan per hari (terbaru dulu)"""
+    query = NmeaCounterModel.__table__.select().order_by(NmeaCounterModel.day.desc())
+    with engine.connect() as conn:
+        rows = conn.execute(query).fetchall()
+
+    result = {}
+    for row in rows:
+        result.setdefault(row.day, []).append(row)
+    return [dict(day=day, **_summarize(day_rows)) for day, day_rows in list(result.items())[:limit]]
+
+
+def get_counters_by_connection(day=None):
+    """Ringkasan per koneksi, opsional untuk satu hari"""
+    query = NmeaCounterModel.__table__.select()
+    if day is not None:
+        query = query.where(NmeaCounterModel.day == day)
+    with engine.connect() as conn:
+        rows = conn.execute(query).fetchall()
+
+    result = {}
+    for row in rows:
+        result.setdefault(row.connection_id, []).append(row)
+    return [dict(connection_id=connection_id, **_summarize(conn_rows))
+            for connection_id, conn_rows in sorted(result.items())]
+
+
+def rebuild_counters(conn):
+    """Hitung ulang seluruh counter dari nmea_data, cursor upload dan tabel exception"""
+    cursors = {row.name: row for row in conn.execute(UploadCursorModel.__table__.select()).fetchall()}
+    today = cursors.get("today")
+    historical = cursors.get("historical")
+
+    params = {
+        'hist_last': historical.last_upload_id if historical else 0,
+        'hist_boundary': historical.boundary_id if historical and historical.boundary_id is not None else 0,
+        'today_last': today.last_upload_id if today else 0,
+    }
+
+    conn.execute(text("DELETE FROM nmea_counter"))
+    conn.execute(text("""
+        INSERT INTO nmea_counter (day, connection_id, received, uploaded, failed, updated_at)
+        SELECT date(n.created_at),
+               coalesce(n.connection_id, 0),
+               count(*),
+               sum(CASE WHEN e.nmea_id IS NULL AND (n.upload = 1 OR n.id <= :hist_last
+                        OR (n.id > :hist_boundary AND n.id <= :today_last)) THEN 1 ELSE 0 END),
+               sum(CASE WHEN e.status = 'failed' THEN 1 ELSE 0 END),
+               CURRENT_TIMESTAMP
+        FROM nmea_data n
+        LEFT JOIN upload_exception e ON e.nmea_id = n.id
+        GROUP BY 1, 2
+    """), params)
+    return conn.execute(text("SELECT count(*) FROM nmea_counter")).scalar()
+
+
+def reconcile_counters():
+    """Perintah rekonsiliasi: bangun ulang counter dari awal dalam satu transaksi"""
+    try:
+        with engine.begin() as conn:
+            buckets = rebuild_counters(conn)
+        sys_logger.info(f"Counter direkonsiliasi: {buckets} baris hari/koneksi")
+        return buckets
+    except Exception as e:
+        sys_logger.error(f"Error: {e}")
+        raise e
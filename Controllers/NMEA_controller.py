@@ -1,14 +1,35 @@
+import threading
+import time
+
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import func, text
+from sqlalchemy import text, insert
 
 from Models import nmea_data
 from Models.__init__ import engine
 import datetime
-from Services.SignalsMessages import signalsLogger
+from Services.SignalsMessages import signalsError, signalsWarning
+from Services.checksum import checksum_filter
+from Services.dedup import dedup_filter
+from Services.log_bus import log_bus
+from Services.framing import frame_chunk, parse_sentence
+from Controllers.Counter_controller import apply_counter_increments, count_by_day_connection, get_counter_stats
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("receiver")
 
 # Buat session factory
 Session = sessionmaker(bind=engine)
 
+# Batas group commit: flush bila jumlah baris atau umur baris tertua terlampaui
+GROUP_COMMIT_MAX_ROWS = 500
+GROUP_COMMIT_MAX_DELAY = 0.5  # detik
+# Setelah insert gagal (database terkunci, disk penuh) baris ditahan dan dicoba lagi setelah jeda ini
+GROUP_COMMIT_RETRY_DELAY = 1.0  # detik
+# Batas baris yang ditahan selama database tidak bisa ditulis; kelebihannya (yang tertua) dibuang
+GROUP_COMMIT_MAX_PENDING = 50000
+
+AIS_PREFIXES = (b"!AIVDM", b"!AIVDO")
+
 
 def save_nmea_data(data, connection_ids):
     connection_id = connection_ids
@@ -26,157 +47,203 @@ def save_nmea_data(data, connection_ids):
             raise e
 
 
-def batch_save_nmea(nmea_raw, connection_ids):
-    lines = nmea_raw.strip().splitlines()
-    for line in lines:
-        line = line.strip()
-        if line.startswith("!AIVDM") or line.startswith("!AIVDO"):
-            signalsLogger.new_data_received.emit(f"Diterima: {line}")
-            save_nmea_data(line, connection_ids)
-
-
-def get_today_pending_data(batas=350):
-    with Session() as session:
-        try:
-            today_start = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(hour=0, minute=0, second=0,
-                                                                                             microsecond=0)
-            query = session.query(nmea_data).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at >= today_start
-            ).order_by(nmea_data.created_at).limit(batas).all()
-
-            result = []
-            for item in query:
-                result.append({
-                    'id': item.id,
-                    'nmea': item.nmea,
-                    'connection_id': item.connection_id,
-                    'created_at': item.created_at,
-                    'upload': item.upload
-                })
-            return result
-        except Exception as e:
-            session.rollback()
-            raise e
-
-
-def get_today_pending_count():
-    with Session() as session:
-        try:
-            today_start = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(hour=0, minute=0, second=0,
-                                                                                             microsecond=0)
-
-            count = session.query(nmea_data).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at >= today_start
-            ).count()
-            return count
-        except Exception as e:
-            session.rollback()
-            raise e
+def _build_rows(lines, connection_id):
+    timestamp = datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc)
+    return [{
+        'nmea': line,
+        'connection_id': connection_id,
+        'upload': False,
+        'created_at': timestamp,
+        'updated_at': timestamp
+    } for line in lines]
 
 
-def get_old_data_stats():
+def insert_nmea_rows(rows, conn=None):
     """
-    Statistik data lama (sebelum hari ini)
+    Insert banyak baris dalam satu transaksi (executemany).
+    Jika `conn` diberikan (koneksi milik writer thread), transaksi dibuka di koneksi tersebut.
     """
-    with Session() as session:
-        try:
-            today_start = datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(
-                hour=0, minute=0, second=0, microsecond=0)
-
-            old_pending = session.query(nmea_data).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at < today_start
-            ).count()
-
-            old_uploaded = session.query(nmea_data).filter(
-                nmea_data.upload == True,
-                nmea_data.created_at < today_start
-            ).count()
-
-            return {
-                'old_pending': old_pending,
-                'old_uploaded': old_uploaded,
-                'total_old': old_pending + old_uploaded
-            }
-        except Exception as e:
-            session.rollback()
-            raise e
-
-
-def mark_data_as_sent(ids):
-    if not ids:
+    if not rows:
         return 0
 
-    with Session() as session:
-        try:
-            updated_count = session.query(nmea_data).filter(nmea_data.id.in_(ids)).update(
-                {"upload": True}, synchronize_session=False
-            )
-            session.commit()
-            signalsLogger.new_data_received.emit(f"Marked {updated_count} records as uploaded")
-            return updated_count
-        except Exception as e:
-            session.rollback()
-            signalsLogger.new_data_received.emit(f"Error marking data as sent: {str(e)}")
-            raise e
+    # Counter received ikut ditulis di transaksi yang sama
+    increments = count_by_day_connection(rows, 'received')
+    if conn is None:
+        with engine.begin() as conn:
+            conn.execute(insert(nmea_data), rows)
+            apply_counter_increments(conn, increments)
+    else:
+        with conn.begin():
+            conn.execute(insert(nmea_data), rows)
+            apply_counter_increments(conn, increments)
+    return len(rows)
 
 
-def mark_data_as_failed(ids, reason="decode_failed"):
+def save_nmea_bulk(sentences, connection_ids):
     """
-    Tandai data yang gagal decode dengan tracking yang lebih baik
+    Simpan banyak kalimat NMEA sekaligus dalam satu transaksi, lewat saringan yang sama dengan receiver.
+    `sentences` bisa berupa list kalimat (str/bytes) atau satu chunk mentah hasil recv.
     """
-    if not ids:
-        return 0
+    lines = _filter_sentences(_to_sentences(sentences), connection_ids)
+    return insert_nmea_rows(_build_rows(lines, connection_ids))
 
-    with Session() as session:
-        try:
-            # Update dengan tracking yang lebih detail
-            updated_count = session.query(nmea_data).filter(nmea_data.id.in_(ids)).update({
-                "upload": True,
-            }, synchronize_session=False)
 
-            session.commit()
-            signalsLogger.new_data_received.emit(f"Marked {updated_count} records as failed ({reason})")
-            return updated_count
-        except Exception as e:
-            session.rollback()
-            signalsLogger.new_data_received.emit(f"Error marking failed data: {str(e)}")
-            raise e
+class GroupCommitter:
+    """
+    Kumpulkan baris dari beberapa thread receiver dan tulis dalam satu commit
+    begitu jumlah baris mencapai `max_rows` atau baris tertua berumur `max_delay` detik.
+    Bila insert gagal, baris dikembalikan ke depan antrian dan dicoba lagi setelah `retry_delay` detik.
+    """
 
+    def __init__(self, max_rows=GROUP_COMMIT_MAX_ROWS, max_delay=GROUP_COMMIT_MAX_DELAY,
+                 retry_delay=GROUP_COMMIT_RETRY_DELAY, max_pending=GROUP_COMMIT_MAX_PENDING):
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = []
+        self._oldest = None
+        self._retry_at = 0
+
+    def _is_due(self):
+        if not self._pending:
+            return False
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        return len(self._pending) >= self.max_rows or now - self._oldest >= self.max_delay
+
+    def add(self, rows):
+        if not rows:
+            return
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.extend(rows)
+            due = self._is_due()
+        if due:
+            self.flush()
+
+    def flush_if_due(self):
+        with self._lock:
+            due = self._is_due()
+        if due:
+            self.flush()
+
+    def flush(self):
+        # Hanya satu thread yang menulis; thread lain tetap bisa menambah baris ke batch berikutnya
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+                oldest, self._oldest = self._oldest, None
+            try:
+                written = insert_nmea_rows(rows)
+            except Exception as e:
+                self._requeue(rows, oldest)
+                sys_logger.error(f"Group commit gagal menulis {len(rows)} baris, dicoba lagi: {e}")
+                signalsError.new_data_received.emit(f"Gagal menyimpan {len(rows)} baris NMEA, dicoba lagi: {e}")
+                return 0
+            with self._lock:
+                self._retry_at = 0
+            return written
+
+    def _requeue(self, rows, oldest):
+        """Kembalikan baris yang gagal ke depan antrian (urutan tetap), buang yang tertua bila melewati batas"""
+        with self._lock:
+            self._pending[:0] = rows
+            self._oldest = oldest
+            self._retry_at = time.monotonic() + self.retry_delay
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+        if overflow > 0:
+            sys_logger.error(f"Group commit: {overflow} baris tertua dibuang, database tidak bisa ditulis")
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+
+_group_committer = GroupCommitter()
+
+# Tujuan baris hasil receiver; None = langsung ke group commit
+_ingest_sink = None
+
+
+def set_ingest_sink(sink):
+    """Alihkan baris dari batch_save_nmea ke `sink(rows)` (mis. antrian writer thread), None untuk reset"""
+    global _ingest_sink
+    _ingest_sink = sink
+
+
+def _to_sentences(nmea_raw):
+    """Chunk mentah (str/bytes) atau list kalimat str/bytes menjadi list Sentence"""
+    if isinstance(nmea_raw, str):
+        nmea_raw = nmea_raw.encode("ascii", errors="ignore")
+    if isinstance(nmea_raw, (bytes, bytearray)):
+        return frame_chunk(bytes(nmea_raw))
+
+    sentences = []
+    for line in nmea_raw:
+        if isinstance(line, str):
+            line = line.encode("ascii", errors="ignore")
+        sentence = parse_sentence(line.strip())
+        if sentence is not None:
+            sentences.append(sentence)
+    return sentences
+
+
+def _filter_sentences(sentences, connection_ids):
+    """
+    Saring list Sentence (AIS, checksum, duplikat) tanpa konversi ke str;
+    teks baru dibuat untuk kalimat yang lolos dan akan disimpan.
+    """
+    extracted = [s for s in sentences if s.raw.startswith(AIS_PREFIXES)]
+    good = checksum_filter.split(extracted, connection_ids)
+    if len(good) != len(extracted):
+        signalsWarning.new_data_received.emit(
+            f"Checksum salah: {len(extracted) - len(good)} kalimat dari koneksi {connection_ids} tidak disimpan")
+    unique = dedup_filter.split(good, connection_ids)
+    return [s.raw.decode("ascii", errors="ignore") for s in unique]
 
-def get_decode_stats():
-    with Session() as session:
-        try:
 
-            pending_count = session.query(func.count(nmea_data.id)).filter_by(upload=False).scalar()
-            uploaded_count = session.query(func.count(nmea_data.id)).filter_by(upload=True).scalar()
+def batch_save_sentences(sentences, connection_ids):
+    """Jalur ingest utama untuk receiver: list Sentence hasil LineFramer disaring lalu diteruskan ke sink"""
+    lines = _filter_sentences(sentences, connection_ids)
+    log_bus.post_many([f"Diterima: {line}" for line in lines])
 
-            return {'pending': pending_count, 'uploaded': uploaded_count, 'total': pending_count + uploaded_count}
-        except Exception as e:
-            session.rollback()
-            raise e
+    rows = _build_rows(lines, connection_ids)
+    sink = _ingest_sink
+    if sink is not None:
+        sink(rows)
+    else:
+        _group_committer.add(rows)
 
 
-def get_recent_activity():
-    with Session() as session:
-        try:
-            one_hour_ago = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc) - datetime.timedelta(hours=1)
+def batch_save_nmea(nmea_raw, connection_ids):
+    """Simpan chunk mentah atau list kalimat (str/bytes); lihat batch_save_sentences"""
+    batch_save_sentences(_to_sentences(nmea_raw), connection_ids)
 
-            recent_additions = session.query(func.count(nmea_data.id)).filter(
-                nmea_data.created_at >= one_hour_ago).scalar()
 
-            recent_uploads = session.query(func.count(nmea_data.id)).filter(nmea_data.upload == True,
-                                                                            nmea_data.created_at >= one_hour_ago).scalar()
+def flush_pending_nmea(force=False):
+    """Tulis baris yang masih tertahan di group commit (dipanggil saat idle/stop)"""
+    if force:
+        return _group_committer.flush()
+    _group_committer.flush_if_due()
+    return 0
 
-            return {'recent_additions': recent_additions, 'recent_uploads': recent_uploads}
-        except Exception as e:
-            session.rollback()
-            raise e
+
+def get_decode_stats():
+    """Statistik dari tabel counter yang dipelihara saat ingest/upload (tanpa COUNT(*))"""
+    stats = get_counter_stats()
+    return {
+        'pending': stats['pending'],
+        'uploaded': stats['uploaded'],
+        'failed': stats['failed'],
+        'total': stats['received']
+    }
 
 
 def get_ais_latest(last_send_id=None):
@@ -195,101 +262,3 @@ def get_ais_latest(last_send_id=None):
         except Exception as e:
             session.rollback()
             raise e
-
-
-def reset_failed_uploads():
-    with Session() as session:
-        try:
-            old_timestamp = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc) - datetime.timedelta(hours=2)
-
-            reset_count = session.query(nmea_data).filter(
-                nmea_data.upload == True,
-                nmea_data.created_at < old_timestamp,
-                nmea_data.created_at > old_timestamp
-            ).update({"upload": False}, synchronize_session=False)
-            session.commit()
-            signalsLogger.new_data_received.emit(f"Reset {reset_count} potentially stuck records")
-            return reset_count
-        except Exception as e:
-            session.rollback()
-            raise e
-
-
-def get_historical_data_stats():
-    """Get statistics for historical data (before today)"""
-    with Session() as session:
-        try:
-            today_start = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(hour=0, minute=0, second=0,
-                                                                                             microsecond=0)
-
-            # Get date range of historical data
-            oldest = session.query(func.min(nmea_data.created_at)).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at < today_start
-            ).scalar()
-
-            newest = session.query(func.max(nmea_data.created_at)).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at < today_start
-            ).scalar()
-
-            total_pending = session.query(func.count(nmea_data.id)).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at < today_start
-            ).scalar()
-
-            return {
-                'total_pending': total_pending,
-                'oldest_date': oldest,
-                'newest_date': newest,
-                'date_range_days': (newest - oldest).days if oldest and newest else 0
-            }
-        except Exception as e:
-            session.rollback()
-            raise e
-
-
-def get_historical_pending_data(limit=10000, offset=0):
-    """Get batch of historical data (before today)"""
-    with Session() as session:
-        try:
-            today_start = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(hour=0, minute=0, second=0,
-                                                                                             microsecond=0)
-
-            query = session.query(nmea_data).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at < today_start
-            ).order_by(nmea_data.created_at).offset(offset).limit(limit).all()
-
-            result = []
-            for item in query:
-                result.append({
-                    'id': item.id,
-                    'nmea': item.nmea,
-                    'connection_id': item.connection_id,
-                    'created_at': item.created_at,
-                    'upload': item.upload
-                })
-            return result
-        except Exception as e:
-            session.rollback()
-            raise e
-
-def get_historical_pending_count():
-    with Session() as session:
-        try:
-            today_start = datetime.datetime.now(
-                datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(hour=0, minute=0, second=0,
-                                                                                             microsecond=0)
-
-            count = session.query(nmea_data).filter(
-                nmea_data.upload == False,
-                nmea_data.created_at < today_start
-            ).count()
-            return count
-        except Exception as e:
-            session.rollback()
-            raise e
@@ -3,7 +3,9 @@ from Models.__init__ import engine
 from Models.Sender_model import SenderModel
 import datetime
 
-from Untils.logging_helper import sys_logger
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("sender")
 
 Session = sessionmaker(bind=engine)
 
@@ -0,0 +1,268 @@
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import sessionmaker
+
+from Models.__init__ import engine
+from Models.NMEA_model import nmea_data
+from Models.Upload_model import UploadCursorModel, UploadExceptionModel
+from Controllers.Counter_controller import apply_counter_increments, count_by_day_connection, merge_increments
+import datetime
+
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("uploader")
+
+Session = sessionmaker(bind=engine)
+
+# Uploader data hari ini menangani id > last_upload_id tanpa batas atas.
+# Uploader data lama menangani id dalam (last_upload_id, boundary_id].
+TODAY_CURSOR = "today"
+HISTORICAL_CURSOR = "historical"
+
+MAX_UPLOAD_ATTEMPTS = 2
+PAGE_FETCH_SIZE = 1000
+
+_cursor_lock = threading.Lock()
+
+
+def _chunks(ids, size=500):
+    ids = list(ids)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def _today_start():
+    return datetime.datetime.now(
+        datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc).replace(hour=0, minute=0, second=0,
+                                                                                     microsecond=0)
+
+
+def _first_id_query(since):
+    # ORDER BY created_at LIMIT 1 memakai index created_at, bukan scan
+    return select(nmea_data.id).where(nmea_data.created_at >= since).order_by(nmea_data.created_at).limit(1)
+
+
+def _first_id_since(session, since):
+    row = session.execute(_first_id_query(since)).first()
+    return row[0] if row else None
+
+
+def _ensure_cursors(session):
+    """
+    Buat cursor 'today' dan 'historical' bila belum ada.
+    Posisi awal diambil dari flag upload lama agar tidak ada data yang dikirim ulang.
+    """
+    cursors = {c.name: c for c in session.query(UploadCursorModel).filter(
+        UploadCursorModel.name.in_([TODAY_CURSOR, HISTORICAL_CURSOR])).all()}
+
+    if TODAY_CURSOR not in cursors:
+        first_today = _first_id_since(session, _today_start())
+        if first_today is None:
+            start_id = session.query(func.max(nmea_data.id)).scalar() or 0
+        else:
+            start_id = first_today - 1
+        cursors[TODAY_CURSOR] = UploadCursorModel(name=TODAY_CURSOR, last_upload_id=start_id, boundary_id=None)
+        session.add(cursors[TODAY_CURSOR])
+
+    if HISTORICAL_CURSOR not in cursors:
+        boundary = cursors[TODAY_CURSOR].last_upload_id
+        oldest_pending = session.query(func.min(nmea_data.id)).filter(
+            nmea_data.upload == False,
+            nmea_data.id <= boundary
+        ).scalar()
+        start_id = oldest_pending - 1 if oldest_pending is not None else boundary
+        cursors[HISTORICAL_CURSOR] = UploadCursorModel(name=HISTORICAL_CURSOR, last_upload_id=start_id,
+                                                       boundary_id=boundary)
+        session.add(cursors[HISTORICAL_CURSOR])
+
+    session.flush()
+    return cursors
+
+
+def get_upload_cursor(name):
+    with _cursor_lock, Session() as session:
+        try:
+            cursor = _ensure_cursors(session)[name]
+            session.commit()
+            return {
+                'name': cursor.name,
+                'last_upload_id': cursor.last_upload_id,
+                'boundary_id': cursor.boundary_id
+            }
+        except Exception as e:
+            session.rollback()
+            sys_logger.error(f"Error: {e}")
+            raise e
+
+
+def rollover_upload_cursors():
+    """
+    Saat hari berganti, serahkan data hari sebelumnya yang belum terkirim oleh uploader 'today'
+    ke uploader 'historical'. Hanya dilakukan bila uploader 'historical' sudah menyelesaikan
+    rentangnya, sehingga rentang miliknya tetap satu blok id yang kontinu.
+    """
+    with _cursor_lock, Session() as session:
+        try:
+            cursors = _ensure_cursors(session)
+            today = cursors[TODAY_CURSOR]
+            historical = cursors[HISTORICAL_CURSOR]
+
+            first_today = _first_id_since(session, _today_start())
+            if first_today is None or today.last_upload_id >= first_today - 1:
+                session.commit()
+                return False
+
+            if historical.last_upload_id < historical.boundary_id:
+                session.commit()
+                return False
+
+            historical.last_upload_id = today.last_upload_id
+            historical.boundary_id = first_today - 1
+            today.last_upload_id = first_today - 1
+            session.commit()
+            sys_logger.info(f"Upload cursor rollover: id {historical.last_upload_id + 1}-{historical.boundary_id} "
+                            f"diserahkan ke uploader data lama")
+            return True
+        except Exception as e:
+            session.rollback()
+            sys_logger.error(f"Error: {e}")
+            raise e
+
+
+def _pending_rows_query(cursor, after_id, limit):
+    query = select(nmea_data.id, nmea_data.nmea, nmea_data.connection_id, nmea_data.created_at).where(
+        nmea_data.id > after_id,
+        nmea_data.upload == False
+    )
+    if cursor['boundary_id'] is not None:
+        query = query.where(nmea_data.id <= cursor['boundary_id'])
+    return query.order_by(nmea_data.id).limit(limit)
+
+
+def iter_pending_batches(name, batch_size, after_id=None):
+    """
+    Generator halaman data pending setelah high-water mark uploader.
+    Paging memakai keyset (id > id terakhir) sehingga biaya per halaman tetap,
+    dan baris dikembalikan sebagai tuple ringan (id, nmea, connection_id, created_at).
+    """
+    cursor = get_upload_cursor(name)
+    last_id = cursor['last_upload_id'] if after_id is None else after_id
+
+    while True:
+        with engine.connect() as conn:
+            result = conn.execution_options(yield_per=PAGE_FETCH_SIZE).execute(
+                _pending_rows_query(cursor, last_id, batch_size))
+            page = list(result)
+
+        if not page:
+            return
+
+        last_id = page[-1].id
+        yield page
+
+        if len(page) < batch_size:
+            return
+
+
+def get_pending_after_cursor(name, limit):
+    """Ambil satu halaman data setelah high-water mark uploader, urut id"""
+    return next(iter_pending_batches(name, limit), [])
+
+
+def _retry_rows_query(name, limit):
+    return select(nmea_data.id, nmea_data.nmea, nmea_data.connection_id, nmea_data.created_at).join(
+        UploadExceptionModel, UploadExceptionModel.nmea_id == nmea_data.id
+    ).where(
+        UploadExceptionModel.uploader == name,
+        UploadExceptionModel.status == "retry"
+    ).order_by(nmea_data.id).limit(limit)
+
+
+def get_retry_exceptions(name, limit):
+    """Ambil data yang masih menunggu percobaan ulang untuk uploader ini"""
+    with engine.connect() as conn:
+        return conn.execute(_retry_rows_query(name, limit)).fetchall()
+
+
+def _advance_cursor(session, name, last_id):
+    """Geser high-water mark uploader; tidak pernah mundur dan tidak melewati boundary_id"""
+    cursor = _ensure_cursors(session)[name]
+    if last_id is not None and last_id > cursor.last_upload_id:
+        if cursor.boundary_id is not None:
+            last_id = min(last_id, cursor.boundary_id)
+        cursor.last_upload_id = last_id
+    return cursor
+
+
+def _add_exceptions(session, name, ids, reason):
+    """Catat id di bawah high-water mark agar dicoba ulang sekali"""
+    if ids:
+        # executemany + ON CONFLICT: tidak terbatas jumlah bound parameter SQLite
+        session.execute(
+            sqlite_insert(UploadExceptionModel).on_conflict_do_nothing(index_elements=['nmea_id']),
+            [{'nmea_id': nmea_id, 'uploader': name, 'reason': reason, 'status': "retry", 'attempts': 1}
+             for nmea_id in ids]
+        )
+
+
+def _resolve_exceptions(session, ids):
+    """Hapus exception untuk id yang akhirnya berhasil terkirim"""
+    for chunk in _chunks(ids):
+        session.query(UploadExceptionModel).filter(
+            UploadExceptionModel.nmea_id.in_(chunk)
+        ).delete(synchronize_session=False)
+
+
+def _fail_exceptions(session, ids, reason):
+    """
+    Naikkan jumlah percobaan; setelah MAX_UPLOAD_ATTEMPTS exception ditandai gagal permanen.
+    Kembalikan id yang baru saja menjadi gagal permanen.
+    """
+    permanently_failed = []
+    for chunk in _chunks(ids):
+        for item in session.query(UploadExceptionModel).filter(UploadExceptionModel.nmea_id.in_(chunk)).all():
+            item.attempts += 1
+            item.reason = reason
+            if item.attempts >= MAX_UPLOAD_ATTEMPTS and item.status != "failed":
+                item.status = "failed"
+                permanently_failed.append(item.nmea_id)
+    return permanently_failed
+
+
+def commit_upload_batch(name, last_id, failed_ids=None, resolved_ids=None, retry_failed_ids=None,
+                        reason="decode_failed", records=None, sent_ids=None, waiting_ids=None):
+    """
+    Simpan hasil satu batch upload dalam satu transaksi:
+    geser high-water mark ke `last_id`, catat id gagal baru dan fragmen yang pesannya belum lengkap
+    (`waiting_ids`, reason "fragment_waiting") sebagai exception,
+    hapus exception yang berhasil dikirim ulang, naikkan percobaan exception yang gagal lagi,
+    dan perbarui counter uploaded/failed untuk `records` batch tersebut.
+    """
+    failed_ids = failed_ids or []
+    waiting_ids = waiting_ids or []
+    resolved_ids = resolved_ids or []
+    retry_failed_ids = retry_failed_ids or []
+    records_by_id = {record.id: record for record in records or []}
+    sent_ids = set(sent_ids or [])
+
+    with _cursor_lock, Session() as session:
+        try:
+            cursor = _advance_cursor(session, name, last_id)
+            _add_exceptions(session, name, failed_ids, reason)
+            _add_exceptions(session, name, waiting_ids, "fragment_waiting")
+            _resolve_exceptions(session, resolved_ids)
+            permanently_failed = _fail_exceptions(session, retry_failed_ids, reason)
+
+            apply_counter_increments(session.connection(), merge_increments(
+                count_by_day_connection([records_by_id[i] for i in sent_ids if i in records_by_id], 'uploaded'),
+                count_by_day_connection([records_by_id[i] for i in permanently_failed if i in records_by_id], 'failed')
+            ))
+
+            session.commit()
+            return cursor.last_upload_id
+        except Exception as e:
+            session.rollback()
+            sys_logger.error(f"Error: {e}")
+            raise e
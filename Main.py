@@ -1,14 +1,14 @@
 import configparser
+import multiprocessing
 import sys
 import os
 import sqlite3
-import migrations
-from PyQt6.QtGui import QIcon
-from PyQt6.QtWidgets import QApplication
 
-from Pages.Main_page import AISViewer
 from Untils.path_helper import get_resource_path
 
+# Modul ini juga diimpor ulang oleh proses worker decode (spawn, sebagai __mp_main__):
+# import berat (Qt, Models/database, migrations) hanya dilakukan di dalam fungsi / blok __main__.
+
 
 def Checkmigrate():
     try:
@@ -57,6 +57,74 @@ def initialize_config():
 AIS = https://bytenusa.cloud/api/v1/ais/bulk
 GET_STATION = https://bytenusa.cloud/api/v1/station/check
 POST_STATION = https://bytenusa.cloud/api/v1/station
+
+[DATABASE]
+; durable | balanced | throughput (pragma bisa di-override per key, mis. synchronous = FULL)
+profile = balanced
+
+[INGEST]
+; Antrian antara receiver dan writer database
+queue_size = 50000
+; block | drop_oldest | spill
+overflow_policy = drop_oldest
+batch_size = 500
+max_delay = 0.5
+spill_file = spill/ingest_spill.jsonl
+; Kalimat dengan checksum NMEA salah tidak disimpan ke nmea_data (false: kalimat tanpa *hh juga diterima)
+verify_checksum = true
+; Opsional: simpan kalimat yang ditolak untuk diperiksa, mis. quarantine/bad_checksum.log (kosong = tidak disimpan)
+quarantine_file =
+; Buang kalimat yang sama (payload + fill bits) yang datang lagi dari koneksi mana pun dalam window (detik)
+dedup = true
+dedup_window = 5
+; Batas memori: jumlah kunci maksimum yang diingat
+dedup_max_entries = 100000
+; Abaikan talker ID (AI, BS, ...) saat membandingkan kalimat
+dedup_normalize_talker = true
+
+[RECEIVER]
+; thread | asyncio (default untuk koneksi yang tidak memilih engine sendiri)
+engine = thread
+; Default UDP: ukuran SO_RCVBUF (bytes, dibatasi net.core.rmem_max di Linux) dan datagram maksimum
+udp_rcvbuf = 4194304
+udp_max_datagram = 65535
+; Jumlah socket SO_REUSEPORT per port UDP (1 = satu socket); kernel membagi pengirim antar socket
+; (thread dalam satu proses: menambah buffer terima, bukan throughput CPU)
+udp_workers = 1
+
+[UI]
+; Log di jendela utama ditulis per batch setiap log_flush_interval ms
+log_flush_interval = 250
+; Pesan lebih dari ini per flush diringkas menjadi "N pesan tidak ditampilkan"
+log_max_per_flush = 500
+; Kapasitas ring buffer pesan yang menunggu ditampilkan
+log_buffer_size = 10000
+; Jumlah baris maksimum di widget log
+log_max_lines = 100000
+
+[LOGGING]
+; size | time: rotasi logs/*.log saat mencapai max_bytes, atau per interval `when` (midnight, H, D, ...)
+rotation = size
+max_bytes = 10485760
+when = midnight
+backup_count = 10
+; File hasil rotasi dikompres menjadi .gz
+compress = true
+; Level per subsystem: DEBUG | INFO | WARNING | ERROR
+level_receiver = INFO
+level_decoder = INFO
+level_uploader = INFO
+level_sender = INFO
+
+[DECODER]
+; Laporan posisi (tipe 1/2/3/18) di-decode per batch dengan NumPy; false = selalu lewat ais.decode
+vectorized = true
+; Decode paralel untuk pengiriman data lama: jumlah proses (0 = jumlah CPU - 1, 1 = tanpa proses tambahan);
+; pool dibuat saat batch besar pertama, tidak pernah di mesin satu CPU
+workers = 0
+; Batch lebih kecil dari ini di-decode tanpa worker; ukuran potongan per tugas worker
+parallel_min_batch = 2000
+chunk_size = 2500
 """
         try:
             with open(config_path, 'w') as f:
@@ -90,6 +158,8 @@ POST_STATION = https://bytenusa.cloud/api/v1/station
     return config_path
 
 def MigrateRun():
+    import migrations
+
     try:
 
 
@@ -107,6 +177,9 @@ def MigrateRun():
 
 
 if __name__ == "__main__":
+    # Wajib untuk build executable: proses worker decode (spawn) menjalankan ulang executable ini
+    multiprocessing.freeze_support()
+
     # Inisialisasi config (hanya dibuat jika belum ada)
     config_file = initialize_config()
     print(f"✅ Config file: {config_file}")
@@ -116,6 +189,18 @@ if __name__ == "__main__":
         print("Database belum setup, menjalankan migrasi...")
         MigrateRun()
 
+    # Migrasi skema berversi (index, tabel baru) untuk database yang sudah ada
+    import migrations
+    migrations.apply_schema_migrations()
+
+    from Models import get_active_pragmas
+    from Untils.logging_helper import sys_logger
+    sys_logger.info(f"SQLite storage pragmas: {get_active_pragmas()}")
+
+    from PyQt6.QtGui import QIcon
+    from PyQt6.QtWidgets import QApplication
+    from Pages.Main_page import AISViewer
+
     app = QApplication(sys.argv)
     QApplication.setOrganizationName("Integra Corp")
     QApplication.setApplicationName("NMEA Receiver IPM")
@@ -17,6 +17,13 @@ class ConnectionModel(Base):
     address = Column(String, nullable=True)
     port = Column(String, nullable=True)
     active = Column(Integer, nullable=True)
+    engine = Column(String, nullable=True)
+    rcvbuf = Column(Integer, nullable=True)
+    max_datagram = Column(Integer, nullable=True)
+    workers = Column(Integer, nullable=True)
+    multicast_group = Column(String, nullable=True)
+    multicast_interface = Column(String, nullable=True)
+    multicast_ttl = Column(Integer, nullable=True)
     created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc),
                         onupdate=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
\ No newline at end of file
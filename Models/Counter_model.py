@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, UniqueConstraint
+from sqlalchemy.ext.declarative import declarative_base
+import datetime
+
+Base = declarative_base()
+
+class NmeaCounterModel(Base):
+    __tablename__ = "nmea_counter"
+    __table_args__ = (UniqueConstraint("day", "connection_id", name="uq_nmea_counter_day_connection"),)
+
+    id = Column(Integer, primary_key=True)
+    day = Column(String, nullable=False)
+    connection_id = Column(Integer, nullable=False, default=0)
+    received = Column(Integer, nullable=False, default=0)
+    uploaded = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc),
+                        onupdate=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.ext.declarative import declarative_base
+import datetime
+
+Base = declarative_base()
+
+class UploadCursorModel(Base):
+    __tablename__ = "upload_cursor"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+    last_upload_id = Column(Integer, nullable=False, default=0)
+    boundary_id = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc),
+                        onupdate=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
+
+class UploadExceptionModel(Base):
+    __tablename__ = "upload_exception"
+
+    id = Column(Integer, primary_key=True)
+    nmea_id = Column(Integer, unique=True, nullable=False)
+    uploader = Column(String, nullable=False, index=True)
+    reason = Column(String, nullable=True)
+    status = Column(String, nullable=False, default="retry")
+    attempts = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc),
+                        onupdate=lambda: datetime.datetime.now(datetime.UTC if hasattr(datetime, 'UTC') else datetime.timezone.utc))
@@ -1,20 +1,143 @@
 import os
 import sys
+import configparser
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 
 from Models.NMEA_model import nmea_data
 from Models.Config_model import ConfigModel
 from Models.Connection_model import ConnectionModel
 from Models.Sender_model import SenderModel
+from Models.Upload_model import UploadCursorModel, UploadExceptionModel
+from Models.Counter_model import NmeaCounterModel
 from Untils.path_helper import get_resource_path
+from Untils.logging_helper import get_logger
+
+# Profil storage dipakai jalur tulis receiver, jadi peringatannya masuk ke logger receiver
+sys_logger = get_logger("receiver")
+
+# Profil performa SQLite, diterapkan ke setiap koneksi baru
+STORAGE_PROFILES = {
+    "durable": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "cache_size": -16000,       # KiB (negatif = ukuran, bukan jumlah halaman)
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,       # ms
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -32000,
+        "mmap_size": 134217728,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    "throughput": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -65536,
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+        "busy_timeout": 10000,
+    },
+}
+DEFAULT_STORAGE_PROFILE = "balanced"
+
+# Pragma yang boleh diatur lewat config: himpunan nilai (huruf besar) atau rentang integer (min, max)
+PRAGMA_RULES = {
+    "journal_mode": {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"},
+    "synchronous": {"OFF", "NORMAL", "FULL", "EXTRA", "0", "1", "2", "3"},
+    "cache_size": (-4194304, 4194304),
+    "mmap_size": (0, 17179869184),
+    "temp_store": {"DEFAULT", "FILE", "MEMORY", "0", "1", "2"},
+    "busy_timeout": (0, 600000),
+}
+
+
+def validate_pragma(key, value):
+    """Nilai pragma yang sudah dinormalisasi, atau None bila nama atau nilainya tidak diizinkan"""
+    rule = PRAGMA_RULES.get(key)
+    if rule is None:
+        return None
+    if isinstance(rule, tuple):
+        try:
+            number = int(str(value).strip())
+        except ValueError:
+            return None
+        return number if rule[0] <= number <= rule[1] else None
+    value = str(value).strip().upper()
+    return value if value in rule else None
+
+
+def load_storage_profile():
+    """Baca profil dari section [DATABASE] di config.ini, nilai per-pragma boleh di-override"""
+    config = configparser.ConfigParser()
+    config.read(get_resource_path("config.ini", is_config=True))
+
+    name = config.get("DATABASE", "profile", fallback=DEFAULT_STORAGE_PROFILE).strip().lower()
+    if name not in STORAGE_PROFILES:
+        sys_logger.warning(f"Storage profile '{name}' tidak dikenal, memakai '{DEFAULT_STORAGE_PROFILE}'")
+        name = DEFAULT_STORAGE_PROFILE
+
+    pragmas = dict(STORAGE_PROFILES[name])
+    if config.has_section("DATABASE"):
+        for key in config.options("DATABASE"):
+            if key == "profile":
+                continue
+            raw = config.get("DATABASE", key)
+            if key not in PRAGMA_RULES:
+                sys_logger.warning(f"Pragma '{key}' tidak diizinkan, diabaikan")
+                continue
+            value = validate_pragma(key, raw)
+            if value is None:
+                sys_logger.warning(f"Nilai pragma {key}='{raw}' tidak valid, memakai {pragmas[key]}")
+                continue
+            pragmas[key] = value
+    return name, pragmas
+
 
 Base = declarative_base()
 db_path = get_resource_path("nmea_data.db", is_database=True)
 engine = create_engine(f"sqlite:///{db_path}")
+storage_profile, storage_pragmas = load_storage_profile()
+
+
+@event.listens_for(engine, "connect")
+def _apply_storage_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for key, value in storage_pragmas.items():
+            # Nama dan nilai disisipkan langsung ke SQL, jadi hanya yang lolos whitelist yang dijalankan
+            value = validate_pragma(key, value)
+            if value is not None:
+                cursor.execute(f"PRAGMA {key}={value}")
+    finally:
+        cursor.close()
+
+
+def get_active_pragmas():
+    """Ambil nilai pragma yang benar-benar aktif pada koneksi database"""
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        active = {"profile": storage_profile}
+        for key in storage_pragmas:
+            cursor.execute(f"PRAGMA {key}")
+            row = cursor.fetchone()
+            active[key] = row[0] if row else None
+        cursor.close()
+        return active
+    finally:
+        connection.close()
+
 
 nmea_data.__table__.create(bind=engine, checkfirst=True)
 ConfigModel.__table__.create(bind=engine, checkfirst=True)
 ConnectionModel.__table__.create(bind=engine, checkfirst=True)
 SenderModel.__table__.create(bind=engine, checkfirst=True)
+UploadCursorModel.__table__.create(bind=engine, checkfirst=True)
+UploadExceptionModel.__table__.create(bind=engine, checkfirst=True)
+NmeaCounterModel.__table__.create(bind=engine, checkfirst=True)
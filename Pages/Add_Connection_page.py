@@ -1,6 +1,9 @@
+import ipaddress
+
 from PyQt6.QtCore import pyqtSignal
+from PyQt6.QtGui import QIntValidator
 from PyQt6.uic import loadUi
-from PyQt6.QtWidgets import QDialog
+from PyQt6.QtWidgets import QDialog, QMessageBox
 import serial.tools.list_ports
 
 from Controllers.Connection_controller import save_connection, update_connection
@@ -29,12 +32,23 @@ class AddConnectionWindow(QDialog):
         self.comboProtocol.addItem("NMEA 0183", "nmea0183")
         self.comboProtocol.addItem("NMEA 2000", "nmea2000")
 
+        self.comboEngine.addItem("Default (config.ini)", None)
+        self.comboEngine.addItem("Thread", "thread")
+        self.comboEngine.addItem("Asyncio", "asyncio")
+
         self.buttonBox.accepted.connect(self.saveData)
         self.buttonBox.rejected.connect(self.reject)
 
         # Hubungkan event radio button ke fungsi
         self.radioSerial.toggled.connect(self.on_radio_type_changed)
         self.radioNetwork.toggled.connect(self.on_radio_type_changed)
+        self.radioUdp.toggled.connect(self.on_radio_type_changed)
+
+        size_validator = QIntValidator(0, 2147483647, self)
+        self.lineRcvbuf.setValidator(size_validator)
+        self.lineMaxDatagram.setValidator(size_validator)
+        self.lineWorkers.setValidator(QIntValidator(1, 64, self))
+        self.lineMulticastTtl.setValidator(QIntValidator(0, 255, self))
 
         if self.connection_data:
             self.load_connection_data()
@@ -63,10 +77,25 @@ class AddConnectionWindow(QDialog):
             self.radioNetwork.setChecked(True)
             if self.connection_data["network"] == "tcp":
                 self.radioTcp.setChecked(True)
+            elif self.connection_data["network"] == "tcp_client":
+                self.radioTcpClient.setChecked(True)
             else:
                 self.radioUdp.setChecked(True)
             self.lineAddress.setText(self.connection_data["address"])
             self.linePort.setText(str(self.connection_data["port"]))
+            if self.connection_data.get("rcvbuf"):
+                self.lineRcvbuf.setText(str(self.connection_data["rcvbuf"]))
+            if self.connection_data.get("max_datagram"):
+                self.lineMaxDatagram.setText(str(self.connection_data["max_datagram"]))
+            if self.connection_data.get("workers"):
+                self.lineWorkers.setText(str(self.connection_data["workers"]))
+            self.lineMulticastGroup.setText(self.connection_data.get("multicast_group") or "")
+            self.lineMulticastInterface.setText(self.connection_data.get("multicast_interface") or "")
+            if self.connection_data.get("multicast_ttl") is not None:
+                self.lineMulticastTtl.setText(str(self.connection_data["multicast_ttl"]))
+
+        engine_index = self.comboEngine.findData(self.connection_data.get("engine"))
+        self.comboEngine.setCurrentIndex(engine_index if engine_index != -1 else 0)
 
         protocol_index = self.comboProtocol.findData(self.connection_data["protocol"])
         if protocol_index != -1:
@@ -103,6 +132,17 @@ class AddConnectionWindow(QDialog):
             self.labelDataPort.hide()
             self.comboDataPort.hide()
 
+        udp_visible = self.radioNetwork.isChecked() and self.radioUdp.isChecked()
+        self.labelRcvbuf.setVisible(udp_visible)
+        self.lineRcvbuf.setVisible(udp_visible)
+        self.labelMaxDatagram.setVisible(udp_visible)
+        self.lineMaxDatagram.setVisible(udp_visible)
+        self.labelWorkers.setVisible(udp_visible)
+        self.lineWorkers.setVisible(udp_visible)
+        for widget in (self.labelMulticastGroup, self.lineMulticastGroup, self.labelMulticastInterface,
+                       self.lineMulticastInterface, self.labelMulticastTtl, self.lineMulticastTtl):
+            widget.setVisible(udp_visible)
+
     def set_default_values(self):
         self.lineName.setText("New Connection")
         self.radioSerial.setChecked(True)
@@ -111,6 +151,7 @@ class AddConnectionWindow(QDialog):
         self.linePort.setText("10110")
         self.comboBaudrate.setCurrentIndex(4)
         self.comboDataPort.setCurrentIndex(0)
+        self.comboEngine.setCurrentIndex(0)
 
     def saveData(self):
         name = self.lineName.text()
@@ -118,15 +159,42 @@ class AddConnectionWindow(QDialog):
         data_port = self.comboDataPort.itemData(self.comboDataPort.currentIndex())
         baudrate = self.comboBaudrate.currentText()
         protocol = self.comboProtocol.itemData(self.comboProtocol.currentIndex())
-        network = "tcp" if self.radioTcp.isChecked() else "udp"
+        if self.radioTcp.isChecked():
+            network = "tcp"
+        elif self.radioTcpClient.isChecked():
+            network = "tcp_client"
+        else:
+            network = "udp"
         address = self.lineAddress.text()
         port = self.linePort.text()
         active = 1
+        engine = self.comboEngine.itemData(self.comboEngine.currentIndex())
+        # Kosong = pakai default [RECEIVER] di config.ini
+        rcvbuf = int(self.lineRcvbuf.text()) if self.lineRcvbuf.text() else None
+        max_datagram = int(self.lineMaxDatagram.text()) if self.lineMaxDatagram.text() else None
+        workers = int(self.lineWorkers.text()) if self.lineWorkers.text() else None
+        multicast_group = self.lineMulticastGroup.text().strip() or None
+        multicast_interface = self.lineMulticastInterface.text().strip() or None
+        multicast_ttl = int(self.lineMulticastTtl.text()) if self.lineMulticastTtl.text() else None
+
+        if multicast_group:
+            try:
+                if not ipaddress.ip_address(multicast_group).is_multicast:
+                    raise ValueError
+            except ValueError:
+                QMessageBox.warning(self, "Multicast", f"{multicast_group} bukan alamat grup multicast (224.0.0.0/4)")
+                return
 
         if self.connection_data:
-            update_connection(self.connection_data['id'], name, types, data_port, baudrate, protocol, network, address, port, active)
+            update_connection(self.connection_data['id'], name, types, data_port, baudrate, protocol, network, address, port, active, engine,
+                              rcvbuf=rcvbuf, max_datagram=max_datagram, workers=workers,
+                              multicast_group=multicast_group, multicast_interface=multicast_interface,
+                              multicast_ttl=multicast_ttl)
         else:
-            save_connection(name, types, data_port, baudrate, protocol, network, address, port, active)
+            save_connection(name, types, data_port, baudrate, protocol, network, address, port, active, engine,
+                            rcvbuf=rcvbuf, max_datagram=max_datagram, workers=workers,
+                            multicast_group=multicast_group, multicast_interface=multicast_interface,
+                            multicast_ttl=multicast_ttl)
 
         self.data_saved.emit("Connection Save")
         self.close()
\ No newline at end of file
@@ -72,6 +72,13 @@ class ConnectionWindow(QDialog):
                 group_box.setProperty("port", con["port"])
                 group_box.setProperty("protocol", con["protocol"])
                 group_box.setProperty("network", con["network"])
+                group_box.setProperty("engine", con["engine"])
+                group_box.setProperty("rcvbuf", con["rcvbuf"])
+                group_box.setProperty("max_datagram", con["max_datagram"])
+                group_box.setProperty("workers", con["workers"])
+                group_box.setProperty("multicast_group", con["multicast_group"])
+                group_box.setProperty("multicast_interface", con["multicast_interface"])
+                group_box.setProperty("multicast_ttl", con["multicast_ttl"])
                 layout = QGridLayout()
 
                 # parsing data
@@ -101,7 +108,7 @@ class ConnectionWindow(QDialog):
                 layout.addWidget(DType, 1, 2)
 
                 if con["type"] == "network":
-                    DProtocol = QLabel(f"{con['protocol'].upper()} {con['network'].upper()}")
+                    DProtocol = QLabel(f"{con['protocol'].upper()} {con['network'].replace('_', ' ').upper()}")
                     DProtocol.setFont(font)
 
                     layout.addWidget(QLabel("Protocol"), 0, 3)
@@ -195,7 +202,14 @@ class ConnectionWindow(QDialog):
             "protocol": self.selected_group.property("protocol"),
             "address": self.selected_group.property("address"),
             "port": self.selected_group.property("port"),
-            "network": self.selected_group.property("network")
+            "network": self.selected_group.property("network"),
+            "engine": self.selected_group.property("engine"),
+            "rcvbuf": self.selected_group.property("rcvbuf"),
+            "max_datagram": self.selected_group.property("max_datagram"),
+            "workers": self.selected_group.property("workers"),
+            "multicast_group": self.selected_group.property("multicast_group"),
+            "multicast_interface": self.selected_group.property("multicast_interface"),
+            "multicast_ttl": self.selected_group.property("multicast_ttl")
         }
 
         edit_connection_window = AddConnectionWindow(self, connection_data)
@@ -4,13 +4,69 @@ from datetime import datetime
 
 from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout,
-                             QWidget, QPushButton, QTextEdit, QLabel,
+                             QWidget, QPushButton, QPlainTextEdit, QLabel,
                              QTabWidget, QComboBox, QSpinBox, QCheckBox, QFileDialog)
-from PyQt6.QtGui import QFont, QColor, QTextCursor
+from PyQt6.QtGui import QFont, QColor, QSyntaxHighlighter, QTextCharFormat
 
 from Services.SignalsMessages import signalsLogger, signalsInfo
 from Untils.logging_helper import sys_logger, error_file_logger
 
+TAIL_BLOCK_SIZE = 65536
+
+
+def read_tail(path, max_lines=None):
+    """
+    Baca `max_lines` baris terakhir dengan seek dari akhir file per blok (None = seluruh file).
+    Kembalikan (lines, offset akhir yang sudah dibaca, inode file).
+    """
+    with open(path, 'rb') as file:
+        stat = os.fstat(file.fileno())
+        end = stat.st_size
+        if max_lines is None:
+            data = file.read(end)
+        else:
+            data = b""
+            position = end
+            # +1 karena blok pertama bisa dimulai di tengah baris
+            while position > 0 and data.count(b"\n") <= max_lines:
+                step = min(TAIL_BLOCK_SIZE, position)
+                position -= step
+                file.seek(position)
+                data = file.read(step) + data
+
+    lines = data.decode('utf-8', errors='replace').splitlines()
+    if max_lines is not None:
+        lines = lines[-max_lines:]
+    return lines, end, stat.st_ino
+
+
+class LogHighlighter(QSyntaxHighlighter):
+    """Pewarnaan per baris log berdasarkan level/isi, dihitung Qt hanya untuk blok yang berubah"""
+
+    RULES = [
+        (lambda line: "ERROR" in line or "error" in line.lower() or "🚨" in line, "red"),
+        (lambda line: "WARNING" in line or "warning" in line.lower() or "⚠️" in line, "orange"),
+        (lambda line: "📡 Too many consecutive failures" in line, "red"),
+        (lambda line: "INFO" in line or "info" in line.lower(), "blue"),
+        (lambda line: "SUCCESS" in line or "success" in line.lower() or "Successfully sent" in line, "green"),
+        (lambda line: "API Response" in line, "purple"),
+        (lambda line: "Processing" in line, "teal"),
+    ]
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.formats = []
+        for match, color in self.RULES:
+            text_format = QTextCharFormat()
+            text_format.setForeground(QColor(color))
+            self.formats.append((match, text_format))
+
+    def highlightBlock(self, text):
+        for match, text_format in self.formats:
+            if match(text):
+                self.setFormat(0, len(text), text_format)
+                return
+
 
 class LogViewerTab(QWidget):
     def __init__(self, parent=None, log_type="system"):
@@ -29,7 +85,7 @@ class LogViewerTab(QWidget):
         self.refresh_btn = QPushButton("Refresh")
         self.refresh_btn.clicked.connect(self.load_log_content)
 
-        # Auto-refresh checkbox
+        # Auto-refresh checkbox: ikuti file (hanya baca byte baru)
         self.auto_refresh_cb = QCheckBox("Auto-refresh")
         self.auto_refresh_cb.stateChanged.connect(self.toggle_auto_refresh)
 
@@ -65,82 +121,104 @@ class LogViewerTab(QWidget):
         controls_layout.addStretch()
 
         # Create text area
-        self.log_text = QTextEdit()
+        self.log_text = QPlainTextEdit()
         self.log_text.setReadOnly(True)
         self.log_text.setFont(QFont("Courier New", 10))
+        self.highlighter = LogHighlighter(self.log_text.document())
+
+        # Posisi follow: offset byte yang sudah ditampilkan, inode file, sisa baris yang belum lengkap
+        self._offset = 0
+        self._inode = None
+        self._partial = b""
+
+        # Status baca file: error ditampilkan di sini, bukan ditulis ke log yang sedang diikuti
+        self.status_label = QLabel("")
+        self.status_label.setStyleSheet("color: red;")
 
         # Add components to main layout
         layout.addLayout(controls_layout)
         layout.addWidget(self.log_text)
+        layout.addWidget(self.status_label)
 
         # Initialize auto-refresh timer
         self.refresh_timer = QTimer()
-        self.refresh_timer.timeout.connect(self.load_log_content)
+        self.refresh_timer.timeout.connect(self.follow_log_content)
 
         # Load initial content
         self.load_log_content()
 
+    def _line_limit(self):
+        current_option = self.view_lines_combo.currentText()
+        return None if current_option == "All" else int(current_option)
+
+    def _report_error(self, message):
+        # Tidak di-log: error dari file yang diikuti akan terbaca lagi dan memicu error berikutnya
+        self.status_label.setText(f"[{datetime.now().strftime('%H:%M:%S')}] {message}")
+
     def load_log_content(self):
+        """Muat ulang: hanya N baris terakhir, dibaca dari akhir file"""
         try:
             if not os.path.exists(self.log_path):
                 self.log_text.setPlainText(f"Log file not found: {self.log_path}")
+                self._offset, self._inode, self._partial = 0, None, b""
                 return
 
-            with open(self.log_path, 'r', encoding='utf-8') as file:
-                content = file.readlines()
+            line_limit = self._line_limit()
+            lines, self._offset, self._inode = read_tail(self.log_path, line_limit)
+            self._partial = b""
 
-            # Apply line limit if not "All"
-            current_option = self.view_lines_combo.currentText()
-            if current_option != "All":
-                line_count = int(current_option)
-                if len(content) > line_count:
-                    content = content[-line_count:]
+            # Qt membuang baris teratas sendiri saat mengikuti file (0 = tanpa batas)
+            self.log_text.setMaximumBlockCount(line_limit or 0)
+            self.log_text.setPlainText("\n".join(lines))
+            self._scroll_to_bottom()
+            self.status_label.clear()
 
-            # Apply highlighting
-            self.log_text.clear()
-            for line in content:
-                self.format_log_line(line)
+        except Exception as e:
+            self._report_error(f"Error reading log file: {str(e)}")
 
-            # Scroll to the bottom
-            cursor = self.log_text.textCursor()
-            cursor.movePosition(cursor.MoveOperation.End)
-            self.log_text.setTextCursor(cursor)
+    def follow_log_content(self):
+        """Tambahkan hanya byte yang ditulis sejak pembacaan terakhir; tangani rotasi dan truncate"""
+        try:
+            if not os.path.exists(self.log_path):
+                return
+
+            if self._inode is None:
+                self.load_log_content()
+                return
+
+            stat = os.stat(self.log_path)
+            rotated = stat.st_ino != self._inode
+            if rotated:
+                # File lama dipindah oleh rotasi: baca file baru dari awal
+                self._offset, self._inode, self._partial = 0, stat.st_ino, b""
+            elif stat.st_size < self._offset:
+                # File dikosongkan/ditimpa di tempat
+                self.load_log_content()
+                return
+            elif stat.st_size == self._offset:
+                return
+
+            with open(self.log_path, 'rb') as file:
+                file.seek(self._offset)
+                data = file.read()
+            self._offset += len(data)
+
+            data = self._partial + data
+            complete, newline, self._partial = data.rpartition(b"\n")
+            if rotated:
+                self.log_text.appendPlainText(f"--- {self.log_file} dirotasi ---")
+            if newline:
+                self.log_text.appendPlainText(complete.decode('utf-8', errors='replace'))
+                self._scroll_to_bottom()
 
         except Exception as e:
-            self.log_text.setPlainText(f"Error reading log file: {str(e)}")
-            if self.log_type == "system":
-                sys_logger.error(f"Error in log viewer: {str(e)}")
-            else:
-                error_file_logger.error(f"Error in log viewer: {str(e)}")
-
-    def format_log_line(self, line):
-        cursor = self.log_text.textCursor()
-        format = cursor.charFormat()
-
-        # Default color
-        format.setForeground(QColor("black"))
-
-        # Color based on log level
-        if "ERROR" in line or "error" in line.lower() or "🚨" in line:
-            format.setForeground(QColor("red"))
-        elif "WARNING" in line or "warning" in line.lower() or "⚠️" in line:
-            format.setForeground(QColor("orange"))
-        elif "📡 Too many consecutive failures" in line:
-            format.setForeground(QColor("red"))
-        elif "INFO" in line or "info" in line.lower():
-            format.setForeground(QColor("blue"))
-        elif "SUCCESS" in line or "success" in line.lower() or "Successfully sent" in line:
-            format.setForeground(QColor("green"))
-        elif "API Response" in line:
-            format.setForeground(QColor("purple"))
-        elif "Processing" in line:
-            format.setForeground(QColor("teal"))
-
-        cursor.setCharFormat(format)
-        cursor.insertText(line)
+            self._report_error(f"Error following log file: {str(e)}")
+
+    def _scroll_to_bottom(self):
+        self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
 
     def toggle_auto_refresh(self, state):
-        if state == Qt.CheckState.Checked:
+        if state == Qt.CheckState.Checked.value:
             interval_ms = self.refresh_interval_spin.value() * 1000
             self.refresh_timer.start(interval_ms)
         else:
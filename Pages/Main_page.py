@@ -12,6 +12,9 @@ from Controllers.Worker_controller import WorkerController
 from Pages.Config_page import ConfigureWindow
 from Pages.Connection_page import ConnectionWindow
 from Services.SignalsMessages import signalsLogger, signalsError, signalsInfo, signalsWarning
+from Services.ingest import get_ingest_stats
+from Services.receiver import get_receiver_stats
+from Services.log_bus import log_bus, LOG_FLUSH_INTERVAL, LOG_MAX_LINES
 from Services.log_manager import LogManager
 from UI.components.main_window import BaseMainWindow
 from UI.components.system_tray import SystemTrayManager
@@ -27,8 +30,9 @@ from UI.components.progress_dialog import ProgressDialog
 
 
 class AISViewer(BaseMainWindow):
-    MAX_LOG_ITEMS = 100000
+    MAX_LOG_ITEMS = LOG_MAX_LINES
     STATUS_MESSAGE_TIMEOUT = 5000
+    STATS_REFRESH_INTERVAL = 2000
 
     def __init__(self):
         super().__init__()
@@ -44,6 +48,7 @@ class AISViewer(BaseMainWindow):
         self.setup_tray_connections()
         self.start_background_upload()
 
+        self.setup_logger()
         self.setup_signals()
         self.restore_window_state()
         self.startup()
@@ -135,8 +140,8 @@ class AISViewer(BaseMainWindow):
         self.actionRun_Uploader.triggered.connect(self.start_upload)
         self.actionStop_Uploader.triggered.connect(self.stop_upload)
 
-        # Logger signals
-        signalsLogger.new_data_received.connect(self.update_logger)
+        # Logger signals: langsung ke log bus di thread pengirim, tanpa antrian event Qt per pesan
+        signalsLogger.new_data_received.connect(log_bus.post, Qt.ConnectionType.DirectConnection)
         signalsInfo.new_data_received.connect(self.update_info)
         signalsWarning.new_data_received.connect(self.update_warning)
 
@@ -159,10 +164,42 @@ class AISViewer(BaseMainWindow):
         status_layout.addWidget(self.ReceiverLabel)
         status_layout.addWidget(self.SenderLabel)
         status_layout.addWidget(self.UploadLabel)
+
+        # Throughput receiver dan antrian ingest; rincian per sumber di tooltip
+        self.IngestLabel = QLabel("Ingest: -")
+        self.IngestLabel.setMinimumWidth(220)
+        self.IngestLabel.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.IngestLabel.setFrameShape(QFrame.Shape.Panel)
+        self.IngestLabel.setFrameShadow(QFrame.Shadow.Sunken)
+        status_layout.addWidget(self.IngestLabel)
         status_layout.addStretch(1)
 
         self.statusbar.addPermanentWidget(status_widget, 0)
 
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_ingest_status)
+        self.stats_timer.start(self.STATS_REFRESH_INTERVAL)
+
+    def update_ingest_status(self):
+        """Tampilkan get_receiver_stats (per sumber aktif) dan get_ingest_stats (antrian writer)"""
+        sources = get_receiver_stats()
+        queue = get_ingest_stats()
+
+        rate = sum(item['sentences_per_sec'] for item in sources.values())
+        text = f"Ingest: {rate:.0f} kalimat/detik, {len(sources)} sumber"
+        details = [f"{item['name']}: {item['sentences_per_sec']:.1f} kalimat/detik, total {item['sentences']} kalimat, "
+                   f"framing error {item.get('framing_errors', 0)}" for item in sources.values()]
+        if queue is not None:
+            text += f", antrian {queue['depth']}/{queue['capacity']}"
+            details.append(f"Antrian ({queue['overflow_policy']}): written {queue['written']}, "
+                           f"dropped {queue['dropped']}, spilled {queue['spilled']}, failed {queue['failed']}, "
+                           f"high-water {queue['high_water']}")
+
+        self.IngestLabel.setText(text)
+        self.IngestLabel.setToolTip("\n".join(details) if details else "Tidak ada sumber aktif")
+        style = "color: red;" if queue is not None and (queue['dropped'] or queue['failed']) else ""
+        self.IngestLabel.setStyleSheet(style)
+
     def restore_window_state(self):
         settings = QSettings("IPM", "SeaScope_Receiver")
         geometry = settings.value("geometry")
@@ -175,22 +212,30 @@ class AISViewer(BaseMainWindow):
         settings = QSettings("IPM", "SeaScope_Receiver")
         settings.setValue("geometry", self.saveGeometry())
 
-    def update_logger(self, message):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_message = f"{timestamp} - {message}"
-
+    def setup_logger(self):
         emoji_font = QFont("Noto Color Emoji")
         emoji_font.setPointSize(10)
         self.plainTextLogger.setFont(emoji_font)
+        # Qt membuang blok teratas sendiri saat batas tercapai (tanpa membangun ulang teks)
+        self.plainTextLogger.setMaximumBlockCount(self.MAX_LOG_ITEMS)
 
-        self.plainTextLogger.appendPlainText(full_message)
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(self.flush_logger)
+        self.log_timer.start(LOG_FLUSH_INTERVAL)
 
-        # Limit untuk tidak terlalu banyak
-        if self.plainTextLogger.blockCount() > self.MAX_LOG_ITEMS:
-            current_text = self.plainTextLogger.toPlainText()
-            new_text = '\n'.join(current_text.split('\n')[1:])
-            self.plainTextLogger.setPlainText(new_text)
+    def update_logger(self, message):
+        log_bus.post(message)
+
+    def flush_logger(self):
+        """Tulis pesan yang terkumpul di log bus ke widget dalam satu append"""
+        lines, suppressed = log_bus.drain()
+        if suppressed:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            lines.insert(0, f"{timestamp} - ... {suppressed} pesan tidak ditampilkan (log terlalu cepat)")
+        if not lines:
+            return
 
+        self.plainTextLogger.appendPlainText("\n".join(lines))
         self.plainTextLogger.verticalScrollBar().setValue(
             self.plainTextLogger.verticalScrollBar().maximum()
         )
@@ -294,6 +339,10 @@ class AISViewer(BaseMainWindow):
         self._show_progress_dialog("Quit...")
         if hasattr(self, 'error_timer') and self.error_timer.isActive():
             self.error_timer.stop()
+        if self.log_timer.isActive():
+            self.log_timer.stop()
+        if self.stats_timer.isActive():
+            self.stats_timer.stop()
         self.tray_manager.hide()
         self._close_progress()
         QApplication.quit()
@@ -0,0 +1,377 @@
+import asyncio
+import os
+import socket
+import time
+
+import serial
+
+from Controllers.NMEA_controller import flush_pending_nmea
+from Services.SignalsMessages import signalsError, signalsInfo, signalsLogger, signalsWarning
+from Services.framing import LineFramer, ThroughputMeter
+from Services.ingest import OVERFLOW_POLICY, nonblocking_put
+from Services.receiver import (
+    register_receiver_stats, unregister_receiver_stats, feed_framer, flush_framer, SerialErrorCounters,
+    UdpDropCounter, open_udp_socket, udp_options, udp_workers, udp_multicast,
+    STATS_INTERVAL, SERIAL_READ_TIMEOUT, TCP_BACKLOG, TCP_RECV_SIZE, TCP_CONNECT_TIMEOUT, TCP_IDLE_TIMEOUT,
+    RECONNECT_MIN_DELAY, RECONNECT_MAX_DELAY, RECONNECT_STABLE_AFTER, _enable_keepalive
+)
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("receiver")
+
+STOP_POLL_INTERVAL = 0.5
+SERIAL_READ_SIZE = 4096
+SERIAL_RETRY_DELAY = 10
+# Sama dengan engine thread: bind yang gagal (port dipakai, alamat salah) dicoba lagi
+BIND_RETRY_DELAY = 10
+
+
+class _Source:
+    """Framing + throughput + laporan per menit untuk satu sumber di event loop"""
+
+    def __init__(self, key, label, connection_id):
+        self.key = key
+        self.label = label
+        self.connection_id = connection_id
+        self.meter = ThroughputMeter(label)
+        self.extra_counters = None
+        register_receiver_stats(key, self.meter)
+
+    def feed(self, framer, data):
+        feed_framer(framer, self.meter, data, self.connection_id)
+
+    def feed_datagram(self, data):
+        # Framer baru per datagram agar sisa datagram lain tidak tersambung
+        framer = LineFramer()
+        self.feed(framer, data)
+        self.finish(framer)
+
+    def finish(self, framer):
+        flush_framer(framer, self.meter, self.connection_id)
+
+    def report_if_due(self):
+        if self.meter.due(STATS_INTERVAL):
+            if self.extra_counters is not None:
+                self.extra_counters.update(self.meter)
+            bytes_rate, sentence_rate = self.meter.roll()
+            signalsInfo.new_data_received.emit(
+                f"{self.label}: {sentence_rate:.1f} kalimat/detik, {bytes_rate:.0f} bytes/detik "
+                f"(total {self.meter.sentences_total} kalimat)")
+
+    def close(self):
+        unregister_receiver_stats(self.key)
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, source):
+        self.source = source
+
+    def datagram_received(self, data, addr):
+        self.source.feed_datagram(data)
+
+    def error_received(self, exc):
+        signalsError.new_data_received.emit(f"UDP ERROR ({self.source.label}): {exc}")
+
+
+class AsyncIngestEngine:
+    """
+    Menjalankan semua koneksi ber-engine 'asyncio' dalam satu thread dan satu event loop:
+    UDP sebagai datagram endpoint, TCP server/klien sebagai stream, serial lewat adapter
+    (add_reader pada POSIX, read blocking di executor pada platform lain).
+    """
+
+    def __init__(self, connections):
+        self.connections = connections
+        self._stopping = None
+        self._sources = []
+        self._servers = []
+        # Task yang membaca stream (handler klien TCP server, loop TCP client): dibatalkan saat stop
+        self._stream_tasks = set()
+
+    def run(self, stop_event):
+        if OVERFLOW_POLICY == 'block':
+            signalsWarning.new_data_received.emit(
+                "overflow_policy 'block' tidak dipakai engine asyncio (event loop tidak boleh menunggu), "
+                "antrian penuh membuang baris tertua")
+        try:
+            # put() ke IngestQueue dari event loop tidak boleh menunggu antrian kosong
+            with nonblocking_put():
+                asyncio.run(self._main(stop_event))
+        except Exception as e:
+            signalsError.new_data_received.emit(f"Async engine ERROR: {e}")
+        finally:
+            flush_pending_nmea(force=True)
+            signalsInfo.new_data_received.emit("Async receiver stopped.")
+
+    async def _main(self, stop_event):
+        self._stopping = asyncio.Event()
+        tasks = []
+        for dataset in self.connections:
+            coroutine = self._coroutine_for(dataset)
+            if coroutine is not None:
+                task = asyncio.create_task(coroutine)
+                task.add_done_callback(self._report_task)
+                tasks.append(task)
+
+        signalsLogger.new_data_received.emit(f"Async engine menjalankan {len(tasks)} koneksi dalam satu thread")
+
+        while not stop_event.is_set() and any(not task.done() for task in tasks):
+            flush_pending_nmea()
+            for source in self._sources:
+                source.report_if_due()
+            await asyncio.sleep(STOP_POLL_INTERVAL)
+
+        self._stopping.set()
+        for server in self._servers:
+            server.close()
+        # Handler dibatalkan sebelum wait_closed: sejak Python 3.12 wait_closed menunggu semua koneksi selesai
+        stream_tasks = list(self._stream_tasks)
+        for task in stream_tasks:
+            task.cancel()
+        await asyncio.gather(*stream_tasks, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for source in self._sources:
+            source.close()
+
+    def _report_task(self, task):
+        """Koneksi yang berhenti karena exception dilaporkan ke UI, bukan hanya dikumpulkan saat shutdown"""
+        if task.cancelled() or task.exception() is None:
+            return
+        error = task.exception()
+        sys_logger.error(f"Async connection stopped: {type(error).__name__}: {error}")
+        signalsError.new_data_received.emit(f"Async engine ERROR: koneksi berhenti: {error}")
+
+    async def _bind_failed(self, label, error):
+        sys_logger.error(f"{label}: bind failed: {error}")
+        signalsError.new_data_received.emit(f"{label} ERROR: {error}")
+        await self._sleep(BIND_RETRY_DELAY)
+
+    def _coroutine_for(self, dataset):
+        connection_id = dataset.get('id')
+        if dataset.get('type') == 'network':
+            protocol = dataset.get('network')
+            address = dataset.get('address')
+            port = dataset.get('port')
+            if not address or not port:
+                signalsError.new_data_received.emit(f"Konfigurasi tidak valid: {dataset}")
+                return None
+
+            if protocol == 'udp':
+                if udp_workers(dataset) > 1:
+                    signalsWarning.new_data_received.emit(
+                        f"UDP {address}:{port}: worker SO_REUSEPORT hanya untuk engine thread, asyncio memakai 1 socket")
+                return self._udp(address, int(port), connection_id, *udp_options(dataset),
+                                 multicast=udp_multicast(dataset))
+            if protocol == 'tcp':
+                return self._tcp_server(address, int(port), connection_id)
+            if protocol == 'tcp_client':
+                return self._tcp_client(address, int(port), connection_id)
+
+        elif dataset.get('type') == 'serial':
+            data_port = dataset.get('data_port')
+            baudrate = dataset.get('baudrate')
+            if not data_port or not baudrate:
+                signalsError.new_data_received.emit(f"Konfigurasi tidak valid: {dataset}")
+                return None
+            return self._serial(data_port, int(baudrate), connection_id)
+
+        signalsError.new_data_received.emit(f"Jenis dataset tidak valid: {dataset}")
+        return None
+
+    def _source(self, key, label, connection_id):
+        source = _Source(key, label, connection_id)
+        self._sources.append(source)
+        return source
+
+    async def _udp(self, host, port, connection_id, rcvbuf, max_datagram, multicast=None):
+        loop = asyncio.get_running_loop()
+        if multicast:
+            host = multicast['group']
+        source = self._source(f"udp:{connection_id}:{host}:{port}", f"UDP {host}:{port}", connection_id)
+
+        while True:
+            sock = None
+            try:
+                sock, actual_rcvbuf = open_udp_socket(host, port, rcvbuf, multicast=multicast)
+                # Transport asyncio memakai recvfrom dengan buffer 256 KiB (max_datagram tidak membatasi di sini),
+                # jadi drop kernel dibaca dari /proc/net/udp
+                source.extra_counters = UdpDropCounter(sock, use_ancillary=False)
+                transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(source), sock=sock)
+                break
+            except OSError as e:
+                if sock is not None:
+                    sock.close()
+                await self._bind_failed(source.label, e)
+                if self._stopping.is_set():
+                    return
+        signalsLogger.new_data_received.emit(
+            f"Menunggu UDP data NMEA di {host}:{port}... (asyncio, rcvbuf {actual_rcvbuf})")
+        try:
+            await self._stopping.wait()
+        finally:
+            source.extra_counters.update(source.meter)
+            transport.close()
+
+    async def _read_stream(self, reader, source, idle_timeout=None):
+        """Baca stream sampai EOF; saat stop task pembacanya dibatalkan oleh _main"""
+        framer = LineFramer()
+        try:
+            while not self._stopping.is_set():
+                if idle_timeout:
+                    try:
+                        data = await asyncio.wait_for(reader.read(TCP_RECV_SIZE), timeout=idle_timeout)
+                    except asyncio.TimeoutError:
+                        raise socket.timeout(f"tidak ada data selama {idle_timeout} detik")
+                else:
+                    data = await reader.read(TCP_RECV_SIZE)
+                if not data:
+                    break
+                source.feed(framer, data)
+        finally:
+            source.finish(framer)
+
+    async def _tcp_server(self, host, port, connection_id):
+        async def handle(reader, writer):
+            task = asyncio.current_task()
+            self._stream_tasks.add(task)
+            addr = writer.get_extra_info('peername')
+            peer = f"{addr[0]}:{addr[1]}"
+            source = self._source(f"tcp:{connection_id}:{peer}", f"TCP {peer}", connection_id)
+            _enable_keepalive(writer.get_extra_info('socket'))
+            signalsLogger.new_data_received.emit(f"Klien TCP terhubung: {peer}")
+            try:
+                await self._read_stream(reader, source)
+            except asyncio.CancelledError:
+                # Dibatalkan _main saat stop: selesai normal, callback start_server (3.11) memanggil
+                # task.exception() dan akan mencetak traceback untuk task yang berstatus cancelled
+                pass
+            except Exception as e:
+                signalsError.new_data_received.emit(f"TCP ERROR ({peer}): {e}")
+            finally:
+                self._stream_tasks.discard(task)
+                writer.close()
+                source.close()
+                self._sources.remove(source)
+                stats = source.meter.snapshot()
+                signalsLogger.new_data_received.emit(
+                    f"Klien TCP terputus: {peer} ({stats['sentences']} kalimat, {stats['bytes']} bytes)")
+
+        while True:
+            try:
+                server = await asyncio.start_server(handle, host, port, backlog=TCP_BACKLOG, reuse_address=True)
+                break
+            except OSError as e:
+                await self._bind_failed(f"TCP {host}:{port}", e)
+                if self._stopping.is_set():
+                    return
+        # Ditutup oleh _main bersama handler kliennya
+        self._servers.append(server)
+        signalsLogger.new_data_received.emit(f"Menunggu TCP data NMEA di {host}:{port}... (asyncio)")
+        await self._stopping.wait()
+
+    async def _tcp_client(self, host, port, connection_id):
+        peer = f"{host}:{port}"
+        source = self._source(f"tcp_client:{connection_id}:{peer}", f"TCP client {peer}", connection_id)
+        self._stream_tasks.add(asyncio.current_task())
+        delay = RECONNECT_MIN_DELAY
+
+        while not self._stopping.is_set():
+            connected_at = None
+            writer = None
+            try:
+                signalsLogger.new_data_received.emit(f"Menghubungkan ke TCP server {peer}...")
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port),
+                                                        timeout=TCP_CONNECT_TIMEOUT)
+                _enable_keepalive(writer.get_extra_info('socket'))
+                connected_at = time.time()
+                source.meter.incr('connects')
+                signalsLogger.new_data_received.emit(f"Terhubung ke TCP server {peer}")
+                await self._read_stream(reader, source, idle_timeout=TCP_IDLE_TIMEOUT)
+                if not self._stopping.is_set():
+                    signalsWarning.new_data_received.emit(f"TCP server {peer} menutup koneksi")
+            except Exception as e:
+                signalsError.new_data_received.emit(f"TCP CLIENT ERROR ({peer}): {e}")
+            finally:
+                if writer is not None:
+                    writer.close()
+
+            if self._stopping.is_set():
+                break
+
+            if connected_at is not None and time.time() - connected_at >= RECONNECT_STABLE_AFTER:
+                delay = RECONNECT_MIN_DELAY
+            source.meter.incr('reconnects')
+            signalsInfo.new_data_received.emit(f"Reconnect ke {peer} dalam {delay:.0f} detik")
+            await self._sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _serial(self, port, baudrate, connection_id):
+        loop = asyncio.get_running_loop()
+        source = self._source(f"serial:{connection_id}:{port}", f"Serial {port}", connection_id)
+        use_reader = os.name == 'posix' and hasattr(loop, 'add_reader')
+
+        while not self._stopping.is_set():
+            ser = None
+            framer = LineFramer()
+            try:
+                ser = serial.Serial(port=port, baudrate=baudrate, exclusive=True,
+                                    timeout=0 if use_reader else SERIAL_READ_TIMEOUT)
+                source.extra_counters = SerialErrorCounters(ser)
+                signalsLogger.new_data_received.emit(f"Menunggu Serial data NMEA dari {port}... (asyncio)")
+                if use_reader:
+                    await self._serial_via_reader(loop, ser, framer, source)
+                else:
+                    while not self._stopping.is_set():
+                        data = await loop.run_in_executor(None, ser.read, SERIAL_READ_SIZE)
+                        if data:
+                            source.feed(framer, data)
+            except serial.SerialException as e:
+                signalsError.new_data_received.emit(f"Gagal membuka {port}: {e}")
+                await self._sleep(SERIAL_RETRY_DELAY)
+            except Exception as e:
+                signalsError.new_data_received.emit(f"Serial ERROR: {e}")
+                await self._sleep(SERIAL_RETRY_DELAY)
+            finally:
+                source.finish(framer)
+                if source.extra_counters is not None:
+                    source.extra_counters.update(source.meter)
+                    source.extra_counters = None
+                if ser is not None and ser.is_open:
+                    ser.close()
+                    signalsInfo.new_data_received.emit(f"Port {port} ditutup.")
+
+    async def _serial_via_reader(self, loop, ser, framer, source):
+        failed = loop.create_future()
+
+        def on_readable():
+            try:
+                data = ser.read(ser.in_waiting or 1)
+                if data:
+                    source.feed(framer, data)
+            except Exception as e:
+                loop.remove_reader(ser.fileno())
+                if not failed.done():
+                    failed.set_exception(e)
+
+        loop.add_reader(ser.fileno(), on_readable)
+        stopping = asyncio.ensure_future(self._stopping.wait())
+        try:
+            await asyncio.wait([failed, stopping], return_when=asyncio.FIRST_COMPLETED)
+            if failed.done():
+                failed.result()
+        finally:
+            stopping.cancel()
+            loop.remove_reader(ser.fileno())
+
+    async def _sleep(self, delay):
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+def run_async_receiver(connections, stop_event):
+    """Entry point thread engine asyncio"""
+    AsyncIngestEngine(connections).run(stop_event)
@@ -0,0 +1,149 @@
+import configparser
+import functools
+import operator
+import os
+import threading
+
+import numpy as np
+
+from Models.__init__ import db_path
+from Services.framing import VERIFY_CHECKSUM, Sentence
+from Untils.logging_helper import get_logger
+from Untils.path_helper import get_resource_path
+
+sys_logger = get_logger("receiver")
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+QUARANTINE_FILE = config.get('INGEST', 'quarantine_file', fallback='').strip()
+
+# Di bawah jumlah ini loop Python lebih cepat dari overhead numpy
+VECTOR_MIN_BATCH = 16
+
+_HEX_DIGITS = frozenset(b"0123456789ABCDEFabcdef")
+
+
+def nmea_checksum(body):
+    """XOR semua byte antara '!'/'$' dan '*'"""
+    return functools.reduce(operator.xor, body, 0)
+
+
+def _split(sentence):
+    """(body, checksum tertulis) dari satu kalimat bytes, None bila bentuknya bukan kalimat NMEA"""
+    star = sentence.rfind(b"*")
+    if star < 2 or sentence[:1] not in (b"!", b"$"):
+        return None
+    given = sentence[star + 1:star + 3]
+    if len(given) != 2 or not _HEX_DIGITS.issuperset(given):
+        return None
+    return sentence[1:star], int(given, 16)
+
+
+def _body_and_checksum(item):
+    """(body, checksum) dari Sentence, bytes atau str; None bila bentuknya tidak valid"""
+    if isinstance(item, Sentence):
+        return item.body, item.checksum
+    if isinstance(item, str):
+        item = item.encode("ascii", errors="replace")
+    return _split(item)
+
+
+def _xor_matches(bodies, expected):
+    """Bandingkan XOR setiap body dengan checksum tertulis; batch besar lewat satu np.bitwise_xor.reduceat"""
+    if len(bodies) < VECTOR_MIN_BATCH:
+        return [nmea_checksum(body) == given for body, given in zip(bodies, expected)]
+
+    lengths = np.fromiter(map(len, bodies), dtype=np.int64, count=len(bodies))
+    offsets = np.zeros(len(bodies), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=offsets[1:])
+    data = np.frombuffer(b"".join(bodies), dtype=np.uint8)
+    return (np.bitwise_xor.reduceat(data, offsets) == np.asarray(expected, dtype=np.uint8)).tolist()
+
+
+def verify_sentence(sentence):
+    parts = _body_and_checksum(sentence)
+    return parts is not None and nmea_checksum(parts[0]) == parts[1]
+
+
+def verify_sentences(sentences):
+    """Validasi checksum banyak kalimat (Sentence, bytes atau str) sekaligus, kembalikan list bool sejajar input"""
+    if all(type(sentence) is Sentence for sentence in sentences):
+        # Field sudah di-parse oleh LineFramer, langsung ke XOR
+        return _xor_matches([s.body for s in sentences], [s.checksum for s in sentences])
+
+    result = [False] * len(sentences)
+    bodies = []
+    expected = []
+    positions = []
+    for i, sentence in enumerate(sentences):
+        parts = _body_and_checksum(sentence)
+        if parts is not None and parts[0]:
+            bodies.append(parts[0])
+            expected.append(parts[1])
+            positions.append(i)
+
+    for position, ok in zip(positions, _xor_matches(bodies, expected)):
+        result[position] = ok
+    return result
+
+
+class ChecksumFilter:
+    """
+    Gerbang checksum di jalur ingest: kalimat dengan checksum salah tidak masuk tabel nmea_data,
+    hanya dihitung (per koneksi) dan opsional ditulis ke file karantina untuk diperiksa.
+    """
+
+    def __init__(self, enabled=VERIFY_CHECKSUM, quarantine_file=QUARANTINE_FILE):
+        self.enabled = enabled
+        self.quarantine_path = os.path.join(os.path.dirname(db_path), quarantine_file) if quarantine_file else None
+        self._lock = threading.Lock()
+        self._stats = {'checked': 0, 'bad': 0, 'quarantined': 0}
+        self._bad_by_connection = {}
+
+    def split(self, lines, connection_id):
+        """Kembalikan kalimat (Sentence/str) yang lolos; kalimat dengan checksum salah dicatat"""
+        if not self.enabled or not lines:
+            return lines
+
+        flags = verify_sentences(lines)
+        good = [line for line, ok in zip(lines, flags) if ok]
+        bad = len(lines) - len(good)
+
+        with self._lock:
+            self._stats['checked'] += len(lines)
+            if bad:
+                self._stats['bad'] += bad
+                key = connection_id or 0
+                self._bad_by_connection[key] = self._bad_by_connection.get(key, 0) + bad
+                if self.quarantine_path:
+                    self._quarantine([line for line, ok in zip(lines, flags) if not ok], connection_id)
+        return good
+
+    def _quarantine(self, lines, connection_id):
+        """Tulis kalimat rusak ke file karantina (dipanggil dengan lock dipegang)"""
+        try:
+            os.makedirs(os.path.dirname(self.quarantine_path), exist_ok=True)
+            with open(self.quarantine_path, 'a', encoding='utf-8') as f:
+                for line in lines:
+                    if isinstance(line, Sentence):
+                        line = line.raw.decode("ascii", errors="replace")
+                    f.write(f"{connection_id}\t{line}\n")
+            self._stats['quarantined'] += len(lines)
+        except Exception as e:
+            sys_logger.error(f"Gagal menulis file karantina {self.quarantine_path}: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bad_by_connection'] = dict(self._bad_by_connection)
+        stats['enabled'] = self.enabled
+        return stats
+
+
+checksum_filter = ChecksumFilter()
+
+
+def get_checksum_stats():
+    return checksum_filter.get_stats()
@@ -0,0 +1,164 @@
+import atexit
+import configparser
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from Services.decoder import DECODE_FAILED, DECODE_VECTORIZED, DecodedBatch, decode_batch, get_decode_statistics, \
+    merge_decode_statistics, reset_decode_statistics
+from Services.reassembler import fragment_reassembler
+from Untils.logging_helper import attach_log_queue, forward_log_queue, get_logger
+from Untils.path_helper import get_resource_path
+
+sys_logger = get_logger("decoder")
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+# Jumlah proses decode untuk pengiriman data lama (0 = jumlah CPU - 1, 1 = tanpa proses tambahan)
+DECODE_WORKERS = config.getint('DECODER', 'workers', fallback=0)
+# Batch lebih kecil dari ini di-decode langsung, biaya kirim antar proses tidak sebanding
+PARALLEL_MIN_BATCH = config.getint('DECODER', 'parallel_min_batch', fallback=2000)
+CHUNK_SIZE = config.getint('DECODER', 'chunk_size', fallback=2500)
+
+_WARM_SENTENCE = "!AIVDM,1,1,,A,13u?etPv2;0n:dDPwUM1U1Cb069D,0*24"
+
+
+def _init_worker(log_queue):
+    attach_log_queue(log_queue)
+
+
+def _warm():
+    """Tugas pertama tiap worker: memicu import ais/NumPy dan inisialisasi decoder"""
+    decode_batch([_WARM_SENTENCE])
+    return os.getpid()
+
+
+def _decode_chunk(sentences, vectorized):
+    """Jalan di proses worker: decode satu potongan, dict pesan sudah jadi, plus statistik potongan ini"""
+    reset_decode_statistics()
+    batch = decode_batch(sentences, vectorized=vectorized)
+    batch.materialize()
+    return batch, get_decode_statistics()
+
+
+def _is_single_fragment(sentence):
+    parts = sentence.split(",", 2)
+    return len(parts) > 1 and parts[1] == "1"
+
+
+class DecodePool:
+    """
+    decode_batch paralel dengan ProcessPoolExecutor untuk batch besar (data lama/backlog).
+
+    Kalimat satu fragmen dibagi per potongan ke proses worker; fragmen pesan multi-fragmen tetap
+    di-decode di proses ini, berurutan, karena bergantung pada reassembler pemanggil. Hasil disusun
+    kembali sesuai urutan input. Worker dibuat saat uploader data lama mulai (atau paling lambat di batch
+    besar pertama) lalu dipakai ulang; di mesin dengan satu CPU pool tidak pernah dibuat.
+    """
+
+    def __init__(self, workers=DECODE_WORKERS, min_batch=PARALLEL_MIN_BATCH, chunk_size=CHUNK_SIZE):
+        self.cpu_count = os.cpu_count() or 1
+        # Satu CPU disisakan untuk proses utama (receiver, fragmen multi-fragmen, penyusunan hasil)
+        self.workers = workers if workers > 0 else self.cpu_count - 1
+        self.min_batch = min_batch
+        self.chunk_size = chunk_size
+        self._executor = None
+        self._log_listener = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    @property
+    def enabled(self):
+        return self.workers > 1 and self.cpu_count > 1
+
+    def start(self):
+        """Buat proses worker dan panaskan import di tiap worker (dipanggil otomatis oleh decode)"""
+        with self._lock:
+            if self._executor is not None or not self.enabled:
+                return
+            # spawn: aman untuk proses yang sudah punya thread (Qt, receiver), sama di Windows dan Linux
+            context = multiprocessing.get_context("spawn")
+            log_queue = context.Queue()
+            self._log_listener = forward_log_queue(log_queue)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                                 initializer=_init_worker, initargs=(log_queue,))
+            for _ in range(self.workers):
+                self._executor.submit(_warm)
+            if not self._atexit_registered:
+                atexit.register(self.shutdown)
+                self._atexit_registered = True
+        sys_logger.info(f"⚙️ Decode pool started with {self.workers} workers")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+            listener, self._log_listener = self._log_listener, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if listener is not None:
+            listener.stop()
+
+    def decode(self, sentences, sources=None, vectorized=DECODE_VECTORIZED, reassembler=fragment_reassembler):
+        """Sama dengan decode_batch (hasil berurutan sesuai input), dikerjakan paralel bila batch cukup besar"""
+        if not self.enabled or len(sentences) < self.min_batch:
+            return decode_batch(sentences, sources, vectorized=vectorized, reassembler=reassembler)
+
+        self.start()
+        executor = self._executor
+        if executor is None:
+            return decode_batch(sentences, sources, vectorized=vectorized, reassembler=reassembler)
+
+        sentences = [s.decode('ascii', errors='ignore') if isinstance(s, bytes) else s for s in sentences]
+        if sources is None:
+            sources = [None] * len(sentences)
+
+        single_rows = []
+        multi_rows = []
+        for i, sentence in enumerate(sentences):
+            if type(sentence) is str and _is_single_fragment(sentence):
+                single_rows.append(i)
+            else:
+                multi_rows.append(i)
+
+        chunk_size = max(1, min(self.chunk_size, -(-len(single_rows) // self.workers)))
+        chunks = [single_rows[i:i + chunk_size] for i in range(0, len(single_rows), chunk_size)]
+        try:
+            futures = [executor.submit(_decode_chunk, [sentences[i] for i in chunk], vectorized) for chunk in chunks]
+        except (BrokenProcessPool, RuntimeError) as e:
+            sys_logger.error(f"Decode pool unavailable, decoding in-process: {str(e)}")
+            self._restart()
+            return decode_batch(sentences, sources, vectorized=vectorized, reassembler=reassembler)
+
+        result = DecodedBatch([DECODE_FAILED] * len(sentences), [None] * len(sentences))
+        # Selagi worker bekerja: fragmen multi-fragmen di proses ini, urut sesuai input
+        if multi_rows:
+            result._merge(decode_batch([sentences[i] for i in multi_rows], [sources[i] for i in multi_rows],
+                                       vectorized=vectorized, reassembler=reassembler), multi_rows)
+
+        broken = False
+        for future, chunk in zip(futures, chunks):
+            try:
+                part, stats = future.result()
+                merge_decode_statistics(stats)
+            except Exception as e:
+                if not broken:
+                    sys_logger.error(f"Decode worker failed, decoding chunk in-process: {type(e).__name__}: {str(e)}")
+                broken = broken or isinstance(e, BrokenProcessPool)
+                part = decode_batch([sentences[i] for i in chunk], vectorized=vectorized)
+            result._merge(part, chunk)
+
+        if broken:
+            self._restart()
+        return result
+
+    def _restart(self):
+        """Pool rusak (mis. worker mati): buang dan buat ulang"""
+        self.shutdown()
+        self.start()
+
+
+decode_pool = DecodePool()
@@ -1,159 +1,359 @@
 import ais
+import configparser
 import time
 import json
 import re
 
-from Untils.logging_helper import sys_logger
+import numpy as np
 
-ais_buffer = {}
-ais_buffer_time = {}
+from Services.position_decoder import POSITION_CHARS, POSITION_TYPE_CHARS, decode_positions
+from Services.reassembler import fragment_reassembler
+from Untils.logging_helper import get_logger
+from Untils.path_helper import get_resource_path
+
+sys_logger = get_logger("decoder")
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+# decode_batch: laporan posisi tipe 1/2/3/18 satu fragmen di-decode vektor dengan NumPy
+DECODE_VECTORIZED = config.getboolean('DECODER', 'vectorized', fallback=True)
 
 # Production-safe error tracking (in-memory only)
 _decode_stats = {
     'total_attempts': 0,
-    'successful_decodes': 0,
     'failed_decodes': 0,
+    'waiting_fragments': 0,
     'error_types': {},
     'start_time': time.time()
 }
 
-def try_decode(payload):
+_PAYLOAD_RE = re.compile(r'[0-9:;<=>?@A-Z\[\\\]^_`a-w]*')
+
+# Panjang pesan (bit) yang diterima libais untuk tipe dengan panjang tetap;
+# tipe lain panjangnya variabel dan memakai fill bits dari kalimat NMEA
+MESSAGE_BITS = {
+    1: (168,), 2: (168,), 3: (168,), 4: (168,), 5: (424,), 7: (72, 104, 136, 168), 9: (168,), 10: (72,),
+    11: (168,), 13: (72, 104, 136, 168), 16: (96, 144, 168), 18: (168,), 19: (312,), 22: (168,), 23: (160,),
+    24: (160, 168), 27: (96,),
+}
+
+
+def _armor(value):
+    """Karakter 6-bit ASCII untuk nilai 0-63"""
+    return chr(value + 48 if value < 40 else value + 56)
+
+
+def _build_pad_table():
+    """(karakter tipe pesan, jumlah karakter payload) -> pad bits, untuk tipe dengan panjang tetap"""
+    table = {}
+    for msg_type, lengths in MESSAGE_BITS.items():
+        for bits in lengths:
+            chars = -(-bits // 6)
+            table[(_armor(msg_type), chars)] = chars * 6 - bits
+    return table
+
+
+_PAD_BITS = _build_pad_table()
+_FILL_BITS = {str(i): i for i in range(6)}
+_ais_decode = ais.decode
+
+# Penanda kalimat yang valid tetapi pesannya belum lengkap (fragmen lain belum datang)
+WAITING = object()
+
+# Status per baris hasil decode_batch
+DECODE_OK = 0
+DECODE_WAITING = 1
+DECODE_FAILED = 2
+# Fragmen yang pesannya selesai di baris lain dalam batch yang sama (isinya ikut baris tersebut)
+DECODE_MERGED = 3
+_AIS_ADDRESSES = frozenset(("!AIVDM", "!AIVDO"))
+
+
+def message_pad(payload, fill_bits=0):
+    """
+    Pad bits untuk ais.decode, dihitung dari tipe dan panjang payload bila tipenya berpanjang tetap
+    (fill bits di kalimat tidak selalu benar, mis. tipe 24A dengan fill 0), selain itu fill bits kalimat.
+    """
+    return _PAD_BITS.get((payload[0], len(payload)), fill_bits)
+
+
+def try_decode(payload, fill_bits=0):
+    """Satu kali panggilan ais.decode dengan pad bits yang sudah dihitung; (None, None) bila gagal"""
+    pad = message_pad(payload, fill_bits)
     try:
-        msg_type = int(payload[:6], 2)
-    except ValueError:
-        msg_type = 0
+        decoded_messages = ais.decode(payload, pad)
+    except Exception:
+        return None, None
+    if type(decoded_messages) is list:
+        return (decoded_messages[0], pad) if decoded_messages else (None, None)
+    return decoded_messages, pad
+
+
+def _decode_payload(payload, fill_bits, channel, message_id, fragment_count, error_type):
+    decoded_data, version = try_decode(payload, fill_bits)
+    if not decoded_data:
+        # Validasi karakter hanya di jalur gagal, untuk membedakan jenis error
+        _track_error(error_type if _PAYLOAD_RE.fullmatch(payload) else "invalid_payload_characters")
+        return None
 
-    if msg_type in {5, 19, 21, 24}:
-        versions = [2, 0, 1]
-    else:
-        versions = [0, 1, 2]
+    if type(decoded_data) is dict:
+        decoded_data["channel"] = channel
+        decoded_data["message_id"] = message_id
+        decoded_data["fragment_count"] = fragment_count
+        decoded_data["decoder_version"] = version
 
-    for version in versions:
-        try:
-            decoded_messages = ais.decode(payload, version)
-            if isinstance(decoded_messages, list) and len(decoded_messages) > 0:
-                return decoded_messages[0], version
-            return decoded_messages, version
-        except Exception as e:
-            continue
-    return None, None
+    return decoded_data
 
-def decode_ais(nmea_sentence):
 
-    global _decode_stats
+def decode_ais(nmea_sentence, source=None, reassembler=fragment_reassembler):
+    """
+    Decode satu kalimat AIS dengan satu panggilan ais.decode: pad bits dihitung dari tipe dan panjang
+    payload (atau fill bits kalimat), bukan ditebak. `source` (mis. connection_id) memisahkan fragmen
+    pesan multi-fragmen dari koneksi yang berbeda; `reassembler` menampung fragmen yang menunggu.
+    None bila gagal atau masih menunggu fragmen lain.
+    """
+    decoded_data = _decode_sentence(nmea_sentence, source, reassembler)
+    return None if decoded_data is WAITING else decoded_data
+
+
+def _decode_sentence(nmea_sentence, source, reassembler=fragment_reassembler):
+    """Seperti decode_ais, tetapi fragmen yang masih menunggu dikembalikan sebagai WAITING"""
+
     _decode_stats['total_attempts'] += 1
 
     try:
         # Validasi format NMEA dasar
-        if not nmea_sentence or not isinstance(nmea_sentence, str):
+        if not nmea_sentence or type(nmea_sentence) is not str:
             _track_error("invalid_input_type")
             return None
 
-        nmea_sentence = nmea_sentence.strip()
+        parts = nmea_sentence.strip().split(",")
 
-        if not (nmea_sentence.startswith("!AIVDM") or nmea_sentence.startswith("!AIVDO")):
+        if not parts[0] in _AIS_ADDRESSES:
             _track_error("not_ais_sentence")
             return None
 
-        parts = nmea_sentence.split(",")
-
         if len(parts) <= 5:
             _track_error("invalid_nmea_format")
             return None
 
-        try:
-            fragment_count = int(parts[1])
-            fragment_number = int(parts[2])
-            message_id = parts[3]
-            channel = parts[4]
-            payload = parts[5]
-        except (ValueError, IndexError):
-            _track_error("invalid_nmea_fields")
-            return None
+        payload = parts[5]
+        fill_bits = _FILL_BITS.get(parts[6][:1], 0) if len(parts) > 6 else 0
 
         # Validasi payload
-        if not payload or len(payload) < 6:
+        if len(payload) < 6:
             _track_error("invalid_payload_length")
             return None
 
-        # Validasi karakter payload (harus valid 6-bit ASCII)
-        if not re.match(r'^[0-9:;<=>?@A-Z\[\\\]^_`a-w]*$', payload):
-            _track_error("invalid_payload_characters")
-            return None
-
-        unique_key = f"{message_id}_{channel}"
-
-        if fragment_count == 1:
-            # Single fragment message
-            decoded_data, version = try_decode(payload)
+        if parts[1] == "1":
+            # Single fragment message (jalur utama): tanpa lapisan fungsi tambahan
+            pad = message_pad(payload, fill_bits)
+            try:
+                decoded_data = _ais_decode(payload, pad)
+            except Exception:
+                decoded_data = None
+            if type(decoded_data) is list:
+                decoded_data = decoded_data[0] if decoded_data else None
             if not decoded_data:
-                _track_error("decode_failed_single")
+                _track_error("decode_failed_single" if _PAYLOAD_RE.fullmatch(payload) else "invalid_payload_characters")
                 return None
 
-            if isinstance(decoded_data, dict):
-                decoded_data["channel"] = channel
-                decoded_data["message_id"] = message_id
-                decoded_data["fragment_count"] = fragment_count
-                decoded_data["decoder_version"] = version
+            if type(decoded_data) is dict:
+                decoded_data["channel"] = parts[4]
+                decoded_data["message_id"] = parts[3]
+                decoded_data["fragment_count"] = 1
+                decoded_data["decoder_version"] = pad
 
-            _decode_stats['successful_decodes'] += 1
             return decoded_data
 
-        # Multi-fragment message handling
-        if unique_key not in ais_buffer:
-            ais_buffer[unique_key] = [""] * fragment_count
-            ais_buffer[unique_key + "_received"] = set()
-            ais_buffer_time[unique_key] = time.time()
-
-        ais_buffer[unique_key][fragment_number - 1] = payload
-        ais_buffer[unique_key + "_received"].add(fragment_number)
-
-        if len(ais_buffer[unique_key + "_received"]) == fragment_count:
-            # All fragments received
-            full_payload = "".join(ais_buffer.pop(unique_key))
-            ais_buffer.pop(unique_key + "_received")
-            ais_buffer_time.pop(unique_key, None)
-
-            try:
-                decoded_data, version = try_decode(full_payload)
-
-                if not decoded_data:
-                    _track_error("decode_failed_multi")
-                    return None
-
-                if isinstance(decoded_data, dict):
-                    decoded_data["channel"] = channel
-                    decoded_data["message_id"] = message_id
-                    decoded_data["fragment_count"] = fragment_count
-                    decoded_data["decoder_version"] = version
-
-                _decode_stats['successful_decodes'] += 1
-                return decoded_data
-
-            except Exception as e:
-                _track_error(f"decode_exception_{type(e).__name__}")
-                return None
-
-        # Clean up old incomplete messages
-        current_time = time.time()
-        current_keys = []
-        for key, timestamp in ais_buffer_time.items():
-            if current_time - timestamp > 60:  # Remove messages older than 60 seconds
-                current_keys.append(key)
+        try:
+            fragment_count = int(parts[1])
+            fragment_number = int(parts[2])
+        except ValueError:
+            _track_error("invalid_nmea_fields")
+            return None
+        message_id = parts[3]
+        channel = parts[4]
 
-        for key in current_keys:
-            ais_buffer.pop(key, None)
-            ais_buffer.pop(key + "_received", None)
-            ais_buffer_time.pop(key, None)
+        # Multi-fragment message handling
+        complete = reassembler.add(source, message_id, channel, fragment_count, fragment_number, payload, fill_bits)
+        if complete is None:
+            # Waiting for more fragments
+            _decode_stats['waiting_fragments'] += 1
+            return WAITING
 
-        # Waiting for more fragments
-        return None
+        # All fragments received: fill bits dari fragmen terakhir
+        full_payload, fill_bits = complete
+        return _decode_payload(full_payload, fill_bits, channel, message_id, fragment_count, "decode_failed_multi")
 
     except Exception as e:
         _track_error(f"general_exception_{type(e).__name__}")
         sys_logger.error(f"Decode error: {str(e)} for sentence: {nmea_sentence[:50] if nmea_sentence else 'None'}")
         return None
 
+class DecodedBatch:
+    """
+    Hasil decode_batch dalam bentuk kolom, sejajar dengan input.
+
+    Kolom NumPy: status (DECODE_OK/WAITING/MERGED/FAILED), msg_type, mmsi, lat, lon, sog, cog, heading, timestamp.
+    Nilai yang tidak ada pada tipe pesan tertentu diisi NaN (float) atau -1 (int). Dict per pesan untuk
+    JSON hanya dibuat lewat message(i) untuk baris yang memang dikirim.
+    """
+
+    # kolom -> (key hasil libais, dtype, nilai kosong)
+    COLUMNS = {
+        'msg_type': ('id', np.int16, -1),
+        'mmsi': ('mmsi', np.int64, -1),
+        'lat': ('y', np.float64, np.nan),
+        'lon': ('x', np.float64, np.nan),
+        'sog': ('sog', np.float64, np.nan),
+        'cog': ('cog', np.float64, np.nan),
+        'heading': ('true_heading', np.float64, np.nan),
+        'timestamp': ('timestamp', np.int16, -1),
+        'nav_status': ('nav_status', np.int8, -1),
+        'rot': ('rot', np.float64, np.nan),
+    }
+
+    def __init__(self, status, messages):
+        self.status = np.asarray(status, dtype=np.int8)
+        # Isi per baris: dict, None, atau (PositionBlock, j, channel, message_id) yang dibuat dict saat diminta
+        self._messages = messages
+        rows = [i for i, message in enumerate(messages) if type(message) is dict]
+        present = [messages[i] for i in rows]
+        for column, (key, dtype, missing) in self.COLUMNS.items():
+            values = np.full(len(messages), missing, dtype=dtype)
+            if rows:
+                values[rows] = [message.get(key, missing) for message in present]
+            setattr(self, column, values)
+
+    def _merge(self, part, rows):
+        """Salin hasil DecodedBatch lain (status, kolom, pesan) ke baris `rows` batch ini"""
+        self.status[rows] = part.status
+        for column in self.COLUMNS:
+            getattr(self, column)[rows] = getattr(part, column)
+        for i, message in zip(rows, part._messages):
+            self._messages[i] = message
+
+    def materialize(self):
+        """Buat semua dict pesan sekarang, mis. sebelum batch dikirim antar proses"""
+        for i in range(len(self._messages)):
+            self.message(i)
+
+    def _fill(self, block, rows):
+        """Salin kolom hasil decode vektor (PositionBlock) ke baris `rows`"""
+        for column, (key, _, _) in self.COLUMNS.items():
+            values = block.fields.get(key)
+            if values is not None:
+                getattr(self, column)[rows] = values
+
+    def __len__(self):
+        return len(self.status)
+
+    def ok_indices(self):
+        return np.flatnonzero(self.status == DECODE_OK)
+
+    def count(self, status):
+        return int(np.count_nonzero(self.status == status))
+
+    def message(self, i, **extra):
+        """Dict pesan baris ke-i (format sama dengan decode_ais) plus field tambahan, None bila tidak OK"""
+        message = self._messages[i]
+        if message is None:
+            return None
+        if type(message) is tuple:
+            block, j, channel, message_id = message
+            message = block.message(j)
+            message["channel"] = channel
+            message["message_id"] = message_id
+            message["fragment_count"] = 1
+            message["decoder_version"] = 0
+            self._messages[i] = message
+        if extra:
+            message.update(extra)
+        return message
+
+
+def decode_batch(sentences, sources=None, vectorized=DECODE_VECTORIZED, reassembler=fragment_reassembler):
+    """
+    Decode banyak kalimat sekaligus (list atau array NumPy), kembalikan DecodedBatch berkolom.
+    `sources` (opsional, sejajar) memisahkan fragmen dari koneksi berbeda. Fragmen yang pesannya
+    selesai di baris berikutnya dalam batch berstatus DECODE_MERGED; yang pesannya belum lengkap
+    sampai akhir batch berstatus DECODE_WAITING, bukan DECODE_FAILED.
+
+    Dengan `vectorized`, laporan posisi satu fragmen (tipe 1/2/3/18, 28 karakter) di-decode sekaligus
+    lewat decode_positions; kalimat lain (dan payload yang ditolak decoder vektor) lewat ais.decode.
+
+    Pemanggil yang berjalan bersamaan dengan pemanggil lain atas koneksi yang sama memberi `reassembler`
+    sendiri: sequence id hanya 0-9, fragmen dari alur lain bisa menimpa atau melengkapi pesan yang salah.
+    """
+    if isinstance(sentences, np.ndarray):
+        sentences = sentences.tolist()
+    if sources is None:
+        sources = [None] * len(sentences)
+    elif isinstance(sources, np.ndarray):
+        sources = sources.tolist()
+
+    status = []
+    messages = []
+    candidates = []
+    # (source, sequence id, channel) -> baris fragmen yang menunggu di batch ini
+    waiting = {}
+    for i, (sentence, source) in enumerate(zip(sentences, sources)):
+        if isinstance(sentence, bytes):
+            sentence = sentence.decode('ascii', errors='ignore')
+        if vectorized and type(sentence) is str:
+            parts = sentence.strip().split(",")
+            if (len(parts) > 5 and parts[1] == "1" and parts[0] in _AIS_ADDRESSES and len(parts[5]) == POSITION_CHARS
+                    and parts[5][0] in POSITION_TYPE_CHARS and parts[5].isascii()):
+                # Single fragment tidak memakai reassembler, jadi aman di-decode di luar urutan
+                candidates.append((i, parts[5], parts[4], parts[3], sentence))
+                status.append(DECODE_FAILED)
+                messages.append(None)
+                continue
+
+        decoded_data = _decode_sentence(sentence, source, reassembler)
+        if decoded_data is WAITING:
+            parts = sentence.strip().split(",")
+            waiting.setdefault((source, parts[3], parts[4]), []).append(i)
+            status.append(DECODE_WAITING)
+            messages.append(None)
+        else:
+            ok = bool(decoded_data) and type(decoded_data) is dict
+            status.append(DECODE_OK if ok else DECODE_FAILED)
+            messages.append(decoded_data if ok else None)
+            if waiting:
+                # Fragmen terakhir: fragmen sebelumnya di batch ini ikut hasilnya (terkirim atau gagal)
+                parts = sentence.strip().split(",") if type(sentence) is str else ()
+                if len(parts) > 5 and parts[1] != "1":
+                    for j in waiting.pop((source, parts[3], parts[4]), ()):
+                        status[j] = DECODE_MERGED if ok else DECODE_FAILED
+
+    if not candidates:
+        return DecodedBatch(status, messages)
+
+    block_a, index_a, block_b, index_b, rest = decode_positions([candidate[1] for candidate in candidates])
+    _decode_stats['total_attempts'] += len(index_a) + len(index_b)
+    for block, index in ((block_a, index_a), (block_b, index_b)):
+        for j, k in enumerate(index.tolist()):
+            i, _, channel, message_id, _ = candidates[k]
+            status[i] = DECODE_OK
+            messages[i] = (block, j, channel, message_id)
+    for k in rest.tolist():
+        i, _, _, _, sentence = candidates[k]
+        decoded_data = _decode_sentence(sentence, sources[i], reassembler)
+        if decoded_data and type(decoded_data) is dict:
+            status[i] = DECODE_OK
+            messages[i] = decoded_data
+
+    batch = DecodedBatch(status, messages)
+    for block, index in ((block_a, index_a), (block_b, index_b)):
+        if len(index):
+            batch._fill(block, [candidates[k][0] for k in index.tolist()])
+    return batch
+
+
 def _track_error(error_type):
     """Track error types for diagnostics (in-memory only)"""
     global _decode_stats
@@ -167,6 +367,8 @@ def get_decode_statistics():
     global _decode_stats
 
     stats = _decode_stats.copy()
+    # Jalur sukses hanya menaikkan total_attempts
+    stats['successful_decodes'] = stats['total_attempts'] - stats['failed_decodes'] - stats['waiting_fragments']
 
     if stats['total_attempts'] > 0:
         stats['success_rate'] = (stats['successful_decodes'] / stats['total_attempts']) * 100
@@ -185,12 +387,19 @@ def reset_decode_statistics():
     global _decode_stats
     _decode_stats = {
         'total_attempts': 0,
-        'successful_decodes': 0,
         'failed_decodes': 0,
+        'waiting_fragments': 0,
         'error_types': {},
         'start_time': time.time()
     }
 
+def merge_decode_statistics(stats):
+    """Tambahkan statistik dari proses worker (decode paralel) ke statistik proses ini"""
+    for key in ('total_attempts', 'failed_decodes', 'waiting_fragments'):
+        _decode_stats[key] += stats[key]
+    for error_type, count in stats['error_types'].items():
+        _decode_stats['error_types'][error_type] = _decode_stats['error_types'].get(error_type, 0) + count
+
 def log_decode_statistics():
     """Log current decode statistics"""
     stats = get_decode_statistics()
@@ -208,27 +417,20 @@ def log_decode_statistics():
         for error_type, count in sorted_errors[:5]:  # Top 5
             sys_logger.info(f"     {error_type}: {count:,}")
 
-def cleanup_old_fragments():
+def cleanup_old_fragments(reassembler=fragment_reassembler):
     """Cleanup old incomplete fragments"""
-    current_time = time.time()
-    cleanup_keys = []
-
-    for key, timestamp in ais_buffer_time.items():
-        if current_time - timestamp > 300:  # 5 minutes timeout
-            cleanup_keys.append(key)
+    expired = reassembler.expire()
+    if expired:
+        sys_logger.info(f"🧹 Cleaned up {expired} old incomplete fragments")
 
-    for key in cleanup_keys:
-        ais_buffer.pop(key, None)
-        ais_buffer.pop(key + "_received", None)
-        ais_buffer_time.pop(key, None)
-
-    if cleanup_keys:
-        sys_logger.info(f"🧹 Cleaned up {len(cleanup_keys)} old incomplete fragments")
-
-def get_buffer_status():
+def get_buffer_status(reassembler=fragment_reassembler):
     """Get current buffer status"""
+    stats = reassembler.get_stats()
     return {
-        'incomplete_messages': len(ais_buffer_time),
-        'oldest_fragment_age': (time.time() - min(ais_buffer_time.values())) if ais_buffer_time else 0,
-        'buffer_keys': list(ais_buffer_time.keys())
-    }
\ No newline at end of file
+        'incomplete_messages': stats['pending'],
+        'oldest_fragment_age': stats['oldest_age'],
+        'completed': stats['completed'],
+        'expired': stats['expired'],
+        'evicted': stats['evicted'],
+        'restarted': stats['restarted'],
+    }
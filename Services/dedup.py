@@ -0,0 +1,152 @@
+import collections
+import configparser
+import threading
+import time
+
+from Services.framing import Sentence
+from Untils.path_helper import get_resource_path
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+DEDUP_ENABLED = config.getboolean('INGEST', 'dedup', fallback=True)
+DEDUP_WINDOW = config.getfloat('INGEST', 'dedup_window', fallback=5.0)
+DEDUP_MAX_ENTRIES = config.getint('INGEST', 'dedup_max_entries', fallback=100000)
+DEDUP_NORMALIZE_TALKER = config.getboolean('INGEST', 'dedup_normalize_talker', fallback=True)
+
+
+def _fields(item):
+    """
+    (address, payload, fill, fragment_count, fragment_number, sequence_id, channel) dari Sentence
+    (langsung dari field yang sudah di-parse) atau str; None bila bukan kalimat AIS.
+    """
+    if isinstance(item, Sentence):
+        if item.payload is None:
+            return None
+        return (item.talker, item.payload, item.fill_bits, item.fragment_count, item.fragment_number,
+                item.sequence_id, item.channel)
+
+    parts = item.split(",")
+    if len(parts) < 7:
+        return None
+    try:
+        return (parts[0][1:3].encode(), parts[5].encode(), int(parts[6].split("*", 1)[0] or 0), int(parts[1]),
+                int(parts[2]), parts[3].encode(), parts[4].encode())
+    except ValueError:
+        return None
+
+
+def dedup_key(fields, normalize_talker=True):
+    """
+    Kunci duplikat: payload + fill bits (+ posisi fragmen).
+    Tanpa normalisasi, talker ID ('AI' vs 'BS') ikut membedakan kunci.
+    """
+    key = fields[1:5]
+    if not normalize_talker:
+        key = (fields[0],) + key
+    # Simpan hash, bukan payload, agar memori per entri tetap kecil
+    return hash(key)
+
+
+class DedupWindow:
+    """
+    Penyaring duplikat lintas koneksi di jalur ingest.
+
+    Kalimat yang sama (payload + fill bits) yang datang lagi dalam `window` detik dibuang.
+    Entri disimpan berurutan waktu dalam OrderedDict dan dibuang dari depan saat kedaluwarsa
+    atau saat jumlahnya melewati `max_entries`, sehingga memori tetap terbatas.
+
+    Pesan multi-fragmen diputuskan per grup (koneksi, sequence id, channel) dari fragmen pertama,
+    supaya fragmen satu pesan tidak tercampur dari feed yang berbeda.
+    """
+
+    def __init__(self, enabled=DEDUP_ENABLED, window=DEDUP_WINDOW, max_entries=DEDUP_MAX_ENTRIES,
+                 normalize_talker=DEDUP_NORMALIZE_TALKER):
+        self.enabled = enabled
+        self.window = window
+        self.max_entries = max_entries
+        self.normalize_talker = normalize_talker
+        self._seen = collections.OrderedDict()
+        self._groups = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._per_connection = {}
+
+    def _expire(self, now):
+        limit = now - self.window
+        for entries in (self._seen, self._groups):
+            while entries:
+                oldest = next(iter(entries.values()))
+                if oldest[0] >= limit:
+                    break
+                entries.popitem(last=False)
+
+    def _remember(self, entries, key, value):
+        # Urutan OrderedDict = urutan waktu: key yang diperbarui pindah ke ujung agar _expire tetap benar
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self._evicted += 1
+
+    def _is_duplicate(self, fields, connection_id, now):
+        key = dedup_key(fields, self.normalize_talker)
+        duplicate = key in self._seen
+        if not duplicate:
+            self._remember(self._seen, key, (now,))
+
+        if fields[3] != 1:
+            group = (connection_id, fields[5], fields[6])
+            if fields[4] == 1 or group not in self._groups:
+                self._remember(self._groups, group, (now, duplicate))
+            else:
+                # Fragmen lanjutan mengikuti keputusan fragmen pertama dari feed yang sama
+                duplicate = self._groups[group][1]
+        return duplicate
+
+    def split(self, lines, connection_id):
+        """Kembalikan kalimat (Sentence/str) yang belum terlihat dalam window; duplikat dihitung per koneksi"""
+        if not self.enabled or not lines:
+            return lines
+
+        now = time.monotonic()
+        unique = []
+        with self._lock:
+            self._expire(now)
+            for line in lines:
+                fields = _fields(line)
+                if fields is None or not self._is_duplicate(fields, connection_id, now):
+                    unique.append(line)
+
+            stats = self._per_connection.setdefault(connection_id or 0,
+                                                    {'received': 0, 'unique': 0, 'duplicates': 0})
+            stats['received'] += len(lines)
+            stats['unique'] += len(unique)
+            stats['duplicates'] += len(lines) - len(unique)
+        return unique
+
+    def get_stats(self):
+        """Kontribusi unik per koneksi: bagian kalimat yang pertama kali datang dari koneksi tersebut"""
+        with self._lock:
+            per_connection = {}
+            for connection_id, stats in self._per_connection.items():
+                item = dict(stats)
+                item['unique_ratio'] = round(stats['unique'] / stats['received'], 3) if stats['received'] else 0.0
+                per_connection[connection_id] = item
+            return {
+                'enabled': self.enabled,
+                'window': self.window,
+                'entries': len(self._seen),
+                'max_entries': self.max_entries,
+                'evicted': self._evicted,
+                'duplicates': sum(s['duplicates'] for s in self._per_connection.values()),
+                'per_connection': per_connection,
+            }
+
+
+dedup_filter = DedupWindow()
+
+
+def get_dedup_stats():
+    return dedup_filter.get_stats()
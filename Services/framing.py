@@ -0,0 +1,211 @@
+import collections
+import configparser
+import threading
+import time
+
+from Untils.path_helper import get_resource_path
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+# Tanpa verifikasi checksum, kalimat tanpa "*hh" tetap diterima (checksum None)
+VERIFY_CHECKSUM = config.getboolean('INGEST', 'verify_checksum', fallback=True)
+
+MAX_LINE_LENGTH = 4096
+SENTENCE_STARTS = (b"!", b"$")
+
+# Satu kalimat NMEA yang sudah di-parse, semua field tetap bytes (tanpa konversi ke str).
+# Field AIS (fragment_*, sequence_id, channel, payload, fill_bits) None untuk kalimat non-AIS.
+Sentence = collections.namedtuple("Sentence", [
+    "raw",              # seluruh kalimat tanpa CR/LF, mis. b"!AIVDM,1,1,,A,...,0*24"
+    "talker",           # b"AI", b"BS", b"GP", ...
+    "formatter",        # b"VDM", b"VDO", b"RMC", ...
+    "fragment_count",
+    "fragment_number",
+    "sequence_id",      # bytes (boleh kosong)
+    "channel",          # bytes (boleh kosong)
+    "payload",          # bytes 6-bit ASCII
+    "fill_bits",        # int
+    "body",             # bagian antara awalan dan '*' (input XOR checksum)
+    "checksum",         # int dari dua digit hex setelah '*', None bila kalimat tanpa checksum
+])
+
+AIS_FORMATTERS = (b"VDM", b"VDO")
+
+
+# Tabel lookup: lebih murah dari int() untuk field pendek yang muncul di setiap kalimat
+_HEX_BYTE = {f"{a}{b}".encode(): int(f"{a}{b}", 16)
+             for a in "0123456789ABCDEFabcdef" for b in "0123456789ABCDEFabcdef"}
+_SMALL_INT = {str(i).encode(): i for i in range(10)}
+_SMALL_INT[b""] = 0
+
+
+def parse_sentence(line, require_checksum=VERIFY_CHECKSUM):
+    """
+    Parse satu kalimat bytes (sudah tanpa CR/LF) dalam satu split.
+    Kembalikan Sentence, atau None bila bentuknya bukan kalimat NMEA yang valid.
+    Dengan `require_checksum` False, kalimat tanpa "*hh" diterima dengan checksum None.
+    """
+    star = line.rfind(b"*")
+    if star == -1 and not require_checksum:
+        if len(line) < 6:
+            return None
+        checksum = None
+        body = line[1:]
+    else:
+        if star < 6:
+            return None
+        checksum = _HEX_BYTE.get(line[star + 1:star + 3])
+        if checksum is None:
+            return None
+        body = line[1:star]
+
+    fields = body.split(b",")
+    address = fields[0]
+    formatter = address[2:]
+
+    if formatter in AIS_FORMATTERS:
+        if len(fields) < 7:
+            return None
+        fragment_count = _SMALL_INT.get(fields[1])
+        fragment_number = _SMALL_INT.get(fields[2])
+        fill_bits = _SMALL_INT.get(fields[6])
+        if fragment_count is None or fragment_number is None or fill_bits is None:
+            try:
+                fragment_count, fragment_number, fill_bits = int(fields[1]), int(fields[2]), int(fields[6] or 0)
+            except ValueError:
+                return None
+        return Sentence(line, address[:2], formatter, fragment_count, fragment_number, fields[3], fields[4],
+                        fields[5], fill_bits, body, checksum)
+
+    return Sentence(line, address[:2], formatter, None, None, None, None, None, None, body, checksum)
+
+
+class LineFramer:
+    """
+    Pemecah stream byte menjadi kalimat NMEA per baris (CRLF atau LF).
+    Potongan kalimat di akhir chunk disimpan dan disambung dengan chunk berikutnya,
+    sehingga kalimat yang terbelah di batas recv/read tidak hilang.
+    Hasilnya Sentence dengan field yang sudah terurai, tanpa konversi ke str.
+    """
+
+    def __init__(self, max_line=MAX_LINE_LENGTH, require_checksum=VERIFY_CHECKSUM):
+        self.max_line = max_line
+        self.require_checksum = require_checksum
+        self._tail = b""
+        self.overflows = 0
+        self.framing_errors = 0
+
+    def feed(self, data):
+        """Tambahkan chunk byte, kembalikan list Sentence lengkap yang sudah terbentuk"""
+        if self._tail:
+            data = self._tail + data
+
+        parts = data.split(b"\n")
+        self._tail = parts.pop()
+        if len(self._tail) > self.max_line:
+            # Tidak ada newline dalam batas wajar: stream rusak, buang sisa agar buffer tidak membengkak
+            self._tail = b""
+            self.overflows += 1
+            self.framing_errors += 1
+
+        sentences = []
+        for part in parts:
+            # Jalur cepat untuk kalimat bersih "!...*hh\r"; selain itu lewat _frame (strip, sinkron ulang)
+            if part[:1] in SENTENCE_STARTS and part[-4:-3] == b"*" and part[-1:] == b"\r":
+                sentence = parse_sentence(part[:-1], self.require_checksum)
+                if sentence is None:
+                    self.framing_errors += 1
+            else:
+                sentence = self._frame(part)
+            if sentence is not None:
+                sentences.append(sentence)
+        return sentences
+
+    def _frame(self, part):
+        """Validasi bentuk kalimat: awalan !/$ dan field yang bisa di-parse; sinkron ulang bila ada noise di depan"""
+        part = part.strip()
+        if not part:
+            return None
+
+        if not part.startswith(SENTENCE_STARTS):
+            starts = [i for i in (part.find(b"!"), part.find(b"$")) if i != -1]
+            self.framing_errors += 1
+            if not starts:
+                return None
+            part = part[min(starts):]
+
+        sentence = parse_sentence(part, self.require_checksum)
+        if sentence is None:
+            self.framing_errors += 1
+        return sentence
+
+    def flush(self):
+        """Kembalikan sisa potongan terakhir (mis. saat koneksi ditutup) dan kosongkan buffer"""
+        tail, self._tail = self._tail, b""
+        sentence = self._frame(tail)
+        return [sentence] if sentence is not None else []
+
+    def pending(self):
+        return len(self._tail)
+
+
+def frame_chunk(data):
+    """Framing sekali jalan untuk chunk lengkap (baris terakhir boleh tanpa newline)"""
+    framer = LineFramer()
+    return framer.feed(data) + framer.flush()
+
+
+class ThroughputMeter:
+    """Penghitung bytes/kalimat total dan per detik untuk satu sumber data"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.bytes_total = 0
+        self.sentences_total = 0
+        self._lock = threading.Lock()
+        self._window_start = self.started_at
+        self._window_bytes = 0
+        self._window_sentences = 0
+        self._last_rates = (0.0, 0.0)
+        self.counters = {}
+
+    def incr(self, counter, amount=1):
+        """Counter tambahan per sumber (reconnect, framing error, overrun, ...)"""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def add(self, nbytes, sentences):
+        with self._lock:
+            self.bytes_total += nbytes
+            self.sentences_total += sentences
+            self._window_bytes += nbytes
+            self._window_sentences += sentences
+
+    def due(self, interval):
+        return time.time() - self._window_start >= interval
+
+    def roll(self):
+        """Tutup jendela pengukuran saat ini, kembalikan (bytes/s, kalimat/s)"""
+        with self._lock:
+            now = time.time()
+            elapsed = max(now - self._window_start, 1e-6)
+            self._last_rates = (self._window_bytes / elapsed, self._window_sentences / elapsed)
+            self._window_start = now
+            self._window_bytes = 0
+            self._window_sentences = 0
+            return self._last_rates
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'bytes': self.bytes_total,
+                'sentences': self.sentences_total,
+                'bytes_per_sec': round(self._last_rates[0], 1),
+                'sentences_per_sec': round(self._last_rates[1], 1),
+                'uptime': round(time.time() - self.started_at, 1),
+                **self.counters,
+            }
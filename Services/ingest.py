@@ -0,0 +1,283 @@
+import collections
+import configparser
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+from Models.__init__ import engine, db_path
+from Controllers.NMEA_controller import insert_nmea_rows, set_ingest_sink, flush_pending_nmea
+from Services.SignalsMessages import signalsError, signalsInfo
+from Services.checksum import get_checksum_stats
+from Services.dedup import get_dedup_stats
+from Untils.logging_helper import get_logger
+from Untils.path_helper import get_resource_path
+
+sys_logger = get_logger("receiver")
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+QUEUE_SIZE = config.getint('INGEST', 'queue_size', fallback=50000)
+OVERFLOW_POLICY = config.get('INGEST', 'overflow_policy', fallback='drop_oldest')
+WRITE_BATCH_SIZE = config.getint('INGEST', 'batch_size', fallback=500)
+WRITE_MAX_DELAY = config.getfloat('INGEST', 'max_delay', fallback=0.5)
+SPILL_FILE = config.get('INGEST', 'spill_file', fallback='spill/ingest_spill.jsonl')
+WRITE_RETRIES = 3
+STATS_INTERVAL = 60
+
+OVERFLOW_POLICIES = ('block', 'drop_oldest', 'spill')
+
+_thread_state = threading.local()
+
+
+@contextlib.contextmanager
+def nonblocking_put():
+    """
+    Di thread pemanggil, put() tidak pernah menunggu: policy 'block' diperlakukan sebagai 'drop_oldest'.
+    Dipakai thread event loop asyncio, yang tidak boleh tertahan karena semua koneksinya ikut berhenti.
+    """
+    previous = getattr(_thread_state, 'nonblocking', False)
+    _thread_state.nonblocking = True
+    try:
+        yield
+    finally:
+        _thread_state.nonblocking = previous
+
+
+class IngestQueue:
+    """
+    Antrian terbatas antara thread receiver dan database.
+    Satu writer thread memiliki koneksi SQLite dan menulis baris dalam batch,
+    sehingga commit yang lambat tidak menahan loop baca socket.
+    """
+
+    def __init__(self, max_size=QUEUE_SIZE, overflow_policy=OVERFLOW_POLICY,
+                 batch_size=WRITE_BATCH_SIZE, max_delay=WRITE_MAX_DELAY, spill_file=SPILL_FILE):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            sys_logger.warning(f"Overflow policy '{overflow_policy}' tidak dikenal, memakai 'drop_oldest'")
+            overflow_policy = 'drop_oldest'
+
+        self.max_size = max_size
+        self.overflow_policy = overflow_policy
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.spill_path = os.path.join(os.path.dirname(db_path), spill_file)
+
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._thread = None
+        self._running = False
+        self._stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats():
+        return {
+            'enqueued': 0,
+            'written': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'blocked': 0,
+            'failed': 0,
+            'high_water': 0,
+        }
+
+    def is_running(self):
+        return self._running
+
+    def put(self, rows):
+        """Masukkan baris ke antrian sesuai overflow policy"""
+        if not rows:
+            return
+
+        with self._lock:
+            if self.overflow_policy == 'spill':
+                free = max(self.max_size - len(self._queue), 0)
+                if len(rows) > free:
+                    self._spill(rows[free:])
+                    rows = rows[:free]
+
+            elif self.overflow_policy == 'block' and not getattr(_thread_state, 'nonblocking', False):
+                while self._running and self._queue and len(self._queue) + len(rows) > self.max_size:
+                    self._stats['blocked'] += 1
+                    self._not_full.wait(0.5)
+
+            self._queue.extend(rows)
+            self._stats['enqueued'] += len(rows)
+
+            overflow = len(self._queue) - self.max_size
+            if overflow > 0:
+                # drop_oldest (atau block yang sedang berhenti): buang baris tertua
+                for _ in range(overflow):
+                    self._queue.popleft()
+                self._stats['dropped'] += overflow
+
+            if len(self._queue) > self._stats['high_water']:
+                self._stats['high_water'] = len(self._queue)
+            self._not_empty.notify()
+
+    def _spill(self, rows):
+        """Tulis baris yang tidak muat ke file spill (dipanggil dengan lock dipegang)"""
+        try:
+            os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+            with open(self.spill_path, 'a', encoding='utf-8') as f:
+                for row in rows:
+                    f.write(json.dumps({
+                        'nmea': row['nmea'],
+                        'connection_id': row['connection_id'],
+                        'created_at': row['created_at'].isoformat()
+                    }) + "\n")
+            self._stats['spilled'] += len(rows)
+        except Exception as e:
+            self._stats['dropped'] += len(rows)
+            sys_logger.error(f"Gagal menulis spill file {self.spill_path}: {e}")
+
+    def _take_batch(self):
+        with self._lock:
+            if not self._queue:
+                self._not_empty.wait(self.max_delay)
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            if batch:
+                self._not_full.notify_all()
+            return batch
+
+    def _write(self, conn, rows):
+        for attempt in range(1, WRITE_RETRIES + 1):
+            try:
+                insert_nmea_rows(rows, conn)
+                with self._lock:
+                    self._stats['written'] += len(rows)
+                return True
+            except Exception as e:
+                sys_logger.error(f"Ingest writer gagal menulis {len(rows)} baris (attempt {attempt}/{WRITE_RETRIES}): {e}")
+                time.sleep(attempt)
+
+        with self._lock:
+            self._stats['failed'] += len(rows)
+            if self.overflow_policy == 'spill':
+                self._spill(rows)
+        signalsError.new_data_received.emit(f"Ingest writer: {len(rows)} baris gagal disimpan")
+        return False
+
+    def _replay_spill(self, conn):
+        """Masukkan kembali isi spill file ke database saat antrian sudah kosong"""
+        replay_path = self.spill_path + ".replay"
+        with self._lock:
+            if self._queue or not os.path.exists(self.spill_path):
+                return
+            os.replace(self.spill_path, replay_path)
+
+        rows = []
+        replayed = 0
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                replayed += 1
+                created_at = datetime.datetime.fromisoformat(item['created_at'])
+                rows.append({
+                    'nmea': item['nmea'],
+                    'connection_id': item['connection_id'],
+                    'upload': False,
+                    'created_at': created_at,
+                    'updated_at': created_at
+                })
+                if len(rows) >= self.batch_size:
+                    self._write(conn, rows)
+                    rows = []
+        if rows:
+            self._write(conn, rows)
+
+        os.remove(replay_path)
+        with self._lock:
+            self._stats['replayed'] += replayed
+        sys_logger.info(f"Ingest writer: {replayed} baris dari spill file dimasukkan kembali")
+
+    def _run(self):
+        last_report = time.time()
+        with engine.connect() as conn:
+            while self._running or self._queue:
+                batch = self._take_batch()
+                if batch:
+                    self._write(conn, batch)
+                elif self.overflow_policy == 'spill':
+                    self._replay_spill(conn)
+
+                if time.time() - last_report >= STATS_INTERVAL:
+                    stats = self.get_stats()
+                    checksum = get_checksum_stats()
+                    dedup = get_dedup_stats()
+                    signalsInfo.new_data_received.emit(
+                        f"Ingest queue: depth {stats['depth']}, high-water {stats['high_water']}, "
+                        f"written {stats['written']}, dropped {stats['dropped']}, spilled {stats['spilled']}, "
+                        f"checksum salah {checksum['bad']}, duplikat {dedup['duplicates']}")
+                    for connection_id, item in dedup['per_connection'].items():
+                        signalsInfo.new_data_received.emit(
+                            f"Koneksi {connection_id}: {item['unique']}/{item['received']} kalimat unik "
+                            f"({item['unique_ratio']:.0%})")
+                    last_report = time.time()
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="IngestWriter", daemon=True)
+        self._thread.start()
+        set_ingest_sink(self.put)
+        sys_logger.info(f"Ingest writer started (size={self.max_size}, policy={self.overflow_policy})")
+
+    def stop(self, timeout=10):
+        """Hentikan writer setelah antrian dikosongkan"""
+        if not self._running:
+            return
+        set_ingest_sink(None)
+        with self._lock:
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        flush_pending_nmea(force=True)
+
+        stats = self.get_stats()
+        sys_logger.info(f"Ingest writer stopped: {stats}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['depth'] = len(self._queue)
+        stats['capacity'] = self.max_size
+        stats['overflow_policy'] = self.overflow_policy
+        stats['running'] = self._running
+        return stats
+
+
+_ingest_queue = None
+
+
+def start_ingest_writer():
+    global _ingest_queue
+    if _ingest_queue is None:
+        _ingest_queue = IngestQueue()
+    _ingest_queue.start()
+    return _ingest_queue
+
+
+def stop_ingest_writer():
+    if _ingest_queue is not None:
+        _ingest_queue.stop()
+
+
+def get_ingest_stats():
+    if _ingest_queue is None:
+        return None
+    return _ingest_queue.get_stats()
@@ -0,0 +1,72 @@
+import collections
+import configparser
+import threading
+from datetime import datetime
+
+from Untils.path_helper import get_resource_path
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+LOG_FLUSH_INTERVAL = config.getint('UI', 'log_flush_interval', fallback=250)  # ms
+LOG_MAX_PER_FLUSH = config.getint('UI', 'log_max_per_flush', fallback=500)
+LOG_BUFFER_SIZE = config.getint('UI', 'log_buffer_size', fallback=10000)
+LOG_MAX_LINES = config.getint('UI', 'log_max_lines', fallback=100000)
+
+
+class LogBus:
+    """
+    Penampung pesan log untuk UI, aman dipanggil dari thread mana pun.
+
+    Producer hanya menambah ke ring buffer (tanpa sinyal Qt per pesan); GUI thread mengambil
+    isinya secara batch lewat timer. Bila ring penuh, pesan tertua dibuang; bila satu flush
+    berisi lebih dari `max_per_flush` pesan, hanya yang terbaru ditampilkan. Keduanya dihitung
+    dan dilaporkan sebagai satu baris ringkasan "N pesan tidak ditampilkan".
+    """
+
+    def __init__(self, capacity=LOG_BUFFER_SIZE, max_per_flush=LOG_MAX_PER_FLUSH):
+        self.capacity = capacity
+        self.max_per_flush = max_per_flush
+        self._ring = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._suppressed = 0
+        self._stats = {'posted': 0, 'shown': 0, 'suppressed': 0}
+
+    def post(self, message):
+        self.post_many((message,))
+
+    def post_many(self, messages):
+        """Tambahkan beberapa pesan sekaligus dengan satu timestamp dan satu lock"""
+        if not messages:
+            return
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        lines = [f"{timestamp} - {message}" for message in messages]
+        with self._lock:
+            overflow = len(self._ring) + len(lines) - self.capacity
+            if overflow > 0:
+                self._suppressed += overflow
+            self._ring.extend(lines)
+            self._stats['posted'] += len(lines)
+
+    def drain(self):
+        """Ambil pesan untuk satu flush UI, kembalikan (lines, jumlah pesan yang tidak ditampilkan)"""
+        with self._lock:
+            lines = list(self._ring)
+            self._ring.clear()
+            suppressed, self._suppressed = self._suppressed, 0
+            if len(lines) > self.max_per_flush:
+                suppressed += len(lines) - self.max_per_flush
+                lines = lines[-self.max_per_flush:]
+            self._stats['shown'] += len(lines)
+            self._stats['suppressed'] += suppressed
+        return lines, suppressed
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['buffered'] = len(self._ring)
+        return stats
+
+
+log_bus = LogBus()
@@ -0,0 +1,214 @@
+import operator
+
+import numpy as np
+
+# Laporan posisi berpanjang tetap 168 bit = 28 karakter payload
+POSITION_CHARS = 28
+# Karakter tipe pesan (6-bit ASCII) untuk tipe 1, 2, 3 (kelas A) dan 18 (kelas B)
+POSITION_TYPE_CHARS = frozenset("123B")
+
+# key libais -> (bit awal, panjang, signed)
+_COMM_STATE_FIELDS = {
+    'sync_state': (149, 2, False),
+    'slot_timeout': (151, 3, False),
+    'slot_offset': (154, 14, False),
+    'utc_hour': (154, 5, False),
+    'utc_min': (159, 7, False),
+    'utc_spare': (166, 2, False),
+    'slot_number': (154, 14, False),
+    'received_stations': (154, 14, False),
+    'slot_increment': (151, 13, False),
+    'slots_to_allocate': (164, 3, False),
+    'keep_flag': (167, 1, False),
+}
+
+_CLASS_A_FIELDS = {
+    'id': (0, 6, False),
+    'repeat_indicator': (6, 2, False),
+    'mmsi': (8, 30, False),
+    'nav_status': (38, 4, False),
+    'rot': (42, 8, True),
+    'sog': (50, 10, False),
+    'position_accuracy': (60, 1, False),
+    'x': (61, 28, True),
+    'y': (89, 27, True),
+    'cog': (116, 12, False),
+    'true_heading': (128, 9, False),
+    'timestamp': (137, 6, False),
+    'special_manoeuvre': (143, 2, False),
+    'spare': (145, 3, False),
+    'raim': (148, 1, False),
+    **_COMM_STATE_FIELDS,
+}
+
+_CLASS_B_FIELDS = {
+    'id': (0, 6, False),
+    'repeat_indicator': (6, 2, False),
+    'mmsi': (8, 30, False),
+    'spare': (38, 8, False),
+    'sog': (46, 10, False),
+    'position_accuracy': (56, 1, False),
+    'x': (57, 28, True),
+    'y': (85, 27, True),
+    'cog': (112, 12, False),
+    'true_heading': (124, 9, False),
+    'timestamp': (133, 6, False),
+    'spare2': (139, 2, False),
+    'unit_flag': (141, 1, False),
+    'display_flag': (142, 1, False),
+    'dsc_flag': (143, 1, False),
+    'band_flag': (144, 1, False),
+    'm22_flag': (145, 1, False),
+    'mode_flag': (146, 1, False),
+    'raim': (147, 1, False),
+    'commstate_flag': (148, 1, False),
+    'commstate_cs_fill': (149, 19, False),
+    **_COMM_STATE_FIELDS,
+}
+
+_BOOL_FIELDS = ('raim', 'keep_flag', 'rot_over_range')
+
+# Urutan key dict sama dengan hasil ais.decode
+_CLASS_A_KEYS = ('id', 'repeat_indicator', 'mmsi', 'nav_status', 'rot_over_range', 'rot', 'sog',
+                 'position_accuracy', 'x', 'y', 'cog', 'true_heading', 'timestamp', 'special_manoeuvre', 'spare',
+                 'raim', 'sync_state')
+_CLASS_B_KEYS = ('id', 'repeat_indicator', 'mmsi', 'spare', 'sog', 'position_accuracy', 'x', 'y', 'cog',
+                 'true_heading', 'timestamp', 'spare2', 'unit_flag', 'display_flag', 'dsc_flag', 'band_flag',
+                 'm22_flag', 'mode_flag', 'raim', 'commstate_flag')
+# SOTDMA: sub-field ditentukan slot_timeout (0..7)
+_SOTDMA_KEYS = (
+    ('slot_timeout', 'slot_offset'),
+    ('slot_timeout', 'utc_hour', 'utc_min', 'utc_spare'),
+    ('slot_timeout', 'slot_number'),
+    ('slot_timeout', 'received_stations'),
+    ('slot_timeout', 'slot_number'),
+    ('slot_timeout', 'received_stations'),
+    ('slot_timeout', 'slot_number'),
+    ('slot_timeout', 'received_stations'),
+)
+_ITDMA_KEYS = ('slot_increment', 'slots_to_allocate', 'keep_flag')
+
+
+def _message_keys(msg_type, slot_timeout, unit_flag, commstate_flag):
+    if msg_type == 18:
+        if unit_flag:
+            return _CLASS_B_KEYS + ('commstate_cs_fill',)
+        if commstate_flag:
+            return _CLASS_B_KEYS + _ITDMA_KEYS
+        return _CLASS_B_KEYS + _SOTDMA_KEYS[slot_timeout]
+    if msg_type == 3:
+        return _CLASS_A_KEYS + _ITDMA_KEYS
+    return _CLASS_A_KEYS + _SOTDMA_KEYS[slot_timeout]
+
+
+# Semua kombinasi key: kelas A per (tipe, slot_timeout), kelas B per (slot_timeout, unit_flag, commstate_flag)
+_LAYOUTS_A = [_message_keys(msg_type, slot_timeout, 0, 0) for msg_type in range(4) for slot_timeout in range(8)]
+_LAYOUTS_B = [_message_keys(18, slot_timeout, unit_flag, commstate_flag)
+              for slot_timeout in range(8) for unit_flag in (0, 1) for commstate_flag in (0, 1)]
+
+
+def dearmor(payloads):
+    """
+    Payload 6-bit ASCII dengan panjang sama -> (matriks bit uint8 [n, 6 * panjang], mask baris valid).
+    Baris dengan karakter di luar armoring AIS ditandai tidak valid (bitnya tidak berarti).
+    """
+    length = len(payloads[0]) if payloads else 0
+    raw = np.frombuffer("".join(payloads).encode("ascii"), dtype=np.uint8).reshape(len(payloads), length)
+    valid = (((raw >= 48) & (raw <= 87)) | ((raw >= 96) & (raw <= 119))).all(axis=1)
+    values = raw - np.uint8(48)
+    values[values > 40] -= np.uint8(8)
+    bits = np.unpackbits(values[:, :, None], axis=2)[:, :, 2:]
+    return bits.reshape(len(payloads), length * 6), valid
+
+
+def _to_words(bits):
+    """Matriks bit [n, 168] -> [n, 3] uint64 big-endian, agar field bisa diambil dengan shift dan mask"""
+    padded = np.zeros((len(bits), 192), dtype=np.uint8)
+    padded[:, :bits.shape[1]] = bits
+    return np.packbits(padded, axis=1).view(">u8").astype(np.uint64)
+
+
+def _extract(words, layout):
+    """Ambil semua field: geser word yang memuat field lalu mask (field yang melintasi batas word digabung)"""
+    fields = {}
+    for key, (start, length, signed) in layout.items():
+        word, offset = divmod(start, 64)
+        end = offset + length
+        if end <= 64:
+            value = words[:, word] >> np.uint64(64 - end)
+        else:
+            value = (words[:, word] << np.uint64(end - 64)) | (words[:, word + 1] >> np.uint64(128 - end))
+        value = (value & np.uint64((1 << length) - 1)).astype(np.int64)
+        if signed:
+            value[value >= 1 << (length - 1)] -= 1 << length
+        fields[key] = value
+    return fields
+
+
+def _scale(fields):
+    """Satuan sama dengan libais: sog/cog/rot disimpan sebagai float32, posisi dalam derajat (float64)"""
+    fields['sog'] = (fields['sog'] / 10.0).astype(np.float32)
+    fields['cog'] = (fields['cog'] / 10.0).astype(np.float32)
+    fields['x'] = fields['x'] / 600000.0
+    fields['y'] = fields['y'] / 600000.0
+    if 'rot' in fields:
+        rot = fields['rot']
+        fields['rot_over_range'] = np.abs(rot) > 126
+        fields['rot'] = (np.sign(rot) * (rot / 4.733) ** 2).astype(np.float32)
+    return fields
+
+
+class PositionBlock:
+    """
+    Hasil decode vektor satu kelompok laporan posisi. Field tersedia sebagai array NumPy (`fields`),
+    dict per pesan (format ais.decode) baru dibuat saat message(j) dipanggil.
+    """
+
+    def __init__(self, fields, class_b=False):
+        self.fields = fields
+        self.class_b = class_b
+        self._rows = None
+
+    def __len__(self):
+        return len(self.fields['id'])
+
+    def _prepare(self):
+        """Ubah kolom menjadi tuple per baris sekali saja, plus layout key (indeks _LAYOUTS_*) per baris"""
+        fields = self.fields
+        if self.class_b:
+            layouts = _LAYOUTS_B
+            layout = fields['slot_timeout'] * 4 + fields['unit_flag'] * 2 + fields['commstate_flag']
+        else:
+            layouts = _LAYOUTS_A
+            layout = fields['id'] * 8 + fields['slot_timeout']
+        keys = list(fields)
+        columns = [(fields[key].astype(bool) if key in _BOOL_FIELDS else fields[key]).tolist() for key in keys]
+        position = {key: i for i, key in enumerate(keys)}
+        self._getters = [(names, operator.itemgetter(*(position[name] for name in names))) for names in layouts]
+        self._layout = layout.tolist()
+        self._rows = list(zip(*columns))
+
+    def message(self, j):
+        if self._rows is None:
+            self._prepare()
+        names, getter = self._getters[self._layout[j]]
+        return dict(zip(names, getter(self._rows[j])))
+
+
+def decode_positions(payloads):
+    """
+    Decode vektor payload ASCII 28 karakter bertipe 1/2/3/18. Kembalikan (blok kelas A, indeks kelas A,
+    blok kelas B, indeks kelas B, indeks sisanya untuk jalur ais.decode); indeks relatif terhadap `payloads`.
+    """
+    if payloads:
+        bits, valid = dearmor(payloads)
+    else:
+        bits, valid = np.zeros((0, POSITION_CHARS * 6), dtype=np.uint8), np.zeros(0, dtype=bool)
+    words = _to_words(bits)
+    msg_type = _extract(words, {'id': (0, 6, False)})['id']
+    index_a = np.flatnonzero(valid & ((msg_type == 1) | (msg_type == 2) | (msg_type == 3)))
+    index_b = np.flatnonzero(valid & (msg_type == 18))
+    block_a = PositionBlock(_scale(_extract(words[index_a], _CLASS_A_FIELDS)))
+    block_b = PositionBlock(_scale(_extract(words[index_b], _CLASS_B_FIELDS)), class_b=True)
+    rest = np.setdiff1d(np.arange(len(payloads)), np.concatenate((index_a, index_b)), assume_unique=True)
+    return block_a, index_a, block_b, index_b, rest
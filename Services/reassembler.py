@@ -0,0 +1,95 @@
+import collections
+import threading
+import time
+
+# Fragmen yang tidak lengkap dalam waktu ini dibuang (detik)
+FRAGMENT_TIMEOUT = 60
+# Jumlah pesan multi-fragmen yang boleh menunggu bersamaan
+FRAGMENT_CAPACITY = 10000
+
+
+class FragmentReassembler:
+    """
+    Penyambung pesan AIS multi-fragmen, aman dipakai beberapa thread.
+
+    Kunci pesan adalah (sumber/koneksi, sequence id, channel) sehingga fragmen dengan sequence id
+    yang sama dari koneksi berbeda tidak tercampur. Pesan disimpan dalam OrderedDict urut waktu
+    kedatangan fragmen pertama: kedaluwarsa dan pembatasan kapasitas cukup membuang dari depan,
+    jadi biaya per fragmen tetap konstan.
+
+    Lock hanya menjaga dict, bukan urutan fragmen: setiap alur pembacaan yang berjalan bersamaan
+    (mis. tiap uploader) memakai instance sendiri.
+    """
+
+    def __init__(self, timeout=FRAGMENT_TIMEOUT, capacity=FRAGMENT_CAPACITY):
+        self.timeout = timeout
+        self.capacity = capacity
+        self._pending = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'completed': 0, 'expired': 0, 'evicted': 0, 'restarted': 0, 'invalid': 0}
+
+    def add(self, source, sequence_id, channel, fragment_count, fragment_number, payload, fill_bits=0, now=None):
+        """
+        Tambahkan satu fragmen; bila semua fragmen sudah ada kembalikan (payload lengkap, fill bits
+        fragmen terakhir), selain itu None.
+        """
+        if not 1 <= fragment_number <= fragment_count:
+            with self._lock:
+                self._stats['invalid'] += 1
+            return None
+
+        now = time.monotonic() if now is None else now
+        key = (source, sequence_id, channel)
+        with self._lock:
+            self._expire(now)
+
+            entry = self._pending.get(key)
+            if entry is not None and (len(entry[1]) != fragment_count or entry[1][fragment_number - 1] is not None):
+                # Sequence id dipakai ulang sebelum pesan lama lengkap: mulai pesan baru
+                del self._pending[key]
+                self._stats['restarted'] += 1
+                entry = None
+
+            if entry is None:
+                entry = [now, [None] * fragment_count, 0, 0]
+                self._pending[key] = entry
+                if len(self._pending) > self.capacity:
+                    self._pending.popitem(last=False)
+                    self._stats['evicted'] += 1
+
+            entry[1][fragment_number - 1] = payload
+            entry[2] += 1
+            if fragment_number == fragment_count:
+                entry[3] = fill_bits
+            if entry[2] < fragment_count:
+                return None
+
+            del self._pending[key]
+            self._stats['completed'] += 1
+        return "".join(entry[1]), entry[3]
+
+    def _expire(self, now):
+        """Buang pesan tertua yang sudah melewati timeout (dipanggil dengan lock dipegang)"""
+        limit = now - self.timeout
+        while self._pending:
+            oldest = next(iter(self._pending.values()))
+            if oldest[0] >= limit:
+                break
+            self._pending.popitem(last=False)
+            self._stats['expired'] += 1
+
+    def expire(self, now=None):
+        with self._lock:
+            expired = self._stats['expired']
+            self._expire(time.monotonic() if now is None else now)
+            return self._stats['expired'] - expired
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            stats['oldest_age'] = time.monotonic() - next(iter(self._pending.values()))[0] if self._pending else 0
+        return stats
+
+
+fragment_reassembler = FragmentReassembler()
@@ -3,112 +3,585 @@ import json
 import time
 import requests
 import threading
+import configparser
+import os
+import selectors
+import struct
+import sys
 
 import serial
 import ais
 
-from Controllers.NMEA_controller import save_nmea_data, batch_save_nmea
+from Controllers.NMEA_controller import save_nmea_data, batch_save_sentences, flush_pending_nmea
 from Controllers.Connection_controller import get_connection
 
-from Services.SignalsMessages import signalsError, signalsInfo, signalsLogger
+from Services.SignalsMessages import signalsError, signalsInfo, signalsLogger, signalsWarning
+from Services.framing import LineFramer, ThroughputMeter
+from Untils.path_helper import get_resource_path
+
+config = configparser.ConfigParser()
+config.read(get_resource_path("config.ini", is_config=True))
+
+RECEIVER_ENGINES = ('thread', 'asyncio')
+DEFAULT_ENGINE = config.get('RECEIVER', 'engine', fallback='thread').strip().lower()
+
+TCP_BACKLOG = 16
+TCP_RECV_SIZE = 65536
+STATS_INTERVAL = 60
+
+TCP_CONNECT_TIMEOUT = 10
+TCP_IDLE_TIMEOUT = 120
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+RECONNECT_MIN_DELAY = 1
+RECONNECT_MAX_DELAY = 60
+RECONNECT_STABLE_AFTER = 60
+
+UDP_RCVBUF = config.getint('RECEIVER', 'udp_rcvbuf', fallback=4194304)
+UDP_MAX_DATAGRAM = config.getint('RECEIVER', 'udp_max_datagram', fallback=65535)
+UDP_WORKERS = config.getint('RECEIVER', 'udp_workers', fallback=1)
+UDP_DRAIN_MAX = 1024
+# Konstanta Linux (belum diekspor modul socket)
+SO_RXQ_OVFL = getattr(socket, 'SO_RXQ_OVFL', 40)
+
+SERIAL_READ_TIMEOUT = 0.5
+# ioctl Linux untuk struct serial_icounter_struct (11 int + 9 int reserved)
+TIOCGICOUNT = 0x545D
+SERIAL_ICOUNTER_FORMAT = "20i"
+SERIAL_ERROR_COUNTERS = {
+    'frame': 'uart_frame_errors',
+    'overrun': 'overruns',
+    'parity': 'parity_errors',
+    'brk': 'breaks',
+    'buf_overrun': 'overruns',
+}
+
+# Throughput per sumber (klien TCP, port serial, ...), dibaca oleh UI/log statistik
+_receiver_stats = {}
+_stats_lock = threading.Lock()
+
+
+def register_receiver_stats(key, meter):
+    with _stats_lock:
+        _receiver_stats[key] = meter
+
+
+def unregister_receiver_stats(key):
+    with _stats_lock:
+        _receiver_stats.pop(key, None)
+
+
+def get_receiver_stats():
+    """Snapshot throughput semua sumber yang sedang aktif"""
+    with _stats_lock:
+        meters = list(_receiver_stats.items())
+    return {key: meter.snapshot() for key, meter in meters}
+
+
+def feed_framer(framer, meter, data, connection_id):
+    """Framing satu chunk, catat throughput & framing error, lalu simpan kalimat lengkap"""
+    errors = framer.framing_errors
+    lines = framer.feed(data)
+    meter.add(len(data), len(lines))
+    if framer.framing_errors != errors:
+        meter.incr('framing_errors', framer.framing_errors - errors)
+    if lines:
+        batch_save_sentences(lines, connection_id)
+
+
+def flush_framer(framer, meter, connection_id):
+    errors = framer.framing_errors
+    lines = framer.flush()
+    if framer.framing_errors != errors:
+        meter.incr('framing_errors', framer.framing_errors - errors)
+    if lines:
+        meter.add(0, len(lines))
+        batch_save_sentences(lines, connection_id)
+
+
+def _read_stream(conn, framer, meter, stop_event, connection_id, label, idle_timeout=None):
+    """
+    Loop baca stream TCP: framing per baris, simpan kalimat, laporan throughput per menit.
+    Kembali saat peer menutup koneksi, stream diam melebihi `idle_timeout`, atau receiver dihentikan.
+    """
+    last_data = time.time()
+    while not stop_event.is_set():
+        try:
+            data = conn.recv(TCP_RECV_SIZE)
+        except socket.timeout:
+            flush_pending_nmea()
+            data = None
+
+        if data == b"":
+            break
+
+        if data:
+            last_data = time.time()
+            feed_framer(framer, meter, data, connection_id)
+        elif idle_timeout and time.time() - last_data >= idle_timeout:
+            raise socket.timeout(f"tidak ada data selama {idle_timeout} detik")
+
+        if meter.due(STATS_INTERVAL):
+            bytes_rate, sentence_rate = meter.roll()
+            signalsInfo.new_data_received.emit(
+                f"{label}: {sentence_rate:.1f} kalimat/detik, {bytes_rate:.0f} bytes/detik "
+                f"(total {meter.sentences_total} kalimat)")
+
+    flush_framer(framer, meter, connection_id)
+
+
+def _enable_keepalive(sock):
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    # Opsi detail hanya tersedia di sebagian platform (Linux/macOS baru)
+    for option, value in (("TCP_KEEPIDLE", KEEPALIVE_IDLE), ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+                          ("TCP_KEEPCNT", KEEPALIVE_COUNT)):
+        if hasattr(socket, option):
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+            except OSError:
+                pass
+
+
+def _handle_tcp_client(conn, addr, stop_event, connection_id):
+    """Baca stream satu klien TCP sampai klien menutup koneksi atau receiver dihentikan"""
+    peer = f"{addr[0]}:{addr[1]}"
+    key = f"tcp:{connection_id}:{peer}"
+    meter = ThroughputMeter(peer)
+    register_receiver_stats(key, meter)
+    signalsLogger.new_data_received.emit(f"Klien TCP terhubung: {peer}")
+
+    try:
+        with conn:
+            conn.settimeout(1.0)
+            _enable_keepalive(conn)
+            _read_stream(conn, LineFramer(), meter, stop_event, connection_id, f"TCP {peer}")
+    except Exception as e:
+        signalsError.new_data_received.emit(f"TCP ERROR ({peer}): {e}")
+    finally:
+        unregister_receiver_stats(key)
+        stats = meter.snapshot()
+        signalsLogger.new_data_received.emit(
+            f"Klien TCP terputus: {peer} ({stats['sentences']} kalimat, {stats['bytes']} bytes)")
+
+
+def receive_nmea_tcp_client(host, port, stop_event, connection_id):
+    """
+    Mode pull: hubungkan ke server AIS remote dan terima stream terus-menerus.
+    Koneksi yang putus atau diam terlalu lama dibuka ulang dengan backoff eksponensial.
+    """
+    peer = f"{host}:{port}"
+    key = f"tcp_client:{connection_id}:{peer}"
+    meter = ThroughputMeter(peer)
+    register_receiver_stats(key, meter)
+    delay = RECONNECT_MIN_DELAY
+
+    try:
+        while not stop_event.is_set():
+            connected_at = None
+            try:
+                signalsLogger.new_data_received.emit(f"Menghubungkan ke TCP server {peer}...")
+                with socket.create_connection((host, port), timeout=TCP_CONNECT_TIMEOUT) as sock:
+                    sock.settimeout(1.0)
+                    _enable_keepalive(sock)
+                    connected_at = time.time()
+                    meter.incr('connects')
+                    signalsLogger.new_data_received.emit(f"Terhubung ke TCP server {peer}")
+                    _read_stream(sock, LineFramer(), meter, stop_event, connection_id, f"TCP client {peer}",
+                                 idle_timeout=TCP_IDLE_TIMEOUT)
+                if not stop_event.is_set():
+                    signalsWarning.new_data_received.emit(f"TCP server {peer} menutup koneksi")
+            except Exception as e:
+                signalsError.new_data_received.emit(f"TCP CLIENT ERROR ({peer}): {e}")
+            finally:
+                flush_pending_nmea()
+
+            if stop_event.is_set():
+                break
+
+            # Koneksi yang sempat stabil mereset backoff
+            if connected_at is not None and time.time() - connected_at >= RECONNECT_STABLE_AFTER:
+                delay = RECONNECT_MIN_DELAY
+            meter.incr('reconnects')
+            signalsInfo.new_data_received.emit(f"Reconnect ke {peer} dalam {delay:.0f} detik")
+            stop_event.wait(delay)
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+    finally:
+        unregister_receiver_stats(key)
+        flush_pending_nmea(force=True)
+        signalsInfo.new_data_received.emit(f"TCP client {peer} stopped.")
 
-ais_buffer = {}
 
 def receive_nmea_tcp(host, port, stop_event, connection_id):
     while not stop_event.is_set():
+        clients = []
         try:
             with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
                 sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
                 sock.bind((host, port))
-                sock.listen(1)
+                sock.listen(TCP_BACKLOG)
+                sock.settimeout(1.0)
                 signalsLogger.new_data_received.emit(f"Menunggu TCP data NMEA di {host}:{port}...")
-                count = 0
-                start_time = time.time()
 
                 while not stop_event.is_set():
-                    sock.settimeout(1.0)
                     try:
                         conn, addr = sock.accept()
-                        with conn:
-                            buffer = conn.recv(4096).decode("utf-8", errors="ignore")
-                            count += 1
-                            nmea_data = buffer
-                            batch_save_nmea(buffer, connection_id)
-
-                        if time.time() - start_time >= 60:
-                            signalsInfo.new_data_received.emit(f"Total data diterima dari TCP dalam 1 menit: {count}")
-                            count = 0
-                            start_time = time.time()
-
                     except socket.timeout:
+                        flush_pending_nmea()
+                        clients = [client for client in clients if client.is_alive()]
                         continue
+
+                    client = threading.Thread(target=_handle_tcp_client,
+                                              args=(conn, addr, stop_event, connection_id),
+                                              name=f"TcpClient-{addr[0]}:{addr[1]}", daemon=True)
+                    client.start()
+                    clients.append(client)
         except Exception as e:
             signalsError.new_data_received.emit(f"TCP ERROR: {e}")
             time.sleep(10)
         finally:
+            for client in clients:
+                client.join(2)
+            flush_pending_nmea(force=True)
             signalsInfo.new_data_received.emit("Receiver stopped.")
 
-def receive_nmea_udp(host, port, stop_event, connection_id):
-    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)
-        sock.bind((host, port))
-        signalsLogger.new_data_received.emit(f"Menunggu UDP data NMEA di {host}:{port}...")
+def udp_options(dataset):
+    """(rcvbuf, max_datagram) untuk koneksi UDP: nilai per koneksi atau default [RECEIVER]"""
+    rcvbuf = int(dataset.get('rcvbuf') or UDP_RCVBUF)
+    max_datagram = min(int(dataset.get('max_datagram') or UDP_MAX_DATAGRAM), 65535)
+    return rcvbuf, max_datagram
+
+
+def udp_workers(dataset):
+    return max(int(dataset.get('workers') or UDP_WORKERS), 1)
+
+
+def udp_multicast(dataset):
+    """Opsi multicast koneksi UDP (group, interface, ttl), None bila unicast"""
+    group = (dataset.get('multicast_group') or '').strip()
+    if not group:
+        return None
+    ttl = dataset.get('multicast_ttl')
+    return {
+        'group': group,
+        'interface': (dataset.get('multicast_interface') or '').strip() or None,
+        'ttl': int(ttl) if ttl is not None else 1,
+    }
+
+
+def _join_multicast(sock, multicast):
+    interface = socket.inet_aton(multicast['interface'] or "0.0.0.0")
+    membership = struct.pack("4s4s", socket.inet_aton(multicast['group']), interface)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    if multicast['interface']:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, interface)
+    # TTL hanya berlaku untuk paket yang dikirim dari socket ini, bukan untuk penerimaan
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, multicast['ttl'])
+
+
+def open_udp_socket(host, port, rcvbuf, reuseport=False, multicast=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuseport:
+        # Beberapa socket pada address:port yang sama; kernel membagi datagram per pengirim (hash 4-tuple)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    # Kernel bisa memberi lebih kecil dari permintaan (Linux: dibatasi net.core.rmem_max, nilai dilaporkan 2x)
+    actual = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF)
+    if actual < rcvbuf:
+        signalsWarning.new_data_received.emit(
+            f"UDP {host}:{port}: SO_RCVBUF diminta {rcvbuf} bytes, didapat {actual} bytes "
+            f"(naikkan net.core.rmem_max untuk buffer lebih besar)")
 
-        count = 0
-        start_time = time.time()
+    try:
+        if multicast:
+            # POSIX: bind ke alamat grup agar grup lain pada port yang sama tidak ikut diterima.
+            # Windows tidak mengizinkan bind ke alamat multicast, jadi bind ke semua interface.
+            sock.bind((multicast['group'] if os.name == 'posix' else '', port))
+            _join_multicast(sock, multicast)
+        else:
+            sock.bind((host, port))
+    except OSError:
+        sock.close()
+        raise
+    return sock, actual
+
+
+class UdpDropCounter:
+    """
+    Jumlah datagram yang dibuang kernel karena buffer socket penuh.
+    Linux: SO_RXQ_OVFL (ancillary data pada recvmsg) bila `use_ancillary`, dilengkapi kolom drops
+    /proc/net/udp untuk inode socket ini (drop setelah datagram terakhir yang terbaca hanya terlihat di sana).
+    Platform lain tidak menyediakan angka ini.
+    """
+
+    def __init__(self, sock, use_ancillary=True):
+        self.ancillary = False
+        self._inode = None
+        self._total = 0
+        self._reported = 0
+        if not sys.platform.startswith('linux'):
+            return
+
+        if use_ancillary:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, SO_RXQ_OVFL, 1)
+                self.ancillary = True
+            except OSError:
+                pass
+        self._inode = str(os.fstat(sock.fileno()).st_ino)
+
+    def from_ancillary(self, ancdata):
+        for level, kind, data in ancdata:
+            if level == socket.SOL_SOCKET and kind == SO_RXQ_OVFL and len(data) >= 4:
+                self._total = struct.unpack("I", data[:4])[0]
+
+    def _read_proc(self):
+        for path in ("/proc/net/udp", "/proc/net/udp6"):
+            try:
+                with open(path, "r") as f:
+                    next(f)
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) > 12 and fields[9] == self._inode:
+                            return int(fields[12])
+            except OSError:
+                continue
+        return None
+
+    def update(self, meter):
+        """Tambahkan drop baru sejak pembacaan terakhir ke meter"""
+        if self._inode is not None:
+            total = self._read_proc()
+            if total is not None:
+                self._total = max(self._total, total)
+        if self._total > self._reported:
+            meter.incr('kernel_drops', self._total - self._reported)
+            self._reported = self._total
+
+
+def frame_datagram(framer, data):
+    """Satu datagram berisi satu atau lebih kalimat utuh; baris terakhir boleh tanpa newline"""
+    return framer.feed(data) + framer.flush()
+
+
+def receive_nmea_udp(host, port, stop_event, connection_id, rcvbuf=None, max_datagram=None, workers=1,
+                     multicast=None):
+    """
+    Receiver UDP dengan SO_RCVBUF besar. Dengan `workers` > 1 dibuka sejumlah socket SO_REUSEPORT
+    pada address yang sama, masing-masing dibaca worker thread sendiri; semuanya tetap
+    satu koneksi dan menulis ke antrian storage yang sama. Dengan `multicast` socket
+    join ke grup tersebut dan memakai jalur baca yang sama.
+
+    Worker adalah thread dalam satu proses: kernel membagi pengirim antar socket (antrian dan buffer
+    terima terpisah, lebih sedikit datagram dibuang saat burst), tetapi framing dan filter tetap
+    berbagi GIL sehingga throughput CPU tidak bertambah dengan jumlah worker.
+    """
+    rcvbuf = rcvbuf or UDP_RCVBUF
+    max_datagram = max_datagram or UDP_MAX_DATAGRAM
+    workers = max(int(workers or 1), 1)
+
+    if multicast and workers > 1:
+        # Datagram multicast dikirim ke setiap socket anggota grup, worker tambahan hanya menggandakan data
+        signalsWarning.new_data_received.emit(
+            f"UDP multicast {multicast['group']}:{port}: worker SO_REUSEPORT tidak dipakai untuk multicast")
+        workers = 1
+
+    if workers > 1 and not hasattr(socket, 'SO_REUSEPORT'):
+        signalsWarning.new_data_received.emit(
+            f"UDP {host}:{port}: SO_REUSEPORT tidak didukung platform ini, memakai 1 worker")
+        workers = 1
+
+    if workers == 1:
+        _udp_worker(host, port, stop_event, connection_id, rcvbuf, max_datagram, multicast=multicast)
+    else:
+        threads = []
+        for worker in range(workers):
+            thread = threading.Thread(target=_udp_worker,
+                                      args=(host, port, stop_event, connection_id, rcvbuf, max_datagram, worker),
+                                      name=f"UdpWorker-{port}-{worker}", daemon=True)
+            thread.start()
+            threads.append(thread)
+        signalsLogger.new_data_received.emit(f"UDP {host}:{port}: {workers} worker SO_REUSEPORT aktif")
+        for thread in threads:
+            thread.join()
+
+    flush_pending_nmea(force=True)
+
+
+def _udp_worker(host, port, stop_event, connection_id, rcvbuf, max_datagram, worker=None, multicast=None):
+    """
+    Satu socket UDP: non-blocking, setiap wakeup mengosongkan semua datagram yang sudah
+    menunggu (maks UDP_DRAIN_MAX) lalu menyimpan kalimatnya sebagai satu batch.
+    """
+    peer = f"{multicast['group'] if multicast else host}:{port}"
+    if worker is not None:
+        peer = f"{peer}#w{worker}"
+    key = f"udp:{connection_id}:{peer}"
+    meter = ThroughputMeter(peer)
+    register_receiver_stats(key, meter)
+
+    try:
+        sock, actual_rcvbuf = open_udp_socket(host, port, rcvbuf, reuseport=worker is not None, multicast=multicast)
+    except Exception as e:
+        unregister_receiver_stats(key)
+        signalsError.new_data_received.emit(f"UDP ERROR ({peer}): {e}")
+        return
+
+    with sock, selectors.DefaultSelector() as selector:
+        sock.setblocking(False)
+        selector.register(sock, selectors.EVENT_READ)
+        drops = UdpDropCounter(sock)
+        use_recvmsg = hasattr(sock, 'recvmsg')
+        ancillary_size = socket.CMSG_SPACE(4) if drops.ancillary else 0
+        framer = LineFramer()
+        signalsLogger.new_data_received.emit(
+            f"Menunggu UDP data NMEA di {peer}... (rcvbuf {actual_rcvbuf}, max datagram {max_datagram})")
 
         while not stop_event.is_set():
             try:
-                sock.settimeout(1.0)
-                data, addr = sock.recvfrom(1024)
-                count += 1
+                if selector.select(1.0):
+                    _drain_udp(sock, framer, meter, drops, connection_id, max_datagram, use_recvmsg, ancillary_size)
+                else:
+                    flush_pending_nmea()
+
+                if meter.due(STATS_INTERVAL):
+                    drops.update(meter)
+                    bytes_rate, sentence_rate = meter.roll()
+                    stats = meter.snapshot()
+                    signalsInfo.new_data_received.emit(
+                        f"UDP {peer}: {sentence_rate:.1f} kalimat/detik, {bytes_rate:.0f} bytes/detik, "
+                        f"kernel drop {stats.get('kernel_drops', 0)}, terpotong {stats.get('truncated', 0)}")
+            except Exception as e:
+                signalsError.new_data_received.emit(f"UDP ERROR ({peer}): {e}")
+                stop_event.wait(1)
+
+        drops.update(meter)
+
+    unregister_receiver_stats(key)
 
-                if time.time() - start_time >= 60:
-                    signalsInfo.new_data_received.emit(f"Total data diterima dari UDP dalam 1 menit: {count}")
-                    count = 0
-                    start_time = time.time()
 
-                nmea_data = data.decode("utf-8", errors="ignore")
-                batch_save_nmea(nmea_data, connection_id)
+def _drain_udp(sock, framer, meter, drops, connection_id, max_datagram, use_recvmsg, ancillary_size):
+    lines = []
+    nbytes = 0
+    errors = framer.framing_errors
 
-            except socket.timeout:
+    for _ in range(UDP_DRAIN_MAX):
+        try:
+            if use_recvmsg:
+                data, ancdata, flags, _addr = sock.recvmsg(max_datagram, ancillary_size)
+                if ancdata:
+                    drops.from_ancillary(ancdata)
+                if flags & socket.MSG_TRUNC:
+                    meter.incr('truncated')
+            else:
+                data, _addr = sock.recvfrom(max_datagram)
+        except BlockingIOError:
+            break
+        except OSError as e:
+            # Windows: datagram lebih besar dari buffer (WSAEMSGSIZE) tidak dipotong diam-diam
+            if getattr(e, 'winerror', None) == 10040:
+                meter.incr('truncated')
                 continue
-            except Exception as e:
-                signalsError.new_data_received.emit(f"UDP ERROR: {e}")
+            raise
 
-def receive_nmea_serial(port, baudrate, stop_event, connection_id):
-    ser = None
+        nbytes += len(data)
+        lines.extend(frame_datagram(framer, data))
 
-    while not stop_event.is_set():
+    meter.add(nbytes, len(lines))
+    if framer.framing_errors != errors:
+        meter.incr('framing_errors', framer.framing_errors - errors)
+    if lines:
+        batch_save_sentences(lines, connection_id)
+
+
+class SerialErrorCounters:
+    """
+    Counter error UART dari driver (frame, overrun, parity, break, buffer overrun) via ioctl TIOCGICOUNT.
+    Hanya tersedia di Linux untuk port serial fisik; di platform/port lain counter ini dilewati.
+    """
+
+    FIELDS = ('frame', 'overrun', 'parity', 'brk', 'buf_overrun')
+
+    def __init__(self, ser):
+        self._fd = None
+        self._last = None
+        if sys.platform.startswith('linux'):
+            try:
+                self._fd = ser.fileno()
+                self._last = self._read()
+            except Exception:
+                self._fd = None
+
+    def _read(self):
+        import fcntl
+        buffer = fcntl.ioctl(self._fd, TIOCGICOUNT, b"\0" * struct.calcsize(SERIAL_ICOUNTER_FORMAT))
+        values = struct.unpack(SERIAL_ICOUNTER_FORMAT, buffer)
+        # cts, dsr, rng, dcd, rx, tx, frame, overrun, parity, brk, buf_overrun
+        return dict(zip(self.FIELDS, values[6:11]))
+
+    def update(self, meter):
+        """Tambahkan selisih counter driver sejak pembacaan terakhir ke meter port"""
+        if self._fd is None:
+            return
         try:
-            ser = serial.Serial(port=port, baudrate=baudrate, timeout=0.5, exclusive=True)
-            signalsLogger.new_data_received.emit(f"Menunggu Serial data NMEA dari {port}...")
-            buffer = ""
-            start_time = time.time()
-            count = 0
+            current = self._read()
+        except Exception:
+            self._fd = None
+            return
+        for field in self.FIELDS:
+            delta = current[field] - self._last[field]
+            if delta > 0:
+                meter.incr(SERIAL_ERROR_COUNTERS[field], delta)
+        self._last = current
+
+
+def _read_serial(ser, port, stop_event, connection_id, meter):
+    """
+    Baca port dengan read blocking ber-timeout: thread tidur di driver sampai ada byte,
+    lalu semua byte yang sudah menunggu diambil sekaligus. Sisa kalimat yang belum lengkap
+    disimpan framer untuk pembacaan berikutnya.
+    """
+    framer = LineFramer()
+    driver_errors = SerialErrorCounters(ser)
+    try:
+        while not stop_event.is_set():
+            data = ser.read(ser.in_waiting or 1)
+            if data:
+                feed_framer(framer, meter, data, connection_id)
+            else:
+                flush_pending_nmea()
 
-            while not stop_event.is_set():
-                if ser.in_waiting:
-                    buffer += ser.read(ser.in_waiting).decode("utf-8", errors="ignore")
+            if meter.due(STATS_INTERVAL):
+                driver_errors.update(meter)
+                bytes_rate, sentence_rate = meter.roll()
+                stats = meter.snapshot()
+                signalsInfo.new_data_received.emit(
+                    f"Serial {port}: {sentence_rate:.1f} kalimat/detik, {bytes_rate:.0f} bytes/detik, "
+                    f"framing error {stats.get('framing_errors', 0)}, overrun {stats.get('overruns', 0)}")
+    finally:
+        flush_framer(framer, meter, connection_id)
+        driver_errors.update(meter)
 
-                if "\n" in buffer:
-                    batch_save_nmea(buffer, connection_id)
-                    count += 1
-                    buffer = ""
 
-                if time.time() - start_time >= 60:
-                    signalsInfo.new_data_received.emit(f"Total data diterima dari Serial dalam 1 menit: {count}")
-                    count = 0
-                    start_time = time.time()
+def receive_nmea_serial(port, baudrate, stop_event, connection_id):
+    ser = None
+    key = f"serial:{connection_id}:{port}"
+    meter = ThroughputMeter(port)
+    register_receiver_stats(key, meter)
 
-                time.sleep(0.05)
+    while not stop_event.is_set():
+        try:
+            ser = serial.Serial(port=port, baudrate=baudrate, timeout=SERIAL_READ_TIMEOUT, exclusive=True)
+            signalsLogger.new_data_received.emit(f"Menunggu Serial data NMEA dari {port}...")
+            _read_serial(ser, port, stop_event, connection_id, meter)
         except serial.SerialException as e:
             signalsError.new_data_received.emit(f"Gagal membuka {port}: {e}")
-            time.sleep(10)
+            stop_event.wait(10)
 
         except Exception as e:
             signalsError.new_data_received.emit(f"Serial ERROR: {e}")
+            stop_event.wait(1)
 
         finally:
             if ser is not None:
@@ -119,12 +592,28 @@ def receive_nmea_serial(port, baudrate, stop_event, connection_id):
                 except Exception as e:
                     signalsError.new_data_received.emit(f"Error saat menutup serial {port}: {e}")
 
-    signalsInfo.new_data_received.emit("Receiver serial stopped.")
+    unregister_receiver_stats(key)
+    flush_pending_nmea(force=True)
+    stats = meter.snapshot()
+    signalsInfo.new_data_received.emit(
+        f"Receiver serial stopped. {port}: {stats['sentences']} kalimat, {stats['bytes']} bytes, "
+        f"framing error {stats.get('framing_errors', 0)}, overrun {stats.get('overruns', 0)}")
+
+
+def resolve_engine(dataset):
+    """Engine receiver untuk koneksi: pilihan per koneksi, atau default [RECEIVER] engine"""
+    engine = (dataset.get('engine') or DEFAULT_ENGINE or 'thread').strip().lower()
+    if engine not in RECEIVER_ENGINES:
+        signalsWarning.new_data_received.emit(f"Engine '{engine}' tidak dikenal, memakai 'thread'")
+        engine = 'thread'
+    return engine
+
 
 def start_multi_receiver(stop_event):
     try:
         data = get_connection()
         threads = []
+        async_connections = []
         has_active_connection = False
 
         for dataset in data:
@@ -133,6 +622,10 @@ def start_multi_receiver(stop_event):
 
             has_active_connection = True
 
+            if resolve_engine(dataset) == 'asyncio':
+                async_connections.append(dataset)
+                continue
+
             if dataset.get('type') == 'network':
                 thread = None
 
@@ -145,13 +638,20 @@ def start_multi_receiver(stop_event):
                     continue
 
                 if protocol == 'udp':
+                    rcvbuf, max_datagram = udp_options(dataset)
                     thread = threading.Thread(target=receive_nmea_udp,
-                                              args=(address, int(port), stop_event, dataset.get('id')))
+                                              args=(address, int(port), stop_event, dataset.get('id'),
+                                                    rcvbuf, max_datagram, udp_workers(dataset),
+                                                    udp_multicast(dataset)))
 
                 elif protocol == 'tcp':
                     thread = threading.Thread(target=receive_nmea_tcp,
                                               args=(address, int(port), stop_event, dataset.get('id')))
 
+                elif protocol == 'tcp_client':
+                    thread = threading.Thread(target=receive_nmea_tcp_client,
+                                              args=(address, int(port), stop_event, dataset.get('id')))
+
                 if thread:
                     thread.start()
                     threads.append(thread)
@@ -174,6 +674,14 @@ def start_multi_receiver(stop_event):
             else:
                 signalsError.new_data_received.emit(f"Jenis dataset tidak valid: {dataset}")
 
+        if async_connections:
+            # Import di sini: modul asyncio memakai helper dari modul ini
+            from Services.async_receiver import run_async_receiver
+            thread = threading.Thread(target=run_async_receiver, args=(async_connections, stop_event),
+                                      name="AsyncReceiver")
+            thread.start()
+            threads.append(thread)
+
         if not has_active_connection:
             signalsInfo.new_data_received.emit("⚠️ Tidak ada koneksi aktif! Menunggu stop_event...")
             while not stop_event.is_set():
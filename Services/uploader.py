@@ -3,14 +3,18 @@ import time
 import json
 from datetime import datetime, timedelta
 
-from Controllers.NMEA_controller import get_today_pending_data, mark_data_as_sent, mark_data_as_failed, \
-    get_today_pending_count, get_old_data_stats
-from Services.decoder import decode_ais
+from Controllers.Upload_controller import TODAY_CURSOR, get_pending_after_cursor, get_retry_exceptions, \
+    commit_upload_batch, rollover_upload_cursors
+from Controllers.Counter_controller import get_today_counter_stats
+from Services.decoder import decode_batch, DECODE_OK, DECODE_MERGED, DECODE_WAITING
+from Services.reassembler import FragmentReassembler
 from requests.exceptions import RequestException, Timeout, ConnectionError
-from Untils.logging_helper import sys_logger
+from Untils.logging_helper import get_logger
 import configparser
 from Untils.path_helper import get_resource_path
 
+sys_logger = get_logger("uploader")
+
 config_path = get_resource_path("config.ini", is_config=True)
 config = configparser.ConfigParser()
 config.read(config_path)
@@ -22,8 +26,11 @@ BATCH_SIZE = 300
 RETRY_DELAY = 30
 MAX_CONSECUTIVE_FAILED_BATCHES = 5
 
+# Reassembler milik uploader ini: uploader lain membaca koneksi yang sama pada saat bersamaan,
+# fragmennya tidak boleh menimpa atau melengkapi pesan yang sedang ditunggu di sini
+fragment_reassembler = FragmentReassembler()
+
 # In-memory tracking untuk session ini (tidak persisten)
-_session_failed_ids = set()
 _session_stats = {
     'total_processed': 0,
     'total_decoded': 0,
@@ -45,54 +52,51 @@ def send_batch_data(stop_event):
             if stop_event.is_set():
                 break
 
-            # 1. Check total pending data
-            total_pending = get_today_pending_count()
+            # 1. Check total pending data (dari tabel counter, tanpa COUNT(*))
+            rollover_upload_cursors()
+            total_pending = get_today_counter_stats()['pending']
             sys_logger.info(f"📊 Total pending data TODAY in database: {total_pending}")
 
-            # 2. Get data from database
-            data = get_today_pending_data(BATCH_SIZE)
-            if not data:
+            # 2. Get data from database: data setelah high-water mark + exception yang dicoba ulang
+            data = get_pending_after_cursor(TODAY_CURSOR, BATCH_SIZE)
+            retry_data = get_retry_exceptions(TODAY_CURSOR, BATCH_SIZE)
+            if not data and not retry_data:
                 sys_logger.info("No more pending data for today, upload complete!")
                 if wait_with_interrupt(stop_event, TIMEOUT):
                     continue
                 else:
                     break
 
-            sys_logger.info(f"📡 Processing {len(data)} records from today...")
+            sys_logger.info(f"📡 Processing {len(data)} records from today (+{len(retry_data)} retries)...")
 
             # 3. Process decoded data with better tracking
-            decoded_list, successful_ids, failed_ids = process_data_batch_enhanced(data, stop_event)
+            # Urut id: fragmen yang dicoba ulang mendahului fragmen lanjutannya dari halaman baru
+            records = sorted(data + retry_data, key=lambda record: record.id)
+            decoded_list, successful_ids, failed_ids, waiting_ids = process_data_batch_enhanced(records, stop_event)
             if stop_event.is_set():
                 continue
 
             #4. handle failed decoded data
-            if failed_ids:
-                sys_logger.warning(f"⚠️ {len(failed_ids)} records failed to decode, marking as failed")
-
-                new_failed_ids, repeated_failed_ids = []
-
-                for fid in failed_ids:
-                    if fid not in _session_failed_ids:
-                        repeated_failed_ids.append(fid)
-                    else:
-                        new_failed_ids.append(fid)
-                        _session_failed_ids.add(fid)
-
-                if repeated_failed_ids:
-                    sys_logger.warning(f"🚨 {len(repeated_failed_ids)} records for today were repeatedly failed, marking as permanently failed")
-                    try:
-                        mark_data_as_failed(repeated_failed_ids, '"decode_failed_today')
-                    except Exception as e:
-                        sys_logger.error(f"Error marking repeated failed data: {str(e)}")
-
-                if new_failed_ids:
-                    sys_logger.info(f"📝 {len(new_failed_ids)} new failures, will retry in next batch")
+            retry_ids = {record.id for record in retry_data}
+            new_failed_ids = [fid for fid in failed_ids if fid not in retry_ids]
+            repeated_failed_ids = [fid for fid in failed_ids + waiting_ids if fid in retry_ids]
+            # Fragmen yang pesannya belum lengkap: tidak dihitung terkirim, disimpan sebagai exception agar
+            # dibaca lagi bersama fragmen lanjutannya walaupun high-water mark sudah lewat
+            new_waiting_ids = [wid for wid in waiting_ids if wid not in retry_ids]
+
+            if repeated_failed_ids:
+                sys_logger.warning(f"🚨 {len(repeated_failed_ids)} records for today were repeatedly failed, marking as permanently failed")
+            if new_failed_ids:
+                sys_logger.info(f"📝 {len(new_failed_ids)} new failures, will retry in next batch")
+            if new_waiting_ids:
+                sys_logger.info(f"🧩 {len(new_waiting_ids)} fragments waiting for the rest of their message, will retry in next batch")
 
             #5. Send decodable data to API
-            if not decoded_list:
+            batch_done = True
+            if decoded_list:
                 sys_logger.info(f"🚀 Attempting to send {len(decoded_list)} today's records to API")
-                success = send_to_api(decoded_list, successful_ids, stop_event)
-                if success:
+                batch_done = send_to_api(decoded_list, successful_ids, stop_event)
+                if batch_done:
                     retry_count = 0
                     consecutive_failed_batches = 0
                     last_success_time = datetime.now()
@@ -119,6 +123,23 @@ def send_batch_data(stop_event):
                     sys_logger.info(f"ℹ️ No Data to process in this batch")
                 consecutive_failed_batches = 0
 
+            # Batch selesai: geser high-water mark dan simpan exception dalam satu transaksi
+            if batch_done:
+                try:
+                    commit_upload_batch(
+                        TODAY_CURSOR,
+                        data[-1].id if data else None,
+                        failed_ids=new_failed_ids,
+                        waiting_ids=new_waiting_ids,
+                        resolved_ids=[sid for sid in successful_ids if sid in retry_ids],
+                        retry_failed_ids=repeated_failed_ids,
+                        reason="decode_failed_today",
+                        records=records,
+                        sent_ids=successful_ids
+                    )
+                except Exception as e:
+                    sys_logger.error(f"Error saving upload progress: {str(e)}")
+
             #6. check for too many consecutive failed batches
             if consecutive_failed_batches >= MAX_CONSECUTIVE_FAILED_BATCHES:
                 sys_logger.warning(f"🚨 Too many consecutive failed batches ({consecutive_failed_batches}), pausing for {RETRY_DELAY * 2} seconds...")
@@ -148,50 +169,48 @@ def process_data_batch_enhanced(data, stop_event):
     decoded_list = []
     successful_ids = []
     failed_ids = []
+    waiting_ids = []
 
     global _session_stats
     _session_stats['total_processed'] += len(data)
 
-    for record in data:
-        if stop_event.is_set():
-            return [], [], []
-
-        try:
-            # Convert dict to object-like structure
-            class RecordObj:
-                def __init__(self, data_dict):
-                    for key, value in data_dict.items():
-                        setattr(self, key, value)
-
-            record_obj = RecordObj(record)
-
-            if len(decoded_list) < 3:
-                sys_logger.info(f"🔍 Processing sample {len(decoded_list) + 1}: {record_obj.nmea[:60]}...")
-
-            decoded = decode_ais(record_obj.nmea)
-            if decoded:
-                decoded['created_at'] = record_obj.created_at.isoformat() if hasattr(record_obj.created_at, 'isoformat') else str(record_obj.created_at)
-                decoded_list.append(decoded)
-                successful_ids.append(record_obj.id)
-
-                if len(decoded_list) <= 3:
-                    sys_logger.info(f"✅ Decoded successfully: Message type {decoded.get('msg_type', 'unknown')}")
-            else:
-                failed_ids.append(record_obj.id)
-                if len(failed_ids) <= 3:
-                    sys_logger.warning(f"❌ Failed to decode: {record_obj.nmea[:60]}...")
-
-        except Exception as e:
-            sys_logger.error(f"💥 Decode error for record {record.get('id', 'unknown')}: {str(e)}")
-            failed_ids.append(record.get('id'))
+    if stop_event.is_set():
+        return [], [], [], []
+
+    # record: tuple (id, nmea, connection_id, created_at)
+    for record in data[:3]:
+        sys_logger.info(f"🔍 Processing sample: {record.nmea[:60]}...")
+
+    batch = decode_batch([record.nmea for record in data], [record.connection_id for record in data],
+                         reassembler=fragment_reassembler)
+    merged = 0
+    for i, (record, status) in enumerate(zip(data, batch.status.tolist())):
+        if status == DECODE_OK:
+            created_at = record.created_at.isoformat() if hasattr(record.created_at, 'isoformat') else str(record.created_at)
+            decoded_list.append(batch.message(i, created_at=created_at))
+            successful_ids.append(record.id)
+        elif status == DECODE_MERGED:
+            # Fragmen awal pesan multi-fragmen: isinya terkirim bersama fragmen terakhir di batch ini
+            successful_ids.append(record.id)
+            merged += 1
+        elif status == DECODE_WAITING:
+            waiting_ids.append(record.id)
+        else:
+            failed_ids.append(record.id)
+            if len(failed_ids) <= 3:
+                sys_logger.warning(f"❌ Failed to decode: {record.nmea[:60]}...")
+
+    if merged:
+        sys_logger.info(f"🧩 {merged} fragments merged into multi-fragment messages")
 
     _session_stats['total_decoded'] += len(decoded_list)
     _session_stats['total_failed'] += len(failed_ids)
 
     decode_rate = (len(successful_ids) / len(data)) * 100 if data else 0
-    sys_logger.info(f"📊 Batch result: {len(successful_ids)} decoded ({decode_rate:.1f}%), {len(failed_ids)} failed")
+    sys_logger.info(f"📊 Batch result: {len(successful_ids)} decoded ({decode_rate:.1f}%), {len(failed_ids)} failed, "
+                    f"{len(waiting_ids)} waiting")
 
-    return decoded_list, successful_ids, failed_ids
+    return decoded_list, successful_ids, failed_ids, waiting_ids
 
 def send_to_api(data, ids, stop_event):
     """Kirim data dengan timeout pendek dan interrupt"""
@@ -214,7 +233,6 @@ def send_to_api(data, ids, stop_event):
             )
 
             if response.status_code in (200, 201):
-                mark_data_as_sent(ids)
                 return True
             else:
                 response_text = response.text[:200] if response.text else "No response body"
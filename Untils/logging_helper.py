@@ -1,26 +1,144 @@
+import atexit
+import configparser
+import gzip
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
+import shutil
 
-os.makedirs("logs", exist_ok=True)
+from Untils.path_helper import get_resource_path
+
+config_path = get_resource_path("config.ini", is_config=True)
+config = configparser.ConfigParser()
+config.read(config_path)
+
+# size | time: rotasi saat file mencapai max_bytes, atau per interval `when` (mis. midnight)
+LOG_ROTATION = config.get('LOGGING', 'rotation', fallback='size').strip().lower()
+LOG_MAX_BYTES = config.getint('LOGGING', 'max_bytes', fallback=10 * 1024 * 1024)
+LOG_WHEN = config.get('LOGGING', 'when', fallback='midnight')
+LOG_BACKUP_COUNT = config.getint('LOGGING', 'backup_count', fallback=10)
+LOG_COMPRESS = config.getboolean('LOGGING', 'compress', fallback=True)
+
+# Subsystem punya logger anak "LogSystem.<nama>" dengan level sendiri, ditulis ke logSystem.log
+SUBSYSTEMS = ("receiver", "decoder", "uploader", "sender")
 
 error_file_logger = logging.getLogger("AisErrorLogger")
 error_file_logger.setLevel(logging.ERROR)
 sys_logger = logging.getLogger("LogSystem")
 sys_logger.setLevel(logging.DEBUG)
-def fileHandler(name, classes):
-    file_handler = logging.FileHandler(f"logs/{name}.log",encoding = 'utf-8')
+
+
+def _gzip_namer(name):
+    return name + ".gz"
+
+
+def _gzip_rotator(source, dest):
+    """Kompres file hasil rotasi (berjalan di thread listener, bukan di thread pemanggil log)"""
+    with open(source, 'rb') as f_in, gzip.open(dest, 'wb') as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def fileHandler(name):
+    path = f"logs/{name}.log"
+    if LOG_ROTATION == 'time':
+        file_handler = logging.handlers.TimedRotatingFileHandler(path, when=LOG_WHEN, backupCount=LOG_BACKUP_COUNT,
+                                                                 encoding='utf-8')
+    else:
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES,
+                                                            backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+    if LOG_COMPRESS:
+        file_handler.namer = _gzip_namer
+        file_handler.rotator = _gzip_rotator
     formatter = logging.Formatter('%(asctime)s - %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
     file_handler.setFormatter(formatter)
-    classes.addHandler(file_handler)
+    return file_handler
+
+
+class _LoggerFilter(logging.Filter):
+    """Arahkan record dari queue bersama hanya ke handler milik logger asalnya"""
+
+    def __init__(self, root_name):
+        super().__init__()
+        self.root_name = root_name
+
+    def filter(self, record):
+        return record.name == self.root_name or record.name.startswith(self.root_name + ".")
+
+
+def get_logger(subsystem):
+    """Logger untuk satu subsystem (receiver, decoder, uploader, sender), levelnya dari [LOGGING] level_<nama>"""
+    return logging.getLogger(f"{sys_logger.name}.{subsystem}")
+
+
+class _ForwardHandler(logging.Handler):
+    """Teruskan record dari proses worker ke logger dengan nama yang sama di proses ini"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def attach_log_queue(log_queue):
+    """
+    Dipakai proses worker (multiprocessing): record dikirim ke `log_queue` milik proses utama
+    alih-alih ditulis sendiri, sehingga hanya proses utama yang menulis dan merotasi file log.
+    """
+    for target in (error_file_logger, sys_logger):
+        target.addHandler(logging.handlers.QueueHandler(log_queue))
+        target.propagate = False
+    _apply_levels()
+
+
+def forward_log_queue(log_queue):
+    """Proses utama: ambil record dari `log_queue` (lihat attach_log_queue) dan tulis lewat logger biasa"""
+    listener = logging.handlers.QueueListener(log_queue, _ForwardHandler())
+    listener.start()
+    return listener
+
+
+def _apply_levels():
+    for subsystem in SUBSYSTEMS:
+        level = config.get('LOGGING', f'level_{subsystem}', fallback='DEBUG').strip().upper()
+        try:
+            get_logger(subsystem).setLevel(level)
+        except ValueError:
+            get_logger(subsystem).setLevel(logging.DEBUG)
+
+
+def _setup():
+    """
+    Thread pemanggil hanya memasukkan record ke queue (QueueHandler); penulisan file, rotasi
+    dan kompresi dikerjakan satu thread QueueListener.
+    """
+    os.makedirs("logs", exist_ok=True)
+    log_queue = queue.SimpleQueue()
+    handlers = []
+    for name, target in (("error", error_file_logger), ("logSystem", sys_logger)):
+        handler = fileHandler(name)
+        handler.addFilter(_LoggerFilter(target.name))
+        handlers.append(handler)
+        target.addHandler(logging.handlers.QueueHandler(log_queue))
+        target.propagate = False
 
-if not error_file_logger.handlers:
-    fileHandler("error", error_file_logger)
+    _apply_levels()
 
-if not sys_logger.handlers:
-    fileHandler("logSystem", sys_logger)
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
 
 
-error_file_logger.propagate = False
-sys_logger.propagate = False
+def _is_child_process():
+    """
+    True di proses worker multiprocessing, termasuk saat modul diimpor selama spawn
+    (sebelum parent_process() terisi, multiprocessing menandai proses dengan _inheriting).
+    """
+    return multiprocessing.parent_process() is not None or getattr(multiprocessing.current_process(), '_inheriting', False)
 
 
+# Proses anak (worker decode) tidak membuka file log sendiri, lihat attach_log_queue
+log_listener = None
+if not _is_child_process() and not error_file_logger.handlers and not sys_logger.handlers:
+    log_listener = _setup()
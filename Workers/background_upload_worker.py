@@ -1,6 +1,8 @@
 from PyQt6.QtCore import QThread
 from Services.backgroundUploader import send_batch_data_background_upload
-from Untils.logging_helper import sys_logger
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("uploader")
 
 class BackgroundUploadWorker(QThread):
     def __init__(self, stop_event):
@@ -1,7 +1,10 @@
 from PyQt6.QtCore import QThread
 from Services import receiver
+from Services.ingest import start_ingest_writer, stop_ingest_writer
 from Services.SignalsMessages import signalsError
-from Untils.logging_helper import sys_logger
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("receiver")
 
 
 class ReceiverWorker(QThread):
@@ -11,6 +14,7 @@ class ReceiverWorker(QThread):
 
     def run(self):
         try:
+            start_ingest_writer()
             threads = receiver.start_multi_receiver(self.stop_event)
             while not self.stop_event.is_set():
                 alive_threads = [t for t in threads if t.is_alive()]
@@ -21,4 +25,5 @@ class ReceiverWorker(QThread):
             self.stop_event.set()
             sys_logger.error(f"Receiver worker error: {str(e)}")
         finally:
+            stop_ingest_writer()
             sys_logger.info("Receiver worker stopped.")
@@ -2,7 +2,9 @@ import time
 from PyQt6.QtCore import QThread
 from Services import sender
 from Services.SignalsMessages import signalsError, signalsInfo, signalsWarning
-from Untils.logging_helper import sys_logger
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("sender")
 
 
 class SenderWorker(QThread):
@@ -1,6 +1,8 @@
 from PyQt6.QtCore import QThread
 from Services.uploader import send_batch_data
-from Untils.logging_helper import sys_logger
+from Untils.logging_helper import get_logger
+
+sys_logger = get_logger("uploader")
 
 
 class UploadWorker(QThread):
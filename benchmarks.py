@@ -0,0 +1,359 @@
+import gc
+import re
+import time
+
+import ais
+from sqlalchemy import select
+
+from Models import engine
+from Models.NMEA_model import nmea_data
+from Services.checksum import ChecksumFilter
+from Services.decode_pool import DecodePool
+from Services.decoder import decode_ais, decode_batch
+from Services.dedup import DedupWindow
+from Services.framing import LineFramer, SENTENCE_STARTS
+
+CORPUS_LIMIT = 50000
+CHUNK_SIZE = 65536
+REPEAT = 5
+
+AIS_PREFIXES_STR = ("!AIVDM", "!AIVDO")
+AIS_PREFIXES = (b"!AIVDM", b"!AIVDO")
+
+
+def load_corpus(limit=CORPUS_LIMIT):
+    """Ambil kalimat dari tabel nmea_data sebagai corpus benchmark"""
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(select(nmea_data.nmea).order_by(nmea_data.id).limit(limit))]
+
+
+def to_chunks(lines, size=CHUNK_SIZE):
+    """Gabungkan kalimat menjadi stream CRLF lalu potong seperti hasil recv (kalimat boleh terbelah)"""
+    stream = "".join(f"{line}\r\n" for line in lines).encode("ascii", errors="ignore")
+    return [stream[i:i + size] for i in range(0, len(stream), size)]
+
+
+class StrLineFramer(LineFramer):
+    """Framer versi lama: setiap baris langsung di-decode ke str"""
+
+    def feed(self, data):
+        if self._tail:
+            data = self._tail + data
+        parts = data.split(b"\n")
+        self._tail = parts.pop()
+        lines = []
+        for part in parts:
+            part = part.strip()
+            if part.startswith(SENTENCE_STARTS) and b"*" in part:
+                lines.append(part.decode("ascii", errors="ignore"))
+        return lines
+
+
+def ingest_str(chunks):
+    """Jalur lama: framer str, lalu strip/startswith, checksum & dedup pada str"""
+    checksum = ChecksumFilter(enabled=True, quarantine_file="")
+    dedup = DedupWindow(enabled=True, window=3600)
+    framer = StrLineFramer()
+    stored = 0
+    for chunk in chunks:
+        extracted = []
+        for line in framer.feed(chunk):
+            line = line.strip()
+            if line.startswith(AIS_PREFIXES_STR):
+                extracted.append(line)
+        stored += len(dedup.split(checksum.split(extracted, 0), 0))
+    return stored
+
+
+def ingest_bytes(chunks):
+    """Jalur baru: LineFramer menghasilkan Sentence (bytes), str hanya untuk baris yang disimpan"""
+    checksum = ChecksumFilter(enabled=True, quarantine_file="")
+    dedup = DedupWindow(enabled=True, window=3600)
+    framer = LineFramer()
+    stored = 0
+    for chunk in chunks:
+        sentences = [s for s in framer.feed(chunk) if s.raw.startswith(AIS_PREFIXES)]
+        unique = dedup.split(checksum.split(sentences, 0), 0)
+        stored += len([s.raw.decode("ascii") for s in unique])
+    return stored
+
+
+_legacy_buffer = {}
+_legacy_buffer_time = {}
+_legacy_stats = {'total_attempts': 0, 'successful_decodes': 0, 'failed_decodes': 0, 'error_types': {}}
+
+
+def _legacy_track_error(error_type):
+    _legacy_stats['failed_decodes'] += 1
+    _legacy_stats['error_types'][error_type] = _legacy_stats['error_types'].get(error_type, 0) + 1
+
+
+def legacy_try_decode(payload):
+    """try_decode versi lama: tebak pad bits sampai ais.decode tidak melempar exception"""
+    try:
+        msg_type = int(payload[:6], 2)
+    except ValueError:
+        msg_type = 0
+
+    if msg_type in {5, 19, 21, 24}:
+        versions = [2, 0, 1]
+    else:
+        versions = [0, 1, 2]
+
+    for version in versions:
+        try:
+            decoded_messages = ais.decode(payload, version)
+            if isinstance(decoded_messages, list) and len(decoded_messages) > 0:
+                return decoded_messages[0], version
+            return decoded_messages, version
+        except Exception:
+            continue
+    return None, None
+
+
+def legacy_decode_ais(nmea_sentence):
+    """decode_ais versi lama (regex per kalimat, try_decode, buffer fragmen dict dengan scan expiry)"""
+    _legacy_stats['total_attempts'] += 1
+    if not nmea_sentence or not isinstance(nmea_sentence, str):
+        _legacy_track_error("invalid_input_type")
+        return None
+
+    nmea_sentence = nmea_sentence.strip()
+    if not (nmea_sentence.startswith("!AIVDM") or nmea_sentence.startswith("!AIVDO")):
+        _legacy_track_error("not_ais_sentence")
+        return None
+
+    parts = nmea_sentence.split(",")
+    if len(parts) <= 5:
+        _legacy_track_error("invalid_nmea_format")
+        return None
+
+    try:
+        fragment_count = int(parts[1])
+        fragment_number = int(parts[2])
+        message_id = parts[3]
+        channel = parts[4]
+        payload = parts[5]
+    except (ValueError, IndexError):
+        _legacy_track_error("invalid_nmea_fields")
+        return None
+
+    if not payload or len(payload) < 6:
+        _legacy_track_error("invalid_payload_length")
+        return None
+
+    if not re.match(r'^[0-9:;<=>?@A-Z\[\\\]^_`a-w]*$', payload):
+        _legacy_track_error("invalid_payload_characters")
+        return None
+
+    unique_key = f"{message_id}_{channel}"
+
+    if fragment_count != 1:
+        if unique_key not in _legacy_buffer:
+            _legacy_buffer[unique_key] = [""] * fragment_count
+            _legacy_buffer[unique_key + "_received"] = set()
+            _legacy_buffer_time[unique_key] = time.time()
+
+        _legacy_buffer[unique_key][fragment_number - 1] = payload
+        _legacy_buffer[unique_key + "_received"].add(fragment_number)
+
+        if len(_legacy_buffer[unique_key + "_received"]) != fragment_count:
+            current_time = time.time()
+            for key in [key for key, timestamp in _legacy_buffer_time.items() if current_time - timestamp > 60]:
+                _legacy_buffer.pop(key, None)
+                _legacy_buffer.pop(key + "_received", None)
+                _legacy_buffer_time.pop(key, None)
+            return None
+
+        payload = "".join(_legacy_buffer.pop(unique_key))
+        _legacy_buffer.pop(unique_key + "_received")
+        _legacy_buffer_time.pop(unique_key, None)
+
+    decoded_data, version = legacy_try_decode(payload)
+    if not decoded_data:
+        _legacy_track_error("decode_failed_single" if fragment_count == 1 else "decode_failed_multi")
+        return None
+
+    if isinstance(decoded_data, dict):
+        decoded_data["channel"] = channel
+        decoded_data["message_id"] = message_id
+        decoded_data["fragment_count"] = fragment_count
+        decoded_data["decoder_version"] = version
+
+    _legacy_stats['successful_decodes'] += 1
+    return decoded_data
+
+
+def decode_legacy(lines):
+    return [legacy_decode_ais(line) for line in lines]
+
+
+def decode_single_pass(lines):
+    return [decode_ais(line) for line in lines]
+
+
+def _best_of(func, *args, repeat=REPEAT):
+    """Waktu terbaik dari beberapa kali jalan; GC dimatikan agar jumlah objek hasil tidak ikut terukur"""
+    best = None
+    result = None
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func(*args)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+    finally:
+        gc.enable()
+    return best, result
+
+
+def run_ingest_benchmark():
+    corpus = load_corpus()
+    if not corpus:
+        print("❌ Tabel nmea_data kosong, tidak ada corpus untuk benchmark")
+        return
+
+    chunks = to_chunks(corpus)
+    print(f"\n📦 Corpus: {len(corpus)} kalimat, {sum(map(len, chunks))} bytes, {len(chunks)} chunk")
+
+    old_time, old_stored = _best_of(ingest_str, chunks)
+    new_time, new_stored = _best_of(ingest_bytes, chunks)
+    print(f"str   : {old_time * 1000:8.1f} ms  ({len(corpus) / old_time:10.0f} kalimat/detik, {old_stored} disimpan)")
+    print(f"bytes : {new_time * 1000:8.1f} ms  ({len(corpus) / new_time:10.0f} kalimat/detik, {new_stored} disimpan)")
+    print(f"Speedup: {old_time / new_time:.2f}x")
+    if old_stored != new_stored:
+        print(f"⚠️ Jumlah kalimat tersimpan berbeda: {old_stored} vs {new_stored}")
+
+
+def run_decode_benchmark():
+    corpus = load_corpus()
+    if not corpus:
+        print("❌ Tabel nmea_data kosong, tidak ada corpus untuk benchmark")
+        return
+
+    print(f"\n📦 Corpus: {len(corpus)} kalimat")
+    old_time, old_result = _best_of(decode_legacy, corpus)
+    new_time, new_result = _best_of(decode_single_pass, corpus)
+    old_ok = sum(1 for item in old_result if item)
+    new_ok = sum(1 for item in new_result if item)
+    print(f"try_decode : {old_time * 1000:8.1f} ms  ({len(corpus) / old_time:10.0f} kalimat/detik, {old_ok} terdecode)")
+    print(f"single-pass: {new_time * 1000:8.1f} ms  ({len(corpus) / new_time:10.0f} kalimat/detik, {new_ok} terdecode)")
+    print(f"Speedup: {old_time / new_time:.2f}x")
+
+    different = [line for line, old, new in zip(corpus, old_result, new_result)
+                 if old and new and {k: v for k, v in old.items() if k != 'decoder_version'} !=
+                 {k: v for k, v in new.items() if k != 'decoder_version'}]
+    if different:
+        print(f"⚠️ {len(different)} hasil decode berbeda, contoh: {different[0]}")
+
+
+def decode_columns(lines, vectorized):
+    return decode_batch(lines, vectorized=vectorized)
+
+
+def decode_messages(lines, vectorized):
+    batch = decode_batch(lines, vectorized=vectorized)
+    return [batch.message(i) for i in range(len(batch))]
+
+
+def run_vectorized_benchmark():
+    corpus = load_corpus()
+    if not corpus:
+        print("❌ Tabel nmea_data kosong, tidak ada corpus untuk benchmark")
+        return
+
+    print(f"\n📦 Corpus: {len(corpus)} kalimat")
+    for label, func in (("kolom", decode_columns), ("kolom + dict", decode_messages)):
+        old_time, old_result = _best_of(func, corpus, False)
+        new_time, new_result = _best_of(func, corpus, True)
+        print(f"{label}:")
+        print(f"  ais.decode: {old_time * 1000:8.1f} ms  ({len(corpus) / old_time:10.0f} pesan/detik)")
+        print(f"  NumPy     : {new_time * 1000:8.1f} ms  ({len(corpus) / new_time:10.0f} pesan/detik)")
+        print(f"  Speedup: {old_time / new_time:.2f}x")
+
+    different = sum(1 for old, new in zip(old_result, new_result) if old != new)
+    if different:
+        print(f"⚠️ {different} hasil decode berbeda")
+
+
+def decode_in_process(lines):
+    batch = decode_batch(lines)
+    batch.materialize()
+    return batch
+
+
+def decode_parallel(pool, lines):
+    batch = pool.decode(lines)
+    batch.materialize()
+    return batch
+
+
+def run_parallel_benchmark():
+    corpus = load_corpus()
+    if not corpus:
+        print("❌ Tabel nmea_data kosong, tidak ada corpus untuk benchmark")
+        return
+
+    pool = DecodePool()
+    if not pool.enabled:
+        print("ℹ️ workers <= 1 (atau hanya 1 CPU), decode paralel tidak aktif")
+        return
+
+    started = time.perf_counter()
+    pool.start()
+    # Tunggu semua worker siap agar yang diukur hanya decode
+    pool.decode(corpus)
+    print(f"\n📦 Corpus: {len(corpus)} kalimat, {pool.workers} worker (siap dalam {time.perf_counter() - started:.1f} s)")
+    try:
+        old_time, old_result = _best_of(decode_in_process, corpus)
+        new_time, new_result = _best_of(decode_parallel, pool, corpus)
+    finally:
+        pool.shutdown()
+    print(f"1 proses  : {old_time * 1000:8.1f} ms  ({len(corpus) / old_time:10.0f} kalimat/detik)")
+    print(f"{pool.workers} proses  : {new_time * 1000:8.1f} ms  ({len(corpus) / new_time:10.0f} kalimat/detik)")
+    print(f"Speedup: {old_time / new_time:.2f}x")
+
+    different = sum(1 for i in range(len(corpus)) if old_result.message(i) != new_result.message(i))
+    if different:
+        print(f"⚠️ {different} hasil decode berbeda")
+
+
+def show_menu():
+    """Menampilkan menu utama"""
+    print("\n" + "="*50)
+    print("BENCHMARK".center(50))
+    print("="*50)
+
+    print("\nPilihan:")
+    print("1. Ingest: framing str vs bytes")
+    print("2. Decode: try_decode vs single-pass")
+    print("3. Decode batch: ais.decode vs NumPy (tipe 1/2/3/18)")
+    print("4. Decode paralel: 1 proses vs ProcessPoolExecutor")
+    print("5. Keluar")
+
+    try:
+        choice = input("Pilihan [1-5]: ").strip()
+        return choice
+    except Exception:
+        return "0"
+
+
+if __name__ == "__main__":
+    while True:
+        choice = show_menu()
+
+        if choice == "1":
+            run_ingest_benchmark()
+        elif choice == "2":
+            run_decode_benchmark()
+        elif choice == "3":
+            run_vectorized_benchmark()
+        elif choice == "4":
+            run_parallel_benchmark()
+        elif choice == "5":
+            print("Keluar dari aplikasi...")
+            break
+        else:
+            print("Pilihan tidak valid!")
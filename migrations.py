@@ -1,10 +1,13 @@
 import time
+import datetime
 
 from sqlalchemy import inspect, text
 from sqlalchemy.orm import sessionmaker, close_all_sessions
-from Models import Base, engine, ConfigModel, ConnectionModel, SenderModel
+from Models import Base, engine, ConfigModel, ConnectionModel, SenderModel, get_active_pragmas
 import os
 import configparser
+from Controllers.Counter_controller import rebuild_counters, reconcile_counters, get_counters_by_day
+from Controllers.Upload_controller import TODAY_CURSOR, _first_id_query, _pending_rows_query, _retry_rows_query
 from Untils.path_helper import get_resource_path
 
 def reset_database_connection():
@@ -46,11 +49,19 @@ def verify_database_connection():
     try:
         with engine.connect() as conn:
             print("✅ Koneksi database berhasil")
+        show_storage_pragmas()
     except Exception as e:
         print(f"❌ Gagal terhubung ke database: {str(e)}")
         return False
     return True
 
+def show_storage_pragmas():
+    """Menampilkan profil storage dan pragma SQLite yang aktif"""
+    pragmas = get_active_pragmas()
+    print(f"⚙️ Storage profile: {pragmas.pop('profile')}")
+    for key, value in pragmas.items():
+        print(f"   {key} = {value}")
+
 def show_tables(detailed=False):
     """Menampilkan tabel dengan lebih detail"""
     inspector = inspect(engine)
@@ -68,6 +79,131 @@ def show_tables(detailed=False):
             print(f"├── {col['name']}: {col['type']}")
         print("└─" + "─" * 50)
 
+def add_column(table, column, ddl):
+    """Langkah migrasi ALTER TABLE ADD COLUMN yang aman dijalankan ulang (tabel baru sudah memiliki kolomnya)"""
+    def step(conn):
+        columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+        if column not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+# Migrasi skema berversi untuk database yang sudah terpasang.
+# Versi terakhir yang diterapkan disimpan di PRAGMA user_version.
+SCHEMA_MIGRATIONS = [
+    (1, "Index untuk scan pending upload pada nmea_data", [
+        # Partial index: hanya baris yang belum di-upload (upload = 0)
+        "CREATE INDEX IF NOT EXISTS ix_nmea_data_pending_created_at "
+        "ON nmea_data (created_at) WHERE upload = 0",
+        # Composite index untuk statistik per rentang waktu (covering untuk kolom upload)
+        "CREATE INDEX IF NOT EXISTS ix_nmea_data_created_at_upload "
+        "ON nmea_data (created_at, upload)",
+    ]),
+    (2, "Isi awal tabel counter nmea_counter", [
+        rebuild_counters,
+    ]),
+    (3, "Pilihan engine receiver per koneksi", [
+        add_column("connection", "engine", "VARCHAR"),
+    ]),
+    (4, "Ukuran buffer dan datagram UDP per koneksi", [
+        add_column("connection", "rcvbuf", "INTEGER"),
+        add_column("connection", "max_datagram", "INTEGER"),
+    ]),
+    (5, "Jumlah worker SO_REUSEPORT UDP per koneksi", [
+        add_column("connection", "workers", "INTEGER"),
+    ]),
+    (6, "Opsi multicast UDP per koneksi", [
+        add_column("connection", "multicast_group", "VARCHAR"),
+        add_column("connection", "multicast_interface", "VARCHAR"),
+        add_column("connection", "multicast_ttl", "INTEGER"),
+    ]),
+    (7, "Index created_at menggantikan index flag upload (progres upload ada di upload_cursor)", [
+        # Flag upload tidak diubah lagi: partial index WHERE upload = 0 memuat semua baris
+        "DROP INDEX IF EXISTS ix_nmea_data_pending_created_at",
+        "DROP INDEX IF EXISTS ix_nmea_data_created_at_upload",
+        "CREATE INDEX IF NOT EXISTS ix_nmea_data_created_at ON nmea_data (created_at)",
+    ]),
+]
+
+# Query panas uploader yang wajib memakai index, dibangun dari fungsi yang dipakai uploader
+HOT_QUERIES = {
+    "iter_pending_batches (today)":
+        lambda today: _pending_rows_query({'boundary_id': None}, 0, 300),
+    "iter_pending_batches (historical)":
+        lambda today: _pending_rows_query({'boundary_id': 0}, 0, 10000),
+    "get_retry_exceptions":
+        lambda today: _retry_rows_query(TODAY_CURSOR, 10000),
+    "_first_id_since (cursor awal/rollover)":
+        lambda today: _first_id_query(today),
+}
+
+def get_schema_version():
+    with engine.connect() as conn:
+        return conn.execute(text("PRAGMA user_version")).scalar() or 0
+
+def apply_schema_migrations():
+    """Terapkan migrasi skema yang belum dijalankan, berurutan sesuai versi"""
+    current_version = get_schema_version()
+    pending = [m for m in SCHEMA_MIGRATIONS if m[0] > current_version]
+
+    if not pending:
+        print(f"✅ Skema sudah versi terbaru (v{current_version})")
+        return current_version
+
+    for version, description, statements in pending:
+        print(f"🛠️ Migrasi skema v{version}: {description}")
+        with engine.begin() as conn:
+            for statement in statements:
+                # Langkah migrasi bisa berupa SQL atau fungsi yang menerima koneksi
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(text(statement))
+            conn.execute(text(f"PRAGMA user_version = {int(version)}"))
+        current_version = version
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE nmea_data"))
+        conn.commit()
+
+    print(f"✅ Skema diperbarui ke v{current_version}")
+    return current_version
+
+def check_query_plans(verbose=True):
+    """Pastikan query panas memakai index, bukan full table scan"""
+    today = datetime.datetime.now(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    failed = []
+
+    with engine.connect() as conn:
+        for name, build in HOT_QUERIES.items():
+            compiled = build(today).compile(dialect=engine.dialect)
+            params = tuple(str(compiled.params[key]) for key in compiled.positiontup)
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+            details = [row[-1] for row in plan]
+            full_scan = any(d.startswith("SCAN nmea_data") and "INDEX" not in d for d in details)
+            if full_scan:
+                failed.append(name)
+            if verbose:
+                status = "❌" if full_scan else "✅"
+                print(f"{status} {name}")
+                for detail in details:
+                    print(f"      {detail}")
+
+    if failed:
+        print(f"❌ Query tanpa index: {', '.join(failed)}")
+    return not failed
+
+def run_reconcile_counters():
+    """Bangun ulang tabel counter dan tampilkan ringkasan per hari"""
+    print("\n🧮 Rekonsiliasi counter...")
+    try:
+        buckets = reconcile_counters()
+        print(f"✅ {buckets} baris counter dibangun ulang")
+        for item in get_counters_by_day(limit=7):
+            print(f"   {item['day']}: received {item['received']:,}, uploaded {item['uploaded']:,}, "
+                  f"failed {item['failed']:,}, pending {item['pending']:,}")
+    except Exception as e:
+        print(f"❌ Gagal rekonsiliasi counter: {str(e)}")
+
 def run_migrations():
     """Opsi 1: Migrasi standar"""
     print("\n🛠️ Menjalankan migrasi standar...")
@@ -87,6 +223,8 @@ def run_migrations():
         if not verify_tables_created(expected_tables):
             raise RuntimeError("Gagal memverifikasi tabel dibuat")
 
+        apply_schema_migrations()
+
         print("\n✅ Migrasi berhasil!")
         show_tables()
 
@@ -125,6 +263,10 @@ def refresh_migrations():
         if not verify_tables_created(expected_tables):
             raise RuntimeError("Tabel tidak terbentuk setelah migrasi")
 
+        with engine.begin() as conn:
+            conn.execute(text("PRAGMA user_version = 0"))
+        apply_schema_migrations()
+
         print("\n✅ Migrasi ulang berhasil!")
         show_tables()
 
@@ -213,10 +355,12 @@ def show_menu():
     print("1. Migrasi Standar (tambah tabel/kolom baru)")
     print("2. Migrasi Ulang (hapus semua & buat baru)")
     print("3. Jalankan Seeder")
-    print("4. Keluar")
+    print("4. Cek Query Plan (index)")
+    print("5. Rekonsiliasi Counter (hitung ulang dari awal)")
+    print("6. Keluar")
 
     try:
-        choice = input("Pilihan [1-4]: ").strip()
+        choice = input("Pilihan [1-6]: ").strip()
         return choice
     except Exception:
         return "0"
@@ -232,6 +376,11 @@ if __name__ == "__main__":
         elif choice == "3":
             run_seeder()
         elif choice == "4":
+            print(f"\n📐 Skema versi v{get_schema_version()}")
+            check_query_plans()
+        elif choice == "5":
+            run_reconcile_counters()
+        elif choice == "6":
             print("Keluar dari aplikasi...")
             break
         else: